@@ -11,14 +11,29 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from boards_of_django.authentication.services import activate_user, create_user, resend_confirmation_email
+from boards_of_django.authentication.services import (
+    activate_user,
+    create_user,
+    login_user,
+    login_user_signed,
+    logout_user,
+    logout_user_signed,
+    refresh_access_token,
+    resend_confirmation_email,
+)
+from boards_of_django.authentication.signed_tokens import SignedToken
+from boards_of_django.common.idempotency import IDEMPOTENCY_KEY_PARAMETER, IdempotencyMixin
+from boards_of_django.common.transactions import TransactionPolicyMixin
+from boards_of_django.common.utils import RequestWithUser
 
 User = get_user_model()
 
 
-class UserRegisterApi(APIView):
+class UserRegisterApi(IdempotencyMixin, TransactionPolicyMixin, APIView):
     """Create a new user."""
 
+    idempotent_methods = ("post",)
+
     class InputSerializer(serializers.Serializer[Any]):
         email = serializers.EmailField(required=True)
         username = serializers.CharField(required=True)
@@ -27,9 +42,11 @@ class UserRegisterApi(APIView):
 
     @swagger_auto_schema(  # type: ignore
         request_body=InputSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: openapi.Response(description="user was successfully created"),
             400: openapi.Response(description="input validation failed"),
+            409: openapi.Response(description="a request with the same Idempotency-Key is in progress"),
         },
     )
     def post(self, request: Request) -> Response:
@@ -42,6 +59,8 @@ class UserRegisterApi(APIView):
         - e-mail format is correct
         - e-mail is unique
         - username is unique
+
+        Send an Idempotency-Key header so that retries of the request do not fail, as the user already exists.
         """
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -51,7 +70,7 @@ class UserRegisterApi(APIView):
         return Response(status=status.HTTP_201_CREATED)
 
 
-class UserConfirmRegistrationApi(APIView):
+class UserConfirmRegistrationApi(TransactionPolicyMixin, APIView):
     """Confirm registration of a user."""
 
     class InputSerializer(serializers.Serializer[Any]):
@@ -75,7 +94,7 @@ class UserConfirmRegistrationApi(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class UserResendConfirmationOTPApi(APIView):
+class UserResendConfirmationOTPApi(TransactionPolicyMixin, APIView):
     """Resend confirmation email."""
 
     class InputSerializer(serializers.Serializer[Any]):
@@ -98,17 +117,37 @@ class UserResendConfirmationOTPApi(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class UserLoginApi(ObtainAuthToken):
+class UserLoginApi(TransactionPolicyMixin, ObtainAuthToken):
     """Log the user in."""
 
+    # The token that the client may still send, e.g. an expired one, does not matter
+    authentication_classes = ()
+
+    LOGIN_MODE_QUERY_PARAM = "mode"
+    SIGNED_MODE = "signed"
+
     @swagger_auto_schema(  # type: ignore
         request_body=AuthTokenSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                LOGIN_MODE_QUERY_PARAM,
+                openapi.IN_QUERY,
+                description="Pass `signed` to get signed access and refresh tokens instead of an authorization token",
+                type=openapi.TYPE_STRING,
+                enum=[SIGNED_MODE],
+                required=False,
+            )
+        ],
         responses={
-            201: openapi.Response(
+            200: openapi.Response(
                 description="",
                 schema=openapi.Schema(
                     type=openapi.TYPE_OBJECT,
-                    properties={"token": openapi.Schema(type=openapi.TYPE_STRING, description="authorization token")},
+                    properties={
+                        "token": openapi.Schema(type=openapi.TYPE_STRING, description="authorization token"),
+                        "access": openapi.Schema(type=openapi.TYPE_STRING, description="signed access token"),
+                        "refresh": openapi.Schema(type=openapi.TYPE_STRING, description="signed refresh token"),
+                    },
                 ),
             ),
             400: openapi.Response(description="incorrect credentials"),
@@ -119,24 +158,80 @@ class UserLoginApi(ObtainAuthToken):
 
         The user must provide correct credentials (username and password). In response, the user receives a token
         which can be later used via Authorization: Token <token> header to authenticate to auth-protected endpoints.
+        The token expires once it has not been used for a while, the user then has to log in again.
+
+        With `mode=signed`, the user receives a short-lived access token instead, to be sent in the
+        Authorization: Bearer <token> header, and a refresh token to get new access tokens from the token refresh
+        endpoint. Access tokens are verified without any database query.
         """
-        return super().post(request, *args, **kwargs)
+        serializer = AuthTokenSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+
+        if request.query_params.get(self.LOGIN_MODE_QUERY_PARAM) == self.SIGNED_MODE:
+            return Response(login_user_signed(user=user))
+
+        token = login_user(user=user)
+
+        return Response({"token": token.key})
+
+
+class UserTokenRefreshApi(TransactionPolicyMixin, APIView):
+    """Refresh signed access tokens."""
+
+    # The refresh token is the credential
+    authentication_classes = ()
+
+    class InputSerializer(serializers.Serializer[Any]):
+        refresh = serializers.CharField(required=True)
+
+    @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
+        responses={
+            200: openapi.Response(
+                description="",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={"access": openapi.Schema(type=openapi.TYPE_STRING, description="signed access token")},
+                ),
+            ),
+            400: openapi.Response(description="invalid, expired or revoked refresh token"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        """Get a new access token in exchange for the refresh token received on login with `mode=signed`."""
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        access = refresh_access_token(refresh_token=serializer.validated_data["refresh"])
+
+        return Response({"access": access})
 
 
-class UserLogoutApi(APIView):
+class UserLogoutApi(TransactionPolicyMixin, APIView):
     """Log the user out."""
 
     permission_classes = (IsAuthenticated,)
 
+    class InputSerializer(serializers.Serializer[Any]):
+        refresh = serializers.CharField(required=False)
+
     @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
         responses={
             200: openapi.Response(description=""),
         },
     )
-    def post(self, request: Request) -> Response:
-        """Log the user out by invalidating her/his authorization token."""
-        user = request.user
-        if hasattr(user, "auth_token"):
-            user.auth_token.delete()  # type: ignore
+    def post(self, request: RequestWithUser) -> Response:
+        """Log the user out by invalidating her/his authorization token.
+
+        A user authenticated with a signed access token should send her/his refresh token as well, both are revoked.
+        """
+        if isinstance(request.auth, SignedToken):
+            serializer = self.InputSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            logout_user_signed(access_token=request.auth, refresh_token=serializer.validated_data.get("refresh"))
+        else:
+            logout_user(user=request.user)
 
         return Response(status=status.HTTP_200_OK)
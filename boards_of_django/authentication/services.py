@@ -1,13 +1,29 @@
 from datetime import timedelta
+from typing import Dict, List, Optional
 
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
 
 from boards_of_django.authentication.models import ConfirmationOTP, User
+from boards_of_django.authentication.signed_tokens import (
+    ACCESS,
+    REFRESH,
+    SignedToken,
+    create_signed_token,
+    get_revocation_list,
+    read_signed_token,
+)
+from boards_of_django.authentication.tokens import invalidate_cached_tokens, token_expires_at
 from boards_of_django.tasks.celery import task_send_confirmation_email
 
+# Expired tokens are deleted in batches of that many rows, at most that many batches per run
+TOKEN_CLEANUP_BATCH_SIZE = 1000
+TOKEN_CLEANUP_MAX_BATCHES = 100
+
 
 def _validate_user_password(*, password: str, password2: str) -> None:
     if password != password2:
@@ -121,3 +137,176 @@ def resend_confirmation_email(email: str) -> None:
     ConfirmationOTP.objects.filter(user=user).delete()
 
     _create_confirmation_otp_and_send_email(user=user)
+
+
+def _delete_tokens(*, keys: List[str]) -> int:
+    deleted, _ = Token.objects.filter(key__in=keys).delete()
+    # Again once the deletion is committed, in case a concurrent request cached one of the tokens meanwhile
+    invalidate_cached_tokens(keys)
+    transaction.on_commit(lambda: invalidate_cached_tokens(keys))
+    return deleted
+
+
+def login_user(*, user: User) -> Token:
+    """
+    Get the authorization token of a user who provided correct credentials.
+
+    The current token of the user is refreshed, or replaced by a new one if it has expired.
+
+    Parameters
+    ----------
+    user : User who logs in
+
+    Returns
+    -------
+    Token
+    """
+    token = Token.objects.filter(user=user).first()
+    if token is not None and token_expires_at(token.created) <= now():
+        _delete_tokens(keys=[token.key])
+        token = None
+
+    if token is None:
+        # Concurrent logins of the user may create the token first, it is then returned to all of them
+        token, _ = Token.objects.get_or_create(user=user)
+        return token
+
+    token.created = now()
+    token.save(update_fields=["created"])
+    invalidate_cached_tokens([token.key])
+    return token
+
+
+def login_user_signed(*, user: User) -> Dict[str, str]:
+    """
+    Issue signed tokens to a user who provided correct credentials.
+
+    Unlike the authorization token of login_user, nothing is stored: the access token is short-lived and verified
+    without any database query, the refresh token is used to get new access tokens, see refresh_access_token.
+
+    Parameters
+    ----------
+    user : User who logs in
+
+    Returns
+    -------
+    The access and refresh tokens
+    """
+    return {
+        "access": create_signed_token(user=user, kind=ACCESS),
+        "refresh": create_signed_token(user=user, kind=REFRESH),
+    }
+
+
+def refresh_access_token(*, refresh_token: str) -> str:
+    """
+    Issue a new access token in exchange for a refresh token.
+
+    The user is loaded, so that users deactivated since they logged in do not get new access tokens.
+
+    Parameters
+    ----------
+    refresh_token : Refresh token issued by login_user_signed
+
+    Returns
+    -------
+    Access token
+    """
+    token = read_signed_token(refresh_token, kind=REFRESH)
+    if token is None or get_revocation_list().is_revoked(token):
+        raise ValidationError({"refresh": "Invalid or expired token."})
+
+    user = User.objects.filter(id=token.user_id, is_active=True).first()
+    if user is None:
+        raise ValidationError({"refresh": "User inactive or deleted."})
+
+    return create_signed_token(user=user, kind=ACCESS)
+
+
+def logout_user_signed(*, access_token: SignedToken, refresh_token: Optional[str] = None) -> None:
+    """
+    Log the user out by revoking her/his signed tokens, until they expire.
+
+    Parameters
+    ----------
+    access_token : Access token that the user is authenticated with
+    refresh_token : Refresh token of the user, if given. Ignored if it is invalid or was issued to another user.
+
+    Returns
+    -------
+    None
+    """
+    revocation_list = get_revocation_list()
+    revocation_list.revoke(access_token)
+
+    token = read_signed_token(refresh_token, kind=REFRESH) if refresh_token is not None else None
+    if token is not None and token.user_id == access_token.user_id:
+        revocation_list.revoke(token)
+
+
+def logout_user(*, user: User) -> None:
+    """
+    Log the user out by deleting her/his authorization token.
+
+    Parameters
+    ----------
+    user : User who logs out
+
+    Returns
+    -------
+    None
+    """
+    _delete_tokens(keys=list(Token.objects.filter(user=user).values_list("key", flat=True)))
+
+
+def deactivate_user(*, user: User) -> None:
+    """
+    Deactivate a user's account.
+
+    The user can no longer log in, and her/his authorization token stops working at once.
+
+    Parameters
+    ----------
+    user : User to deactivate
+
+    Returns
+    -------
+    None
+    """
+    user.is_active = False
+    user.save(update_fields=["is_active", "updated_at"])
+    _delete_tokens(keys=list(Token.objects.filter(user=user).values_list("key", flat=True)))
+
+
+def delete_expired_tokens(
+    *, batch_size: int = TOKEN_CLEANUP_BATCH_SIZE, max_batches: int = TOKEN_CLEANUP_MAX_BATCHES
+) -> int:
+    """
+    Delete the authorization tokens that have expired.
+
+    Tokens are deleted in batches, each in its own transaction, so that no batch holds locks for long. The run stops
+    after `max_batches` batches, the next run deletes the remaining tokens.
+
+    Parameters
+    ----------
+    batch_size : Number of tokens deleted per batch
+    max_batches : Maximum number of batches
+
+    Returns
+    -------
+    Number of deleted tokens
+    """
+    refreshed_before = now() - timedelta(seconds=settings.AUTH_TOKEN_LIFETIME_SECONDS)
+
+    deleted = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            keys = list(Token.objects.filter(created__lt=refreshed_before).values_list("key", flat=True)[:batch_size])
+            if not keys:
+                break
+            # Unless used meanwhile. The cache does not need to be invalidated, as it never accepts an expired token.
+            deleted += Token.objects.filter(key__in=keys, created__lt=refreshed_before).delete()[0]
+        if len(keys) < batch_size:
+            break
+
+    return deleted
@@ -0,0 +1,197 @@
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import redis
+from django.conf import settings
+from django.core import signing
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.request import Request
+
+from boards_of_django.authentication.models import User
+
+ACCESS = "access"
+REFRESH = "refresh"
+# Every kind of token is signed with its own salt, so that one kind cannot be used as the other
+_SALTS = {
+    ACCESS: "boards_of_django.authentication.access_token",
+    REFRESH: "boards_of_django.authentication.refresh_token",
+}
+REVOKED_TOKENS_KEY = "revoked-tokens"
+
+
+class SignedToken(NamedTuple):
+    """
+    Claims of a signed token.
+
+    Attributes
+    ----------
+    kind : ACCESS or REFRESH
+    user_id : Id of the user the token was issued to
+    is_active : Whether the user was active when the token was issued
+    token_id : Unique id of the token, to revoke it
+    expires_at : Expiry time, as a Unix timestamp
+    """
+
+    kind: str
+    user_id: int
+    is_active: bool
+    token_id: str
+    expires_at: float
+
+
+def create_signed_token(*, user: User, kind: str) -> str:
+    """
+    Create a token signed with the SECRET_KEY, that carries the id of the user and whether the user is active.
+
+    Parameters
+    ----------
+    user : User the token is issued to
+    kind : ACCESS (lives for AUTH_ACCESS_TOKEN_LIFETIME_SECONDS) or REFRESH (AUTH_REFRESH_TOKEN_LIFETIME_SECONDS)
+
+    Returns
+    -------
+    Token
+    """
+    lifetime = (
+        settings.AUTH_ACCESS_TOKEN_LIFETIME_SECONDS if kind == ACCESS else settings.AUTH_REFRESH_TOKEN_LIFETIME_SECONDS
+    )
+    claims = {"uid": user.id, "act": user.is_active, "jti": secrets.token_urlsafe(9), "exp": time.time() + lifetime}
+    return signing.dumps(claims, salt=_SALTS[kind])
+
+
+def read_signed_token(token: str, *, kind: str) -> Optional[SignedToken]:
+    """
+    Verify a signed token and read its claims, without any I/O.
+
+    Parameters
+    ----------
+    token : Token as created by create_signed_token
+    kind : Expected kind of the token
+
+    Returns
+    -------
+    The claims of the token, or None if it is not a valid token of that kind or it has expired. Revocations are not
+    checked, see get_revocation_list.
+    """
+    try:
+        claims: Dict[str, Any] = signing.loads(token, salt=_SALTS[kind])
+    except signing.BadSignature:
+        return None
+    if claims["exp"] <= time.time():
+        return None
+    return SignedToken(
+        kind=kind, user_id=claims["uid"], is_active=claims["act"], token_id=claims["jti"], expires_at=claims["exp"]
+    )
+
+
+class RevocationList(ABC):
+    """
+    Ids of the signed tokens that were revoked before they expired.
+
+    Tokens are only listed until they expire, expired tokens are rejected anyway.
+    """
+
+    @abstractmethod
+    def revoke(self, token: SignedToken) -> None:
+        """Revoke the given token."""
+
+    @abstractmethod
+    def is_revoked(self, token: SignedToken) -> bool:
+        """Tell whether the given token was revoked."""
+
+
+class LocalRevocationList(RevocationList):
+    """
+    Revocation list in the memory of the current process.
+
+    Only meant for development and tests: a token revoked by a process is still accepted by the other ones.
+    """
+
+    def __init__(self) -> None:
+        self._expiries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, token: SignedToken) -> None:
+        now = time.time()
+        with self._lock:
+            self._expiries = {token_id: expiry for token_id, expiry in self._expiries.items() if expiry > now}
+            self._expiries[token.token_id] = token.expires_at
+
+    def is_revoked(self, token: SignedToken) -> bool:
+        with self._lock:
+            return token.token_id in self._expiries
+
+
+class RedisRevocationList(RevocationList):
+    """
+    Revocation list in a Redis sorted set, shared by all the processes.
+
+    Token ids are scored by their expiry, the expired ones are removed whenever a token is revoked, so the set only
+    holds the tokens revoked within the lifetime of a refresh token.
+    """
+
+    def __init__(self, client: redis.Redis, name: str) -> None:
+        self._client = client
+        self._key = name
+
+    def revoke(self, token: SignedToken) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.zremrangebyscore(self._key, "-inf", time.time())
+        pipeline.zadd(self._key, {token.token_id: token.expires_at})
+        pipeline.execute()
+
+    def is_revoked(self, token: SignedToken) -> bool:
+        return self._client.zscore(self._key, token.token_id) is not None
+
+
+@lru_cache(maxsize=None)
+def get_revocation_list() -> RevocationList:
+    """
+    Get the revocation list of the signed tokens.
+
+    The list is kept in Redis when REDIS_URL is set, in the memory of the process otherwise.
+
+    Returns
+    -------
+    RevocationList
+    """
+    if settings.REDIS_URL:
+        return RedisRevocationList(redis.Redis.from_url(settings.REDIS_URL), REVOKED_TOKENS_KEY)
+    return LocalRevocationList()
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authentication by signed access tokens, sent as "Authorization: Bearer <token>".
+
+    The signature, expiry and claims of the token are verified in memory. The only I/O is the lookup of the token in
+    the revocation list, the user is not loaded: request.user only has its id and is_active set, its other fields are
+    loaded from the database when accessed. request.auth holds the claims of the token.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request: Request) -> Optional[Tuple[User, SignedToken]]:
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid bearer header.")
+
+        token = read_signed_token(auth[1].decode(errors="replace"), kind=ACCESS)
+        if token is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        if not token.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        if get_revocation_list().is_revoked(token):
+            raise exceptions.AuthenticationFailed("Token was revoked.")
+
+        return User.from_db(None, ["id", "is_active"], [token.user_id, token.is_active]), token
+
+    def authenticate_header(self, request: Request) -> str:
+        return self.keyword
@@ -1,17 +1,45 @@
-from typing import Dict, List, Optional
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
 
 import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from boards_of_django.authentication.models import User
+from boards_of_django.boards.models import Membership
 from factories import UserFactory
 
 register_url = reverse("authentication:register")
 login_url = reverse("authentication:login")
 logout_url = reverse("authentication:logout")
+token_refresh_url = reverse("authentication:token-refresh")
+# Any API that requires authentication
+boards_url = reverse("boards:boards")
+
+
+def _log_in(api_client: APIClient) -> str:
+    UserFactory(username="test")
+    token: str = api_client.post(login_url, {"username": "test", "password": "password"}).json()["token"]
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+    return token
+
+
+def _log_in_signed(api_client: APIClient) -> Dict[str, str]:
+    UserFactory(username="test")
+    tokens: Dict[str, str] = api_client.post(
+        f"{login_url}?mode=signed", {"username": "test", "password": "password"}
+    ).json()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    return tokens
+
+
+def _token_queries(context: CaptureQueriesContext) -> List[str]:
+    return [query["sql"] for query in context.captured_queries if "authtoken_token" in query["sql"]]
 
 
 @pytest.mark.django_db
@@ -31,6 +59,45 @@ def test_register_success(api_client: APIClient) -> None:
     assert User.objects.count() == 1
 
 
+@pytest.mark.django_db
+def test_register_with_idempotency_key_is_replayed(
+    api_client: APIClient, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    data = {
+        "email": "test@example.com",
+        "username": "test",
+        "password": "Str0ng!P@$$w0rd",
+        "password2": "Str0ng!P@$$w0rd",
+    }
+
+    key = "5f0c4a37-1a6e-4d8c-9c3e-2b7f1f4e8a90"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(register_url, data, HTTP_IDEMPOTENCY_KEY=key)
+    replayed = api_client.post(register_url, data, HTTP_IDEMPOTENCY_KEY=key)
+
+    assert response.status_code == replayed.status_code == status.HTTP_201_CREATED
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert User.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_register_with_idempotency_key_that_is_not_a_uuid(api_client: APIClient) -> None:
+    data = {
+        "email": "test@example.com",
+        "username": "test",
+        "password": "Str0ng!P@$$w0rd",
+        "password2": "Str0ng!P@$$w0rd",
+    }
+
+    # Anonymous clients share a scope, their keys must not collide
+    response = api_client.post(register_url, data, HTTP_IDEMPOTENCY_KEY="key")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"Idempotency-Key": "Must be a UUID for anonymous requests."}
+    assert User.objects.count() == 0
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "data, expected_status_code, expected_response_json, expected_user_count",
@@ -250,3 +317,157 @@ def test_logout_invalid_token(
     response = api_client.post(logout_url)
 
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_authentication_is_cached(api_client: APIClient) -> None:
+    _log_in(api_client)
+    api_client.get(boards_url)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(boards_url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert _token_queries(context) == []
+
+
+@pytest.mark.django_db
+def test_logout_invalidates_cached_token(api_client: APIClient) -> None:
+    _log_in(api_client)
+    api_client.get(boards_url)
+
+    api_client.post(logout_url)
+
+    assert api_client.get(boards_url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_expired_token(api_client: APIClient) -> None:
+    token = _log_in(api_client)
+    Token.objects.filter(key=token).update(
+        created=Token.objects.get(key=token).created - timedelta(seconds=settings.AUTH_TOKEN_LIFETIME_SECONDS)
+    )
+
+    response = api_client.get(boards_url)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Token has expired."}
+    assert not Token.objects.filter(key=token).exists()
+
+
+@pytest.mark.django_db
+def test_token_is_refreshed_when_used(api_client: APIClient) -> None:
+    token = _log_in(api_client)
+    refreshed_at = Token.objects.get(key=token).created - timedelta(
+        seconds=settings.AUTH_TOKEN_REFRESH_INTERVAL_SECONDS
+    )
+    Token.objects.filter(key=token).update(created=refreshed_at)
+
+    with CaptureQueriesContext(connection) as context:
+        assert api_client.get(boards_url).status_code == status.HTTP_200_OK
+        assert api_client.get(boards_url).status_code == status.HTTP_200_OK
+
+    assert Token.objects.get(key=token).created > refreshed_at
+    # Loaded and refreshed once
+    assert len(_token_queries(context)) == 2
+
+
+@pytest.mark.django_db
+def test_login_replaces_expired_token(api_client: APIClient) -> None:
+    token = _log_in(api_client)
+    Token.objects.filter(key=token).update(
+        created=Token.objects.get(key=token).created - timedelta(seconds=settings.AUTH_TOKEN_LIFETIME_SECONDS)
+    )
+
+    response = api_client.post(login_url, {"username": "test", "password": "password"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["token"] != token
+    assert Token.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_login_keeps_valid_token(api_client: APIClient) -> None:
+    token = _log_in(api_client)
+
+    response = api_client.post(login_url, {"username": "test", "password": "password"})
+
+    assert response.json()["token"] == token
+
+
+@pytest.mark.django_db
+def test_signed_login(api_client: APIClient) -> None:
+    tokens = _log_in_signed(api_client)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(boards_url)
+
+    assert set(tokens) == {"access", "refresh"}
+    assert response.status_code == status.HTTP_200_OK
+    # Neither the token nor the user are loaded
+    assert [query for query in context.captured_queries if "authentication_user" in query["sql"]] == []
+    assert Token.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_signed_token_invalid(api_client: APIClient) -> None:
+    tokens = _log_in_signed(api_client)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['refresh']}")
+
+    response = api_client.get(boards_url)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Invalid or expired token."}
+
+
+@pytest.mark.django_db
+def test_signed_token_refresh(api_client: APIClient) -> None:
+    tokens = _log_in_signed(api_client)
+    api_client.credentials()
+
+    response = api_client.post(token_refresh_url, {"refresh": tokens["refresh"]})
+
+    assert response.status_code == status.HTTP_200_OK
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+    assert api_client.get(boards_url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("kind", ["access", "refresh"])
+def test_signed_token_refresh_invalid(api_client: APIClient, kind: str) -> None:
+    tokens = _log_in_signed(api_client)
+    api_client.credentials()
+    if kind == "refresh":
+        User.objects.update(is_active=False)
+
+    response = api_client.post(token_refresh_url, {"refresh": tokens[kind]})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "refresh" in response.json()
+
+
+@pytest.mark.django_db
+def test_signed_logout_revokes_tokens(api_client: APIClient) -> None:
+    tokens = _log_in_signed(api_client)
+
+    response = api_client.post(logout_url, {"refresh": tokens["refresh"]})
+
+    assert response.status_code == status.HTTP_200_OK
+    response = api_client.get(boards_url)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Token was revoked."}
+    api_client.credentials()
+    assert (
+        api_client.post(token_refresh_url, {"refresh": tokens["refresh"]}).status_code == status.HTTP_400_BAD_REQUEST
+    )
+
+
+@pytest.mark.django_db
+def test_signed_token_user_can_write(api_client: APIClient) -> None:
+    _log_in_signed(api_client)
+
+    response = api_client.post(boards_url, {"name": "signed_tokens"})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    membership = Membership.objects.get(board__name="signed_tokens")
+    assert (membership.user.username, membership.role) == ("test", Membership.Role.ADMIN)
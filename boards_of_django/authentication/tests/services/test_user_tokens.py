@@ -0,0 +1,74 @@
+from datetime import timedelta
+from typing import List
+
+import pytest
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils.timezone import now
+from pytest_mock import MockerFixture
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from boards_of_django.authentication.services import deactivate_user, delete_expired_tokens, login_user
+from boards_of_django.authentication.tokens import CachedTokenAuthentication
+from boards_of_django.common import transactions
+from boards_of_django.common.transactions import ReplicaRouter, use_replica
+from factories import UserFactory
+
+
+@pytest.mark.django_db
+def test_deactivated_user_cannot_authenticate() -> None:
+    user = UserFactory()
+    token = login_user(user=user)
+    # Cached
+    CachedTokenAuthentication().authenticate_credentials(token.key)
+
+    deactivate_user(user=user)
+
+    user.refresh_from_db()
+    assert not user.is_active
+    assert not Token.objects.filter(user=user).exists()
+    with pytest.raises(AuthenticationFailed):
+        CachedTokenAuthentication().authenticate_credentials(token.key)
+
+
+@pytest.mark.django_db
+def test_delete_expired_tokens() -> None:
+    expired = [login_user(user=UserFactory()) for _ in range(5)]
+    valid = login_user(user=UserFactory())
+    Token.objects.filter(key__in=[token.key for token in expired]).update(
+        created=now() - timedelta(seconds=settings.AUTH_TOKEN_LIFETIME_SECONDS + 1)
+    )
+
+    assert delete_expired_tokens(batch_size=2, max_batches=2) == 4
+    assert delete_expired_tokens(batch_size=2, max_batches=2) == 1
+    assert delete_expired_tokens(batch_size=2, max_batches=2) == 0
+
+    assert list(Token.objects.values_list("key", flat=True)) == [valid.key]
+
+
+@pytest.mark.django_db
+def test_concurrent_logins_get_the_same_token(mocker: MockerFixture) -> None:
+    user = UserFactory()
+    token = Token.objects.create(user=user)
+    # As if the token was created by another login after this one looked it up
+    mocker.patch.object(QuerySet, "first", return_value=None)
+
+    assert login_user(user=user) == token
+
+
+@pytest.mark.django_db
+def test_tokens_are_read_from_primary(mocker: MockerFixture) -> None:
+    token = login_user(user=UserFactory())
+    replica_reads: List[bool] = []
+    mocker.patch.object(
+        ReplicaRouter,
+        "db_for_read",
+        autospec=True,
+        side_effect=lambda router, model, **hints: replica_reads.append(transactions._use_replica.get()),
+    )
+
+    with use_replica():
+        CachedTokenAuthentication().authenticate_credentials(token.key)
+
+    assert replica_reads and not any(replica_reads)
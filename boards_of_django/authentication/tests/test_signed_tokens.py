@@ -0,0 +1,85 @@
+import os
+import time
+import uuid
+from typing import Any, Iterator
+
+import pytest
+import redis
+
+from boards_of_django.authentication.signed_tokens import (
+    ACCESS,
+    REFRESH,
+    LocalRevocationList,
+    RedisRevocationList,
+    RevocationList,
+    SignedToken,
+    create_signed_token,
+    read_signed_token,
+)
+from factories import UserFactory
+
+
+@pytest.fixture(params=["local", "redis"])
+def revocation_list(request: pytest.FixtureRequest) -> Iterator[RevocationList]:
+    if request.param == "local":
+        yield LocalRevocationList()
+        return
+
+    if not os.environ.get("REDIS_URL"):
+        pytest.skip("REDIS_URL is not set")
+    client = redis.Redis.from_url(os.environ["REDIS_URL"])
+    name = f"test-revoked-tokens-{uuid.uuid4()}"
+    yield RedisRevocationList(client, name)
+    client.delete(name)
+
+
+@pytest.mark.django_db
+def test_read_signed_token() -> None:
+    user = UserFactory()
+
+    token = read_signed_token(create_signed_token(user=user, kind=ACCESS), kind=ACCESS)
+
+    assert token is not None
+    assert (token.kind, token.user_id, token.is_active) == (ACCESS, user.id, True)
+
+
+@pytest.mark.django_db
+def test_read_signed_token_of_another_kind() -> None:
+    assert read_signed_token(create_signed_token(user=UserFactory(), kind=REFRESH), kind=ACCESS) is None
+
+
+@pytest.mark.django_db
+def test_read_tampered_signed_token() -> None:
+    token = create_signed_token(user=UserFactory(), kind=ACCESS)
+    payload, rest = token.split(":", 1)
+
+    assert read_signed_token(f"{payload[:-1]}A:{rest}", kind=ACCESS) is None
+    assert read_signed_token("not a token", kind=ACCESS) is None
+
+
+@pytest.mark.django_db
+def test_read_expired_signed_token(settings: Any) -> None:
+    settings.AUTH_ACCESS_TOKEN_LIFETIME_SECONDS = 0
+
+    assert read_signed_token(create_signed_token(user=UserFactory(), kind=ACCESS), kind=ACCESS) is None
+
+
+@pytest.mark.django_db
+def test_revocation_list(revocation_list: RevocationList) -> None:
+    user = UserFactory()
+    revoked = read_signed_token(create_signed_token(user=user, kind=ACCESS), kind=ACCESS)
+    other = read_signed_token(create_signed_token(user=user, kind=ACCESS), kind=ACCESS)
+    assert revoked is not None and other is not None
+
+    revocation_list.revoke(revoked)
+
+    assert revocation_list.is_revoked(revoked)
+    assert not revocation_list.is_revoked(other)
+
+
+def test_revocation_list_drops_expired_tokens(revocation_list: RevocationList) -> None:
+    expired = SignedToken(kind=ACCESS, user_id=1, is_active=True, token_id="expired", expires_at=time.time() - 1)
+    revocation_list.revoke(expired)
+    revocation_list.revoke(expired._replace(token_id="valid", expires_at=time.time() + 60))
+
+    assert not revocation_list.is_revoked(expired)
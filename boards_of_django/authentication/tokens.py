@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from boards_of_django.authentication.models import User
+
+
+def _cache_key(key: str) -> str:
+    # The keys of the tokens are credentials, they are not stored in the cache as such
+    return f"authtoken:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def token_expires_at(refreshed_at: datetime) -> datetime:
+    """
+    Get the time at which a token expires, unless it is used (and so refreshed) before.
+
+    Parameters
+    ----------
+    refreshed_at : Time at which the token was created or last refreshed (Token.created)
+
+    Returns
+    -------
+    Expiry time
+    """
+    return refreshed_at + timedelta(seconds=settings.AUTH_TOKEN_LIFETIME_SECONDS)
+
+
+def invalidate_cached_tokens(keys: Iterable[str]) -> None:
+    """
+    Drop the given tokens from the cache of CachedTokenAuthentication, e.g. once they are deleted.
+
+    Parameters
+    ----------
+    keys : Keys of the tokens
+    """
+    cache.delete_many([_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that does not query the database on every request.
+
+    The user of every token is cached for AUTH_TOKEN_CACHE_TTL_SECONDS, without its password. The services that delete
+    tokens or deactivate users invalidate the cache, see invalidate_cached_tokens.
+
+    Tokens expire AUTH_TOKEN_LIFETIME_SECONDS after they were last refreshed. Token.created holds the time of the last
+    refresh: a token in use is refreshed at most every AUTH_TOKEN_REFRESH_INTERVAL_SECONDS, so that it only expires
+    once it has not been used for the whole lifetime, without writing to the database on every request.
+    """
+
+    def authenticate_credentials(self, key: str) -> Tuple[User, Token]:
+        # The transactions module imports the views of DRF, whose settings import this module
+        from boards_of_django.common.transactions import use_primary
+
+        now = timezone.now()
+        cached: Optional[Tuple[User, datetime]] = cache.get(_cache_key(key))
+        # A token that seems expired may have been refreshed by another process meanwhile
+        if cached is not None and token_expires_at(cached[1]) > now:
+            user, refreshed_at = cached
+        else:
+            cached = None
+            # The user is cached: a lagging replica could bring back a token that was just deleted, or miss a new one
+            with use_primary():
+                token = Token.objects.select_related("user").defer("user__password").filter(key=key).first()
+            if token is None:
+                raise exceptions.AuthenticationFailed("Invalid token.")
+            user, refreshed_at = token.user, token.created
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        if token_expires_at(refreshed_at) <= now:
+            Token.objects.filter(key=key, created=refreshed_at).delete()
+            invalidate_cached_tokens([key])
+            raise exceptions.AuthenticationFailed("Token has expired.")
+
+        if refreshed_at + timedelta(seconds=settings.AUTH_TOKEN_REFRESH_INTERVAL_SECONDS) <= now:
+            Token.objects.filter(key=key).update(created=now)
+            refreshed_at, cached = now, None
+
+        if cached is None:
+            cache.set(_cache_key(key), (user, refreshed_at), timeout=settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+
+        return user, Token(key=key, user=user, created=refreshed_at)
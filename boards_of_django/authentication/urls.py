@@ -6,6 +6,7 @@ from boards_of_django.authentication.apis import (
     UserLogoutApi,
     UserRegisterApi,
     UserResendConfirmationOTPApi,
+    UserTokenRefreshApi,
 )
 
 urlpatterns = [
@@ -14,4 +15,5 @@ urlpatterns = [
     path("resend-confirmation-token/", UserResendConfirmationOTPApi.as_view(), name="resend-confirmation-token"),
     path("login/", UserLoginApi.as_view(), name="login"),
     path("logout/", UserLogoutApi.as_view(), name="logout"),
+    path("token/refresh/", UserTokenRefreshApi.as_view(), name="token-refresh"),
 ]
@@ -1,5 +1,6 @@
-from typing import Any
+from typing import Any, Dict, Optional
 
+from django.core.exceptions import ValidationError
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers, status
@@ -8,26 +9,66 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from boards_of_django.authentication.models import User
-from boards_of_django.boards.models import Board, Comment, Post
-from boards_of_django.boards.selectors import board_get, board_list, comment_get, comment_list, post_get, post_list
+from boards_of_django.boards.models import Board, Post
+from boards_of_django.boards.selectors import (
+    board_get,
+    board_list,
+    board_posts_page_cache,
+    comment_get,
+    comment_list,
+    comment_search,
+    comment_tree,
+    listed_comments,
+    post_get,
+    post_list,
+    post_search,
+    post_view_count,
+    visible_boards,
+    visible_comments,
+    visible_posts,
+)
 from boards_of_django.boards.services import (
     add_admin_to_board,
     add_member_to_board,
+    add_member_to_boards,
+    add_members_to_board,
     create_board,
     create_comment,
     create_post,
+    create_posts,
+    delete_board,
+    delete_comment,
     delete_post,
+    record_post_view,
+    remove_member_from_boards,
     update_post,
 )
-from boards_of_django.common.pagination import LimitOffsetPagination, get_paginated_response
+from boards_of_django.common.idempotency import IDEMPOTENCY_KEY_PARAMETER, IdempotencyMixin
+from boards_of_django.common.pagination import (
+    CountStrategy,
+    CursorPagination,
+    LimitOffsetPagination,
+    get_paginated_response,
+)
+from boards_of_django.common.transactions import TransactionPolicy, TransactionPolicyMixin, use_primary
 from boards_of_django.common.utils import RequestWithUser as Request
-from boards_of_django.common.utils import inline_serializer
+from boards_of_django.common.utils import (
+    SelectorRelatedField,
+    conditional_response,
+    get_if_match_version,
+    inline_serializer,
+    modified_etag,
+    reverse_with_query_params,
+    validator_headers,
+    version_etag,
+)
 
 
-class BoardsApi(APIView):
+class BoardsApi(TransactionPolicyMixin, APIView):
     """Manage boards."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"get": TransactionPolicy.REPLICA, "post": TransactionPolicy.MANUAL}
 
     class InputSerializer(serializers.Serializer[Any]):
         name = serializers.CharField(required=True)
@@ -65,10 +106,26 @@ class BoardsApi(APIView):
 
     class OutputSerializer(serializers.Serializer[Any]):
         name = serializers.CharField()
+        is_member = serializers.BooleanField()
+        is_admin = serializers.BooleanField()
+        member_count = serializers.IntegerField()
+        post_count = serializers.IntegerField()
 
-    @swagger_auto_schema(responses={200: OutputSerializer(many=True)})  # type: ignore
+    @swagger_auto_schema(
+        responses={
+            200: OutputSerializer(many=True),
+            304: openapi.Response(description="boards were not modified since the given ETag or date"),
+        }
+    )  # type: ignore
     def get(self, request: Request) -> Response:
-        """Retrieve list of boards."""
+        """
+        Retrieve list of boards, with the current user's membership and the number of members and posts.
+
+        The ETag header changes whenever a board of the list is added, removed or modified. Send it back in the
+        If-None-Match header to get a 304 Not Modified meanwhile.
+
+        The ETag is not sent with cursor pagination or estimated counts, nor for the pages past a capped count.
+        """
         filters_serializer = self.FilterSerializer(data=request.query_params)
         filters_serializer.is_valid(raise_exception=True)
 
@@ -80,38 +137,75 @@ class BoardsApi(APIView):
             queryset=boards,
             request=request,
             view=self,
+            conditional=True,
         )
 
 
-class DetailBoardsApi(APIView):
-    """View board details."""
+class DetailBoardsApi(TransactionPolicyMixin, APIView):
+    """Manage board details."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"delete": TransactionPolicy.MANUAL}
 
     class OutputSerializer(serializers.Serializer[Any]):
         name = serializers.CharField()
+        member_count = serializers.IntegerField()
+        post_count = serializers.IntegerField()
 
     @swagger_auto_schema(
         responses={
             200: OutputSerializer(),
+            304: openapi.Response(description="board was not modified since the given ETag or date"),
             404: openapi.Response(description="board does not exist"),
         }
     )  # type: ignore
     def get(self, request: Request, board_id: int) -> Response:
-        """Retrieve board details."""
+        """
+        Retrieve board details.
+
+        The ETag and Last-Modified headers change along with the board and its counters. Send them back in the
+        If-None-Match or If-Modified-Since headers to get a 304 Not Modified while the board is unchanged.
+        """
         board = board_get(board_id=board_id)
         if board is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
+        etag = modified_etag(board.updated_at)
+        not_modified = conditional_response(request, etag, board.updated_at)
+        if not_modified is not None:
+            return not_modified
+
         data = self.OutputSerializer(board).data
 
-        return Response(data=data, status=status.HTTP_200_OK)
+        return Response(data=data, status=status.HTTP_200_OK, headers=validator_headers(etag, board.updated_at))
+
+    @swagger_auto_schema(  # type: ignore
+        responses={
+            204: openapi.Response(description="board was deleted"),
+            403: openapi.Response(description="user is not a board admin"),
+            404: openapi.Response(description="board does not exist"),
+        }
+    )
+    def delete(self, request: Request, board_id: int) -> Response:
+        """
+        Delete board.
+
+        The board, its posts and their comments disappear at once, they are purged in the background.
+        """
+        board = board_get(board_id=board_id)
+        if board is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        delete_board(board=board, user=request.user)
 
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-class JoinBoardsApi(APIView):
+
+class JoinBoardsApi(TransactionPolicyMixin, APIView):
     """Join the board as its member."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
 
     def post(self, request: Request, board_id: int) -> Response:
         """
@@ -134,10 +228,11 @@ class JoinBoardsApi(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class AddAdminsBoardsApi(APIView):
+class AddAdminsBoardsApi(TransactionPolicyMixin, APIView):
     """Assign users as board administrators."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
 
     class InputSerializer(serializers.Serializer[Any]):
         users_to_add = serializers.PrimaryKeyRelatedField(required=True, many=True, queryset=User.objects.all())
@@ -170,20 +265,141 @@ class AddAdminsBoardsApi(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class PostsApi(APIView):
+class BulkJoinBoardsApi(TransactionPolicyMixin, APIView):
+    """Join many boards as their member."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
+
+    class InputSerializer(serializers.Serializer[Any]):
+        # Boards are plain ids: the ones that do not exist are skipped by the single INSERT that adds the memberships
+        boards = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=1000)
+
+    class OutputSerializer(serializers.Serializer[Any]):
+        joined = serializers.ListField(child=serializers.IntegerField())
+
+    @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
+        responses={
+            200: OutputSerializer,
+            400: openapi.Response(description="input validation failed"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        """
+        Join many boards as their member at once.
+
+        Boards that do not exist or that the user is already a member of are skipped. The ids of the boards that the
+        user joined are returned.
+        """
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        joined = add_member_to_boards(user=request.user, board_ids=serializer.validated_data["boards"])
+
+        data = self.OutputSerializer({"joined": joined}).data
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class BulkLeaveBoardsApi(TransactionPolicyMixin, APIView):
+    """Leave many boards."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
+
+    class InputSerializer(serializers.Serializer[Any]):
+        boards = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=1000)
+
+    class OutputSerializer(serializers.Serializer[Any]):
+        left = serializers.ListField(child=serializers.IntegerField())
+
+    @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
+        responses={
+            200: OutputSerializer,
+            400: openapi.Response(description="input validation failed"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        """
+        Leave many boards at once.
+
+        The user's admin role on these boards is removed along with the membership. Boards that the user is not a
+        member of are skipped. The ids of the boards that the user left are returned.
+        """
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        left = remove_member_from_boards(user=request.user, board_ids=serializer.validated_data["boards"])
+
+        data = self.OutputSerializer({"left": left}).data
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class AddMembersBoardsApi(TransactionPolicyMixin, APIView):
+    """Add many users as board members."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
+
+    class InputSerializer(serializers.Serializer[Any]):
+        # Users are plain ids: the ones that do not exist are skipped by the single INSERT that adds the memberships
+        users_to_add = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=1000)
+
+    class OutputSerializer(serializers.Serializer[Any]):
+        added = serializers.ListField(child=serializers.IntegerField())
+
+    @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
+        responses={
+            200: OutputSerializer,
+            400: openapi.Response(description="input validation failed"),
+            403: openapi.Response(description="user making the request is not a board admin"),
+            404: openapi.Response(description="board does not exist"),
+        },
+    )
+    def post(self, request: Request, board_id: int) -> Response:
+        """
+        Add many users as board members at once.
+
+        This action can only be performed by a current board admin. Users that do not exist or that are already board
+        members are skipped. The ids of the users that were added are returned.
+        """
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        board = board_get(board_id=board_id)
+        if board is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        added = add_members_to_board(
+            board=board, user=request.user, user_ids=serializer.validated_data["users_to_add"]
+        )
+
+        data = self.OutputSerializer({"added": added}).data
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class PostsApi(IdempotencyMixin, TransactionPolicyMixin, APIView):
     """Manage posts."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"get": TransactionPolicy.REPLICA, "post": TransactionPolicy.MANUAL}
+    idempotent_methods = ("post",)
 
     class InputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField(required=True)
-        board = serializers.PrimaryKeyRelatedField(required=False, queryset=Board.objects.all())
+        board = SelectorRelatedField(
+            required=False, queryset=visible_boards(), selector=lambda pk: board_get(board_id=pk)
+        )
 
     @swagger_auto_schema(  # type: ignore
         request_body=InputSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: openapi.Response(description="post was successfully created"),
             400: openapi.Response(description="input validation failed"),
+            409: openapi.Response(description="a request with the same Idempotency-Key is in progress"),
         },
     )
     def post(self, request: Request) -> Response:
@@ -192,6 +408,7 @@ class PostsApi(APIView):
 
         The user must be a board member.
         Input is considered valid when the text is at least 10 and at maximum 1000 characters long.
+        Send an Idempotency-Key header so that retries of the request do not create the post again.
         """
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -202,10 +419,16 @@ class PostsApi(APIView):
 
     class Pagination(LimitOffsetPagination):
         default_limit = 10
+        count_strategy = CountStrategy.CAPPED
+
+    class KeysetPagination(CursorPagination):
+        ordering = "-id"
 
     class FilterSerializer(serializers.Serializer[Any]):
         text = serializers.CharField(required=False)
-        board = serializers.PrimaryKeyRelatedField(required=False, queryset=Board.objects.all())
+        board = SelectorRelatedField(
+            required=False, queryset=visible_boards(), selector=lambda pk: board_get(board_id=pk)
+        )
         is_creator = serializers.BooleanField(allow_null=True, default=None, required=False)
 
     class OutputSerializer(serializers.Serializer[Any]):
@@ -217,13 +440,40 @@ class PostsApi(APIView):
             },
         )
         edited = serializers.BooleanField()
+        comment_count = serializers.IntegerField()
 
-    @swagger_auto_schema(responses={200: OutputSerializer(many=True)})  # type: ignore
+    @swagger_auto_schema(
+        responses={
+            200: OutputSerializer(many=True),
+            304: openapi.Response(description="posts were not modified since the given ETag or date"),
+        }
+    )  # type: ignore
     def get(self, request: Request) -> Response:
-        """Retrieve list of posts."""
+        """
+        Retrieve list of posts.
+
+        By default, the list is paginated with limit and offset. Pass `pagination=cursor` to page through the list
+        with opaque `next`/`previous` cursors instead, which stay fast however deep the client scrolls.
+
+        The ETag header changes whenever an item of the list is added, removed or modified. Send it back in the
+        If-None-Match header to get a 304 Not Modified meanwhile.
+
+        The ETag is not sent with cursor pagination or estimated counts, nor for the pages past a capped count.
+
+        The first page of the posts of a board (filtered by board only) is cached. It may lag a few seconds behind
+        the latest changes.
+        """
         filters_serializer = self.FilterSerializer(data=request.query_params)
         filters_serializer.is_valid(raise_exception=True)
 
+        board = filters_serializer.validated_data.get("board")
+        if (
+            board is not None
+            and set(request.query_params) <= {"board", "limit", "offset"}
+            and request.query_params.get("offset", "0") == "0"
+        ):
+            return self.get_board_first_page(request, board=board)
+
         posts = post_list(**filters_serializer.validated_data, user=request.user)
 
         return get_paginated_response(
@@ -232,13 +482,104 @@ class PostsApi(APIView):
             queryset=posts,
             request=request,
             view=self,
+            cursor_pagination_class=self.KeysetPagination,
+            conditional=True,
         )
 
+    def get_board_first_page(self, request: Request, board: Board) -> Response:
+        """Answer from the cache of the first pages of the boards, which does not depend on the current user."""
+
+        def render() -> Dict[str, Any]:
+            posts = post_list(board=board, user=request.user)
+            paginator = self.Pagination()
+            etag = paginator.get_collection_etag(posts, request)
+            page = paginator.paginate_queryset(posts, request, view=self)
+            data = paginator.get_paginated_response(self.OutputSerializer(page, many=True).data).data  # type: ignore
+            return {"data": data, "etag": etag}
+
+        # The links to the next page are absolute, so the page depends on the host as well
+        variant = f"{request.build_absolute_uri(request.path)}?limit={self.Pagination().get_limit(request)}"
+        # A page rendered from a lagging replica would be cached until it expires
+        with use_primary():
+            page = board_posts_page_cache.get(board.id, variant, render)
+
+        if page["etag"] is None:
+            return Response(data=page["data"], status=status.HTTP_200_OK)
+
+        not_modified = conditional_response(request, page["etag"], None)
+        if not_modified is not None:
+            return not_modified
+
+        return Response(
+            data=page["data"],
+            status=status.HTTP_200_OK,
+            headers=validator_headers(page["etag"], None),
+        )
 
-class DetailPostsApi(APIView):
+
+class BulkPostsApi(TransactionPolicyMixin, APIView):
+    """Create many posts at once."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"post": TransactionPolicy.MANUAL}
+
+    class InputSerializer(serializers.Serializer[Any]):
+        # Boards are plain ids: their existence is checked with the memberships, in one query for all the posts
+        posts = inline_serializer(
+            many=True,
+            min_length=1,
+            max_length=1000,
+            fields={
+                "text": serializers.CharField(),
+                "board": serializers.IntegerField(),
+            },
+        )
+
+    class OutputSerializer(serializers.Serializer[Any]):
+        id = serializers.IntegerField(allow_null=True)
+        errors = serializers.DictField(  # type: ignore
+            child=serializers.ListField(child=serializers.CharField()), allow_null=True
+        )
+
+    @swagger_auto_schema(  # type: ignore
+        request_body=InputSerializer,
+        responses={
+            200: OutputSerializer(many=True),
+            400: openapi.Response(description="input validation failed"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        """
+        Create many posts, possibly in different boards, at once.
+
+        Every post is validated as when it is created alone: the user must be a member of its board and its text must
+        be at least 10 and at maximum 1000 characters long. Invalid posts do not prevent the valid ones from being
+        created. The results are returned in the order of the posts, with either the id of the created post or the
+        errors that prevented its creation.
+        """
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = create_posts(**serializer.validated_data, creator=request.user)
+
+        data = self.OutputSerializer(
+            [
+                {"id": result.id, "errors": None}
+                if isinstance(result, Post)
+                else {"id": None, "errors": result.message_dict}
+                for result in results
+            ],
+            many=True,
+        ).data
+
+        return Response(data={"results": data}, status=status.HTTP_200_OK)
+
+
+class DetailPostsApi(TransactionPolicyMixin, APIView):
     """Manage post details."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"patch": TransactionPolicy.MANUAL, "delete": TransactionPolicy.MANUAL}
 
     class OutputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField()
@@ -249,36 +590,72 @@ class DetailPostsApi(APIView):
             },
         )
         edited = serializers.BooleanField()
+        comment_count = serializers.IntegerField()
+        version = serializers.IntegerField()
+        view_count = serializers.IntegerField()
 
     @swagger_auto_schema(  # type: ignore
         responses={
             200: OutputSerializer(),
+            304: openapi.Response(description="post was not modified since the given ETag or date"),
             404: openapi.Response(description="post does not exist"),
         }
     )
     def get(self, request: Request, post_id: int) -> Response:
-        """Retrieve post details."""
+        """
+        Retrieve post details.
+
+        The weak ETag header holds the version of the post, to be sent in the If-Match header of an update. It also
+        changes along with the comment count, but not with the view count. Send it back in the If-None-Match header
+        (or the Last-Modified header in If-Modified-Since) to get a 304 Not Modified while the post is unchanged.
+
+        Every retrieval counts as a view of the post, including the ones answered with 304. The view count is updated
+        at once, but it is written to the post periodically.
+        """
         post = post_get(post_id=post_id)
         if post is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        data = self.OutputSerializer(post).data
+        record_post_view(post=post)
 
-        return Response(data=data, status=status.HTTP_200_OK)
+        etag = version_etag(post.version, post.updated_at)
+        not_modified = conditional_response(request, etag, post.updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        data = {**self.OutputSerializer(post).data, "view_count": post_view_count(post=post)}
+
+        return Response(data=data, status=status.HTTP_200_OK, headers=validator_headers(etag, post.updated_at))
 
     class InputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField(required=True)
 
     @swagger_auto_schema(  # type: ignore
+        manual_parameters=[
+            openapi.Parameter(
+                "If-Match",
+                openapi.IN_HEADER,
+                description="ETag of the version of the post that the update is based on",
+                type=openapi.TYPE_STRING,
+                required=False,
+            )
+        ],
         responses={
             200: openapi.Response(description="post was updated"),
             400: openapi.Response(description="validation failed"),
             403: openapi.Response(description="user is not the post creator"),
             404: openapi.Response(description="post does not exist"),
-        }
+            409: openapi.Response(description="post was updated since the version given in If-Match"),
+        },
     )
     def patch(self, request: Request, post_id: int) -> Response:
-        """Update post."""
+        """
+        Update post.
+
+        Send the ETag of the post in the If-Match header, so that the update fails with 409 if someone else updated
+        the post in the meantime, instead of overwriting their changes. The ETag header of the response holds the new
+        version of the post.
+        """
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -286,9 +663,11 @@ class DetailPostsApi(APIView):
         if post is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        update_post(post=post, data=serializer.validated_data, user=request.user)
+        post = update_post(
+            post=post, data=serializer.validated_data, user=request.user, version=get_if_match_version(request)
+        )
 
-        return Response(status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_200_OK, headers={"ETag": version_etag(post.version, post.updated_at)})
 
     @swagger_auto_schema(  # type: ignore
         responses={
@@ -298,7 +677,11 @@ class DetailPostsApi(APIView):
         }
     )
     def delete(self, request: Request, post_id: int) -> Response:
-        """Delete post."""
+        """
+        Delete post.
+
+        The post and its comments disappear at once, they are purged in the background.
+        """
         post = post_get(post_id=post_id)
         if post is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -308,22 +691,124 @@ class DetailPostsApi(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CommentsApi(APIView):
+class PostThreadApi(TransactionPolicyMixin, APIView):
+    """View the discussion under a post."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"get": TransactionPolicy.REPLICA}
+
+    class FilterSerializer(serializers.Serializer[Any]):
+        # Mypy errors are ignored here because base class Field also has a field called parent
+        parent = serializers.PrimaryKeyRelatedField(required=False, queryset=listed_comments())  # type:ignore
+        after = serializers.IntegerField(required=False, min_value=0)
+        depth = serializers.IntegerField(required=False, default=3, min_value=1, max_value=10)
+        breadth = serializers.IntegerField(required=False, default=10, min_value=1, max_value=50)
+
+    class OutputSerializer(serializers.Serializer[Any]):
+        id = serializers.IntegerField()
+        text = serializers.CharField()
+        creator = inline_serializer(
+            fields={
+                "id": serializers.IntegerField(),
+                "username": serializers.CharField(),
+            },
+        )
+        parent_id = serializers.IntegerField()
+        reply_count = serializers.IntegerField()
+        is_deleted = serializers.BooleanField()
+
+    @swagger_auto_schema(  # type: ignore
+        responses={
+            200: OutputSerializer(many=True),
+            400: openapi.Response(description="the parent comment does not belong to the post"),
+            404: openapi.Response(description="post does not exist"),
+        },
+        query_serializer=FilterSerializer(),
+    )
+    def get(self, request: Request, post_id: int) -> Response:
+        """
+        Retrieve a comment thread, with replies nested in the comments they reply to.
+
+        At most `depth` levels of comments and `breadth` replies per comment are returned. Wherever the thread was cut
+        off, `more_replies` holds the link that fetches the rest of it (`more` for the top level); otherwise it is
+        null. Pass `parent` to fetch the subtree of a given comment.
+        """
+        post = post_get(post_id=post_id)
+        if post is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        filters_serializer = self.FilterSerializer(data=request.query_params)
+        filters_serializer.is_valid(raise_exception=True)
+        filters = filters_serializer.validated_data
+
+        parent = filters.get("parent")
+        if parent is not None and parent.post_id != post.id:
+            raise ValidationError({"parent": "The parent comment does not belong to the post specified."})
+
+        comments = comment_tree(
+            post=post,
+            parent=parent,
+            after=filters.get("after"),
+            max_depth=filters["depth"],
+            max_breadth=filters["breadth"],
+        )
+
+        def more_link(parent_id: Optional[int], after: Optional[int] = None) -> str:
+            query_kwargs = {"depth": filters["depth"], "breadth": filters["breadth"]}
+            if parent_id is not None:
+                query_kwargs["parent"] = parent_id
+            if after is not None:
+                query_kwargs["after"] = after
+            url = reverse_with_query_params(
+                "boards:post-thread", kwargs={"post_id": post.id}, query_kwargs=query_kwargs
+            )
+            return request.build_absolute_uri(url)
+
+        # Attributes set by comment_tree are unknown to mypy, hence the ignored errors
+        visible = [comment for comment in comments if comment.rank <= filters["breadth"]]  # type: ignore
+        cut_off_parent_ids = {
+            comment.parent_id for comment in comments if comment.rank > filters["breadth"]  # type: ignore
+        }
+
+        # The top-level comments are attached to a pseudo-node, which stands for the post or the parent comment given.
+        # Comments are ordered by depth, so every comment comes after the one it replies to.
+        root: Dict[str, Any] = {"replies": [], "more_replies": None}
+        nodes: Dict[Optional[int], Dict[str, Any]] = {parent.id if parent is not None else None: root}
+        for comment, data in zip(visible, self.OutputSerializer(visible, many=True).data):
+            node = {**data, "replies": [], "more_replies": None}
+            if comment.has_hidden_replies:  # type: ignore
+                node["more_replies"] = more_link(comment.id)
+            nodes[comment.id] = node
+            nodes[comment.parent_id]["replies"].append(node)
+
+        for parent_id in cut_off_parent_ids:
+            nodes[parent_id]["more_replies"] = more_link(parent_id, after=nodes[parent_id]["replies"][-1]["id"])
+
+        return Response(data={"more": root["more_replies"], "results": root["replies"]}, status=status.HTTP_200_OK)
+
+
+class CommentsApi(IdempotencyMixin, TransactionPolicyMixin, APIView):
     """Manage comments."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"get": TransactionPolicy.REPLICA, "post": TransactionPolicy.MANUAL}
+    idempotent_methods = ("post",)
 
     class InputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField(required=True)
-        post = serializers.PrimaryKeyRelatedField(required=True, queryset=Post.objects.all())
+        post = SelectorRelatedField(required=True, queryset=visible_posts(), selector=lambda pk: post_get(post_id=pk))
         # Mypy errors are ignored here because base class Field also has a field called parent
-        parent = serializers.PrimaryKeyRelatedField(required=False, queryset=Comment.objects.all())  # type:ignore
+        parent = SelectorRelatedField(  # type:ignore
+            required=False, queryset=visible_comments(), selector=lambda pk: comment_get(comment_id=pk)
+        )
 
     @swagger_auto_schema(  # type: ignore
         request_body=InputSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: openapi.Response(description="comment was successfully created"),
             400: openapi.Response(description="input validation failed"),
+            409: openapi.Response(description="a request with the same Idempotency-Key is in progress"),
         },
     )
     def post(self, request: Request) -> Response:
@@ -332,6 +817,7 @@ class CommentsApi(APIView):
 
         The user must be a board member.
         Input is considered valid when the comment is at least 1 and at maximum 1000 characters long.
+        Send an Idempotency-Key header so that retries of the request do not create the comment again.
         """
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -342,12 +828,19 @@ class CommentsApi(APIView):
 
     class Pagination(LimitOffsetPagination):
         default_limit = 10
+        count_strategy = CountStrategy.CAPPED
+
+    class KeysetPagination(CursorPagination):
+        # Comments are ordered by id, or by path in thread order, as returned by the selector
+        ordering = None
 
     class FilterSerializer(serializers.Serializer[Any]):
         text = serializers.CharField(required=False)
-        post = serializers.PrimaryKeyRelatedField(required=False, queryset=Post.objects.all())
+        post = serializers.PrimaryKeyRelatedField(required=False, queryset=visible_posts())
         # Mypy errors are ignored here because base class Field also has a field called parent
-        parent = serializers.PrimaryKeyRelatedField(required=False, queryset=Comment.objects.all())  # type:ignore
+        parent = serializers.PrimaryKeyRelatedField(required=False, queryset=listed_comments())  # type:ignore
+        descendants_of = serializers.PrimaryKeyRelatedField(required=False, queryset=listed_comments())
+        thread_order = serializers.BooleanField(required=False, default=False)
 
     class OutputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField()
@@ -358,13 +851,32 @@ class CommentsApi(APIView):
             },
         )
         parent_id = serializers.IntegerField()
+        reply_count = serializers.IntegerField()
+        is_deleted = serializers.BooleanField()
 
     @swagger_auto_schema(  # type: ignore
-        responses={200: OutputSerializer(many=True)},
+        responses={
+            200: OutputSerializer(many=True),
+            304: openapi.Response(description="comments were not modified since the given ETag or date"),
+        },
         query_serializer=FilterSerializer(),
     )
     def get(self, request: Request) -> Response:
-        """Retrieve list of comments."""
+        """
+        Retrieve list of comments.
+
+        Pass `descendants_of` to list all the replies in the subtree of a comment, and `thread_order=true` to list
+        comments in thread order (depth first, every comment followed by its replies). Deleted comments are listed,
+        without text and with `is_deleted=true`, as long as they have replies.
+
+        By default, the list is paginated with limit and offset. Pass `pagination=cursor` to page through the list
+        with opaque `next`/`previous` cursors instead, which stay fast however deep the client scrolls.
+
+        The ETag header changes whenever an item of the list is added, removed or modified. Send it back in the
+        If-None-Match header to get a 304 Not Modified meanwhile.
+
+        The ETag is not sent with cursor pagination or estimated counts, nor for the pages past a capped count.
+        """
         filters_serializer = self.FilterSerializer(data=request.query_params)
         filters_serializer.is_valid(raise_exception=True)
 
@@ -376,13 +888,16 @@ class CommentsApi(APIView):
             queryset=comments,
             request=request,
             view=self,
+            cursor_pagination_class=self.KeysetPagination,
+            conditional=True,
         )
 
 
-class DetailCommentsApi(APIView):
+class DetailCommentsApi(TransactionPolicyMixin, APIView):
     """Manage comment details."""
 
     permission_classes = (IsAuthenticated,)
+    transaction_policies = {"delete": TransactionPolicy.MANUAL}
 
     class OutputSerializer(serializers.Serializer[Any]):
         text = serializers.CharField()
@@ -393,19 +908,128 @@ class DetailCommentsApi(APIView):
             },
         )
         parent_id = serializers.IntegerField()
+        reply_count = serializers.IntegerField()
 
     @swagger_auto_schema(  # type: ignore
         responses={
             200: OutputSerializer(),
+            304: openapi.Response(description="comment was not modified since the given ETag or date"),
             404: openapi.Response(description="comment does not exist"),
         }
     )
     def get(self, request: Request, comment_id: int) -> Response:
-        """Retrieve comment details."""
+        """
+        Retrieve comment details.
+
+        The ETag and Last-Modified headers change along with the comment and its reply count. Send them back in the
+        If-None-Match or If-Modified-Since headers to get a 304 Not Modified while the comment is unchanged.
+        """
         comment = comment_get(comment_id=comment_id)
         if comment is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
+        etag = modified_etag(comment.updated_at)
+        not_modified = conditional_response(request, etag, comment.updated_at)
+        if not_modified is not None:
+            return not_modified
+
         data = self.OutputSerializer(comment).data
 
-        return Response(data=data, status=status.HTTP_200_OK)
+        return Response(data=data, status=status.HTTP_200_OK, headers=validator_headers(etag, comment.updated_at))
+
+    @swagger_auto_schema(  # type: ignore
+        responses={
+            204: openapi.Response(description="comment was deleted"),
+            403: openapi.Response(description="user is not the comment creator"),
+            404: openapi.Response(description="comment does not exist"),
+        }
+    )
+    def delete(self, request: Request, comment_id: int) -> Response:
+        """
+        Delete comment.
+
+        The comment is replaced by a tombstone without text, so that its replies keep their place in the thread.
+        """
+        comment = comment_get(comment_id=comment_id)
+        if comment is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        delete_comment(comment=comment, user=request.user)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SearchApi(TransactionPolicyMixin, APIView):
+    """Search posts and comments."""
+
+    permission_classes = (IsAuthenticated,)
+    transaction_policies = {"get": TransactionPolicy.REPLICA}
+
+    class Pagination(CursorPagination):
+        ordering = ("-rank", "-id")
+
+    class FilterSerializer(serializers.Serializer[Any]):
+        query = serializers.CharField(required=True)
+        type = serializers.ChoiceField(choices=["post", "comment"], default="post", required=False)
+        board = SelectorRelatedField(
+            required=False, queryset=visible_boards(), selector=lambda pk: board_get(board_id=pk)
+        )
+
+    class PostOutputSerializer(serializers.Serializer[Any]):
+        id = serializers.IntegerField()
+        text = serializers.CharField()
+        creator = inline_serializer(
+            fields={
+                "id": serializers.IntegerField(),
+                "username": serializers.CharField(),
+            },
+        )
+        board_id = serializers.IntegerField()
+        comment_count = serializers.IntegerField()
+        rank = serializers.FloatField()
+
+    class CommentOutputSerializer(serializers.Serializer[Any]):
+        id = serializers.IntegerField()
+        text = serializers.CharField()
+        creator = inline_serializer(
+            fields={
+                "id": serializers.IntegerField(),
+                "username": serializers.CharField(),
+            },
+        )
+        post_id = serializers.IntegerField()
+        parent_id = serializers.IntegerField()
+        reply_count = serializers.IntegerField()
+        rank = serializers.FloatField()
+
+    @swagger_auto_schema(  # type: ignore
+        responses={200: PostOutputSerializer(many=True)},
+        query_serializer=FilterSerializer(),
+    )
+    def get(self, request: Request) -> Response:
+        """
+        Search posts or comments, the most relevant first.
+
+        The query supports web search syntax: quoted phrases, `or` and `-` to exclude words. Results are paginated
+        with opaque `next`/`previous` cursors.
+        """
+        filters_serializer = self.FilterSerializer(data=request.query_params)
+        filters_serializer.is_valid(raise_exception=True)
+        filters = filters_serializer.validated_data
+
+        if filters.pop("type") == "comment":
+            return get_paginated_response(
+                pagination_class=self.Pagination,
+                serializer_class=self.CommentOutputSerializer,
+                queryset=comment_search(**filters),
+                request=request,
+                view=self,
+            )
+
+        return get_paginated_response(
+            pagination_class=self.Pagination,
+            serializer_class=self.PostOutputSerializer,
+            queryset=post_search(**filters),
+            request=request,
+            view=self,
+        )
@@ -0,0 +1,55 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import Max
+
+from boards_of_django.boards.models import COMMENT_PATH_SEGMENT_WIDTH, Comment, Post
+
+
+class Command(BaseCommand):
+    """
+    Compute the materialized path of existing comments.
+
+    Paths are computed with a recursive query over the comments of a range of posts at a time, so that each batch is
+    a bounded, short transaction. Comments whose path is already correct are not rewritten, so the command can be
+    safely run again.
+    """
+
+    help = "Compute the materialized path of existing comments."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of posts processed per batch.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        last_post_id = Post.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        comment_table = Comment._meta.db_table
+
+        updated = 0
+        for first_post_id in range(1, last_post_id + 1, batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    WITH RECURSIVE paths AS (
+                        SELECT id, lpad(id::text, %(width)s, '0') AS path
+                        FROM {comment_table}
+                        WHERE parent_id IS NULL AND post_id BETWEEN %(first_post_id)s AND %(last_post_id)s
+                      UNION ALL
+                        SELECT comment.id, paths.path || lpad(comment.id::text, %(width)s, '0')
+                        FROM {comment_table} comment
+                        JOIN paths ON comment.parent_id = paths.id
+                    )
+                    UPDATE {comment_table} SET path = paths.path
+                    FROM paths
+                    WHERE {comment_table}.id = paths.id AND {comment_table}.path <> paths.path
+                    """,
+                    {
+                        "width": COMMENT_PATH_SEGMENT_WIDTH,
+                        "first_post_id": first_post_id,
+                        "last_post_id": first_post_id + batch_size - 1,
+                    },
+                )
+                updated += cursor.rowcount
+
+        self.stdout.write(f"Updated the path of {updated} comments.")
@@ -0,0 +1,98 @@
+import hashlib
+import time
+from typing import Any, Callable, List
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+from boards_of_django.authentication.models import User
+from boards_of_django.boards.models import COMMENT_PATH_SEGMENT_WIDTH, Board, Comment, Post
+from boards_of_django.boards.selectors import comment_list, post_list
+
+
+def _time_ms(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    """
+    Benchmark substring search in post_list and comment_list with and without the trigram indexes.
+
+    The dataset is generated inside a transaction that is rolled back at the end, so the database is left untouched.
+    """
+
+    help = "Benchmark substring search on posts and comments with and without the trigram indexes."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--rows", type=int, default=2_000_000, help="Number of posts and comments to generate.")
+        parser.add_argument("--repeat", type=int, default=5, help="Number of runs per query, the best one is kept.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows, repeat = options["rows"], options["repeat"]
+        # A substring that matches exactly one generated row
+        term = hashlib.md5(str(rows // 2).encode()).hexdigest()[4:16]
+
+        with transaction.atomic():
+            user = User.objects.create_user(email="benchmark@example.com", username="benchmark", password="benchmark")
+            board = Board.objects.create(name="benchmark")
+            self.stdout.write(f"Generating {rows} posts and comments...")
+            self._generate(rows=rows, user=user, board=board)
+
+            queries = {
+                "post_list(text=...)": lambda: list(post_list(user=user, text=term)[:10]),
+                "comment_list(text=...)": lambda: list(comment_list(text=term)[:10]),
+            }
+            with_index = {name: _time_ms(query, repeat) for name, query in queries.items()}
+
+            with connection.cursor() as cursor:
+                cursor.execute("DROP INDEX post_text_trgm_idx, comment_text_trgm_idx")
+            without_index = {name: _time_ms(query, repeat) for name, query in queries.items()}
+
+            self._report(
+                [(name, without_index[name], with_index[name]) for name in queries],
+            )
+            transaction.set_rollback(True)
+
+    def _generate(self, *, rows: int, user: User, board: Board) -> None:
+        # Every NOT NULL column is listed, they have no default in the database
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Post._meta.db_table} (
+                    text, creator_id, board_id, edited, comment_count, is_hidden, version, view_count, created_at,
+                    updated_at
+                )
+                SELECT 'post ' || md5(g::text) || ' ' || md5((g * 31)::text), %s, %s, false, 0, false, 1, 0, now(),
+                    now()
+                FROM generate_series(1, %s) g
+                """,
+                [user.id, board.id, rows],
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {Comment._meta.db_table} (
+                    id, text, creator_id, post_id, path, reply_count, created_at, updated_at
+                )
+                SELECT c.id, 'comment ' || md5(c.g::text) || ' ' || md5((c.g * 17)::text), %s, p.id,
+                    lpad(c.id::text, %s, '0'), 0, now(), now()
+                FROM (
+                    SELECT g, nextval(pg_get_serial_sequence(%s, 'id')) AS id FROM generate_series(1, %s) g
+                ) c
+                JOIN LATERAL (SELECT id FROM {Post._meta.db_table} WHERE board_id = %s LIMIT 1) p ON true
+                """,
+                [user.id, COMMENT_PATH_SEGMENT_WIDTH, Comment._meta.db_table, rows, board.id],
+            )
+            cursor.execute(f"ANALYZE {Post._meta.db_table}")
+            cursor.execute(f"ANALYZE {Comment._meta.db_table}")
+
+    def _report(self, results: List[Any]) -> None:
+        self.stdout.write(f"{'query':<26}{'seq scan (ms)':>16}{'trigram (ms)':>16}{'speedup':>10}")
+        for name, without_index, with_index in results:
+            self.stdout.write(
+                f"{name:<26}{without_index:>16.1f}{with_index:>16.1f}{without_index / with_index:>9.0f}x"
+            )
@@ -0,0 +1,84 @@
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from boards_of_django.authentication.models import User
+from boards_of_django.boards.apis import BoardsApi, CommentsApi, PostsApi
+from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.common.transactions import TransactionPolicy
+
+POLICIES = [TransactionPolicy.ATOMIC, TransactionPolicy.READ_ONLY]
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the list APIs when run in a transaction (as with ATOMIC_REQUESTS) and in autocommit mode.
+
+    The requests are sent to the API views directly, outside of any transaction, so that the BEGIN and COMMIT of the
+    ATOMIC policy are real round trips to the database. The generated rows are deleted at the end.
+    """
+
+    help = "Benchmark the list APIs with the ATOMIC and READ_ONLY transaction policies."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--requests", type=int, default=500, help="Number of requests per API and policy.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        requests = options["requests"]
+
+        user = User.objects.create_user(email="benchmark@example.com", username="benchmark", password="benchmark")
+        board = Board.objects.create(name="benchmark")
+        try:
+            post = Post.objects.create(text="benchmark", creator=user, board=board)
+            Comment.objects.bulk_create([Comment(text=f"comment {i}", creator=user, post=post) for i in range(20)])
+            apis: Dict[str, Tuple[Any, Dict[str, Any]]] = {
+                "GET /boards/": (BoardsApi, {}),
+                "GET /posts/": (PostsApi, {"board": board.id}),
+                "GET /comments/": (CommentsApi, {"post": post.id}),
+            }
+            results = []
+            for name, (api, query_params) in apis.items():
+                for policy in POLICIES:
+                    view = api.as_view(transaction_policies={"get": policy})
+                    results.append((name, policy, *self._run(view, user, query_params, requests)))
+            self._report(results)
+        finally:
+            board.delete()
+            user.delete()
+
+    def _run(
+        self, view: Callable[..., Any], user: User, query_params: Dict[str, Any], requests: int
+    ) -> Tuple[float, int]:
+        factory = APIRequestFactory()
+
+        def send() -> None:
+            request = factory.get("/", query_params)
+            force_authenticate(request, user=user)
+            response = view(request)
+            assert response.status_code == 200, response.data
+
+        # Warm up the connection and the caches, then count the queries of one request
+        send()
+        queries: List[str] = []
+
+        def count(execute: Callable[..., Any], sql: str, *args: Any) -> Any:
+            queries.append(sql)
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(count):
+            send()
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            send()
+        return (time.perf_counter() - start) * 1000 / requests, len(queries)
+
+    def _report(self, results: List[Any]) -> None:
+        self.stdout.write(f"{'api':<18}{'policy':>11}{'round trips':>13}{'ms/request':>12}")
+        for name, policy, ms, queries in results:
+            # Django does not log the BEGIN and COMMIT sent by the driver around an atomic block
+            round_trips = queries + 2 if policy is TransactionPolicy.ATOMIC else queries
+            self.stdout.write(f"{name:<18}{policy.value:>11}{round_trips:>13}{ms:>12.2f}")
@@ -0,0 +1,29 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from boards_of_django.common.cache import HIT, LOCAL_HIT, MISS, object_cache_stats, reset_object_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Show the hit and miss counts of the object caches of boards, posts and comments.
+
+    The counts are summed over all the processes. They are sent to the shared cache periodically by every process, so
+    the latest lookups may not be counted yet.
+    """
+
+    help = "Show the hit and miss counts of the object caches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--reset", action="store_true", help="Reset the counts after showing them.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.stdout.write(f"{'cache':<10}{'local hits':>12}{'hits':>12}{'misses':>12}{'hit ratio':>12}")
+        for name, counts in object_cache_stats().items():
+            lookups = sum(counts.values())
+            ratio = (counts[LOCAL_HIT] + counts[HIT]) / lookups if lookups else 0
+            self.stdout.write(f"{name:<10}{counts[LOCAL_HIT]:>12}{counts[HIT]:>12}{counts[MISS]:>12}{ratio:>12.1%}")
+
+        if options["reset"]:
+            reset_object_cache_stats()
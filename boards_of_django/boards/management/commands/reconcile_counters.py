@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, NamedTuple, Type
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, models, transaction
+from django.db.models import Max
+
+from boards_of_django.boards.models import Board, Comment, Membership, Post
+from boards_of_django.boards.selectors import board_cache, comment_cache, post_cache
+from boards_of_django.common.cache import ObjectCache
+
+
+class Counter(NamedTuple):
+    model: Type[models.Model]
+    field: str
+    # Table of the counted rows and its column that references the model
+    counted_table: str
+    counted_column: str
+    # Condition on the counted rows, e.g. to skip the deleted ones that are waiting to be purged
+    counted_condition: str = "TRUE"
+
+
+COUNTERS: List[Counter] = [
+    Counter(Board, "member_count", Membership._meta.db_table, "board_id"),
+    Counter(Board, "post_count", Post._meta.db_table, "board_id", "NOT child.is_hidden"),
+    Counter(Post, "comment_count", Comment._meta.db_table, "post_id", "child.deleted_at IS NULL"),
+    Counter(Comment, "reply_count", Comment._meta.db_table, "parent_id"),
+]
+
+# Caches of the instances whose counters are fixed
+CACHES: Dict[Type[models.Model], ObjectCache[Any]] = {Board: board_cache, Post: post_cache, Comment: comment_cache}
+
+
+class Command(BaseCommand):
+    """
+    Repair the denormalized counters of boards, posts and comments.
+
+    Every counter is recomputed with a single aggregate query over a range of rows at a time, so that each batch is a
+    bounded, short transaction. Only the rows whose counter drifted are rewritten, so the command can be safely run
+    again.
+    """
+
+    help = "Recompute the member, post, comment and reply counters and fix the ones that drifted."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=10000, help="Number of rows processed per batch.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+
+        for counter in COUNTERS:
+            table = counter.model._meta.db_table
+            last_id = counter.model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+            updated = 0
+            for first_id in range(1, last_id + 1, batch_size):
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        f"""
+                        UPDATE {table} SET {counter.field} = actual.count, updated_at = clock_timestamp()
+                        FROM (
+                            SELECT counted.id, count(child.{counter.counted_column}) AS count
+                            FROM {table} counted
+                            LEFT JOIN {counter.counted_table} child
+                                ON child.{counter.counted_column} = counted.id AND {counter.counted_condition}
+                            WHERE counted.id BETWEEN %(first_id)s AND %(last_id)s
+                            GROUP BY counted.id
+                        ) actual
+                        WHERE {table}.id = actual.id AND {table}.{counter.field} <> actual.count
+                        RETURNING {table}.id
+                        """,
+                        {"first_id": first_id, "last_id": first_id + batch_size - 1},
+                    )
+                    fixed_ids = [row[0] for row in cursor.fetchall()]
+                    CACHES[counter.model].invalidate(*fixed_ids)
+                    updated += len(fixed_ids)
+
+            self.stdout.write(f"Fixed {counter.model.__name__}.{counter.field} of {updated} rows.")
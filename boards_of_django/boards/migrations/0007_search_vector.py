@@ -0,0 +1,41 @@
+# Generated by Django 4.2.4 on 2026-10-17 03:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0006_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Backfill the existing rows before the indexes are built
+        migrations.RunSQL(
+            sql="UPDATE boards_post SET search_vector = to_tsvector('english', text)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="UPDATE boards_comment SET search_vector = to_tsvector('english', text)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="comment_search_vector_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+        ),
+    ]
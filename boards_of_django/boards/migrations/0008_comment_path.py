@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0007_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.TextField(db_collation="C", default="", editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["path"], name="comment_path_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "path"], name="comment_post_path_idx"),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.4 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0008_comment_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("parent__isnull", True)), fields=["post", "id"], name="comment_post_root_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["parent", "id"], name="comment_parent_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["board", "-id"], name="post_board_id_idx"),
+        ),
+        # The membership tables are auto-created by the many-to-many fields, so their indexes can't be declared on a
+        # model. Boards of a user are looked up by user_id, (user_id, board_id) lets it be answered from the index only.
+        migrations.RunSQL(
+            sql="CREATE INDEX boards_board_members_user_board_idx ON boards_board_members (user_id, board_id)",
+            reverse_sql="DROP INDEX IF EXISTS boards_board_members_user_board_idx",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX boards_board_admins_user_board_idx ON boards_board_admins (user_id, board_id)",
+            reverse_sql="DROP INDEX IF EXISTS boards_board_admins_user_board_idx",
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0009_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="member_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="board",
+            name="post_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="reply_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Backfill the existing rows, later drift is repaired by the reconcile_counters command
+        migrations.RunSQL(
+            sql="""
+                UPDATE boards_board SET
+                    member_count = (SELECT count(*) FROM boards_board_members m WHERE m.board_id = boards_board.id),
+                    post_count = (SELECT count(*) FROM boards_post p WHERE p.board_id = boards_board.id)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE boards_post
+                SET comment_count = (SELECT count(*) FROM boards_comment c WHERE c.post_id = boards_post.id)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE boards_comment
+                SET reply_count = (SELECT count(*) FROM boards_comment r WHERE r.parent_id = boards_comment.id)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
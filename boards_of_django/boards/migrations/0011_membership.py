@@ -0,0 +1,93 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("boards", "0010_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Membership",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("member", "Member"), ("admin", "Admin")], default="member", max_length=10
+                    ),
+                ),
+                ("joined_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "board",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="boards.board",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="membership",
+            index=models.Index(fields=["user", "role"], include=("board",), name="membership_user_role_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="membership",
+            constraint=models.UniqueConstraint(fields=("board", "user"), name="membership_board_user_uniq"),
+        ),
+        # Copy the members and admins tables into memberships, admins that were not members become members. Django
+        # cannot add a through model to an existing many-to-many field, so the old fields are then removed and the
+        # members field is added back on top of the memberships.
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO boards_membership (board_id, user_id, role, joined_at)
+                SELECT board_id, user_id, 'member', now() FROM boards_board_members
+                ON CONFLICT (board_id, user_id) DO NOTHING;
+
+                INSERT INTO boards_membership (board_id, user_id, role, joined_at)
+                SELECT board_id, user_id, 'admin', now() FROM boards_board_admins
+                ON CONFLICT (board_id, user_id) DO UPDATE SET role = 'admin';
+
+                UPDATE boards_board
+                SET member_count = (SELECT count(*) FROM boards_membership m WHERE m.board_id = boards_board.id);
+            """,
+            reverse_sql="""
+                INSERT INTO boards_board_members (board_id, user_id) SELECT board_id, user_id FROM boards_membership;
+
+                INSERT INTO boards_board_admins (board_id, user_id)
+                SELECT board_id, user_id FROM boards_membership WHERE role = 'admin';
+            """,
+        ),
+        migrations.RemoveField(
+            model_name="board",
+            name="admins",
+        ),
+        migrations.RemoveField(
+            model_name="board",
+            name="members",
+        ),
+        migrations.AddField(
+            model_name="board",
+            name="members",
+            field=models.ManyToManyField(
+                related_name="members", through="boards.Membership", to=settings.AUTH_USER_MODEL
+            ),
+        ),
+    ]
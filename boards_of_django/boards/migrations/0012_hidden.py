@@ -0,0 +1,22 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0011_membership"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="is_hidden",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="is_hidden",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
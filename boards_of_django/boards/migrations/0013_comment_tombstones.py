@@ -0,0 +1,50 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0012_hidden"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="comment",
+            name="comment_post_root_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="comment",
+            name="comment_parent_id_idx",
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="deleted_at",
+            field=models.DateTimeField(default=None, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(
+                    ("parent__isnull", True),
+                    models.Q(("deleted_at__isnull", True), ("reply_count__gt", 0), _connector="OR"),
+                ),
+                fields=["post", "id"],
+                name="comment_post_root_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("reply_count__gt", 0), _connector="OR"),
+                fields=["parent", "id"],
+                name="comment_parent_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)), fields=["id"], name="comment_tombstone_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0013_comment_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-17 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("boards", "0014_post_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="view_count",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
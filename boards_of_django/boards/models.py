@@ -1,12 +1,29 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 from boards_of_django.common.models import TimestampedModel
 
 User = get_user_model()
 
+# Text search configuration used to build and query the search vectors of posts and comments
+SEARCH_CONFIG = "english"
+
+# Width of one segment of a comment's path: the comment's id, left-padded with zeros to fit the largest bigint
+COMMENT_PATH_SEGMENT_WIDTH = 19
+
+# Comments shown in listings and threads: deleted comments (tombstones) are only shown, as placeholders, while they
+# still have replies. The others are skipped by the partial indexes below, until they are compacted.
+LISTED_COMMENTS = models.Q(deleted_at__isnull=True) | models.Q(reply_count__gt=0)
+
+# Name of the counter buffer that holds the views of posts until they are added to Post.view_count
+POST_VIEWS_BUFFER = "post-views"
+
 
 def _validate_contains_allowed_characters(name: str) -> None:
     for char in name:
@@ -26,15 +43,63 @@ class Board(TimestampedModel):
     Attributes
     ----------
     name : Board's name
-    members : Users that are members of the board
-    admins : Users that are administrators of the board
+    members : Users that are members of the board, whatever their role. The role of each member is stored in its
+        Membership.
+    member_count : Number of members of the board, kept up to date by the services
+    post_count : Number of posts in the board, kept up to date by the services
+    is_hidden : Whether the board was deleted. Deleted boards are hidden at once, then purged along with their posts
+        and comments by a background task.
     """
 
     name = models.CharField(
         unique=True, max_length=20, validators=[MinLengthValidator(3), _validate_contains_allowed_characters]
     )
-    members = models.ManyToManyField(User, related_name="members")  # type: ignore
-    admins = models.ManyToManyField(User, related_name="admins")  # type: ignore
+    members = models.ManyToManyField(User, through="Membership", related_name="members")  # type: ignore
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    is_hidden = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            # `name__icontains` compiles to UPPER("name") LIKE UPPER(%s), which can use this trigram index
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="board_name_trgm_idx"),
+        ]
+
+
+class Membership(models.Model):
+    """
+    Membership of a user in a board.
+
+    Every member of a board has exactly one membership, whose role tells what the member is allowed to do. Admins are
+    members too.
+
+    Attributes
+    ----------
+    board : The board that the user is a member of
+    user : The member
+    role : The member's role in the board
+    joined_at : Timestamp when the user joined the board
+    """
+
+    class Role(models.TextChoices):
+        MEMBER = "member"
+        ADMIN = "admin"
+
+    # Both foreign keys are served by the indexes below, whose first column they are
+    board = models.ForeignKey(Board, related_name="memberships", on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(User, related_name="memberships", on_delete=models.CASCADE, db_index=False)
+    role = models.CharField(max_length=10, choices=Role.choices, default=Role.MEMBER)
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also serves the membership and role checks of a user in a board
+            models.UniqueConstraint(fields=["board", "user"], name="membership_board_user_uniq"),
+        ]
+        indexes = [
+            # Boards of a user, optionally with a given role, answered from the index only
+            models.Index(fields=["user", "role"], include=["board"], name="membership_user_role_idx"),
+        ]
 
 
 class Post(TimestampedModel):
@@ -49,12 +114,34 @@ class Post(TimestampedModel):
     creator : User that created the post
     board : The board to which post was posted
     edited : A flag that indicates if a post was edited or not
+    search_vector : Full-text search vector of the post's content, kept up to date by the services
+    comment_count : Number of comments (replies included, deleted ones excluded) on the post, kept up to date by the
+        services
+    is_hidden : Whether the post was deleted. Deleted posts are hidden at once, then purged along with their comments
+        by a background task.
+    version : Incremented by every edit of the post, so that concurrent edits can be detected
+    view_count : Number of times the post was viewed. Views are counted in a buffer first, and added to the column
+        periodically by a background task.
     """
 
     text = models.TextField(validators=[MinLengthValidator(10), MaxLengthValidator(1000)])
     creator = models.ForeignKey(User, related_name="posts_created", on_delete=models.PROTECT)
     board = models.ForeignKey(Board, related_name="posts", on_delete=models.CASCADE)
     edited = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    is_hidden = models.BooleanField(default=False, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # `text__icontains` compiles to UPPER("text") LIKE UPPER(%s), which can use this trigram index
+            GinIndex(OpClass(Upper("text"), name="gin_trgm_ops"), name="post_text_trgm_idx"),
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+            # Posts of a board, newest first
+            models.Index(fields=["board", "-id"], name="post_board_id_idx"),
+        ]
 
 
 class Comment(TimestampedModel):
@@ -69,6 +156,14 @@ class Comment(TimestampedModel):
     creator : User that created the comment
     post : The post which is being commented
     parent: The comment which is being replied to
+    search_vector : Full-text search vector of the comment's content, kept up to date by the services
+    path : Materialized path of the comment, i.e. the ids of its ancestors and its own id, each padded to
+        COMMENT_PATH_SEGMENT_WIDTH digits. Descendants of a comment are the comments whose path starts with its path,
+        and ordering by path gives the depth-first order of the thread.
+    reply_count : Number of direct replies to the comment (deleted ones included), kept up to date by the services
+    deleted_at : Timestamp when the comment was deleted. A deleted comment is kept as a tombstone, without its text,
+        so that its replies stay in place in the thread. Tombstones without replies are eventually compacted (i.e.
+        actually deleted).
     """
 
     text = models.TextField(validators=[MaxLengthValidator(1000)])
@@ -77,3 +172,32 @@ class Comment(TimestampedModel):
     parent = models.ForeignKey(
         "self", related_name="replies", on_delete=models.CASCADE, null=True, blank=True, default=None
     )
+    search_vector = SearchVectorField(null=True, editable=False)
+    # The "C" collation compares bytes, so that the btree indexes below serve prefix (LIKE 'path%') range scans
+    path = models.TextField(db_collation="C", default="", editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    deleted_at = models.DateTimeField(null=True, default=None, editable=False)
+
+    class Meta:
+        indexes = [
+            # `text__icontains` compiles to UPPER("text") LIKE UPPER(%s), which can use this trigram index
+            GinIndex(OpClass(Upper("text"), name="gin_trgm_ops"), name="comment_text_trgm_idx"),
+            GinIndex(fields=["search_vector"], name="comment_search_vector_idx"),
+            models.Index(fields=["path"], name="comment_path_idx"),
+            models.Index(fields=["post", "path"], name="comment_post_path_idx"),
+            # Root comments of a post, oldest first
+            models.Index(
+                fields=["post", "id"],
+                condition=models.Q(parent__isnull=True) & LISTED_COMMENTS,
+                name="comment_post_root_idx",
+            ),
+            # Replies to a comment, oldest first
+            models.Index(fields=["parent", "id"], condition=LISTED_COMMENTS, name="comment_parent_id_idx"),
+            # Tombstones, for the compaction
+            models.Index(fields=["id"], condition=models.Q(deleted_at__isnull=False), name="comment_tombstone_idx"),
+        ]
+
+    @property
+    def is_deleted(self) -> bool:
+        """Return True if the comment is a tombstone."""
+        return self.deleted_at is not None
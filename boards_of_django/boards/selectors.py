@@ -1,10 +1,101 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef, Q
+from django.db.models.functions import Cast
 from django.db.models.query import QuerySet
 
 from boards_of_django.authentication.models import User
-from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.boards.models import (
+    LISTED_COMMENTS,
+    POST_VIEWS_BUFFER,
+    SEARCH_CONFIG,
+    Board,
+    Comment,
+    Membership,
+    Post,
+)
+from boards_of_django.common.cache import ObjectCache, PageCache
+from boards_of_django.common.counters import get_counter_buffer
+
+# Columns rendered by the list APIs. The creator is fetched in the same query (select_related), so that serializing
+# a page does not cost one more query per row. Large columns that are never rendered (e.g. search_vector) are skipped.
+BOARD_LIST_FIELDS = ("id", "name", "member_count", "post_count")
+POST_LIST_FIELDS = ("id", "text", "edited", "board", "comment_count", "creator__id", "creator__username")
+COMMENT_LIST_FIELDS = (
+    "id",
+    "text",
+    "post",
+    "parent",
+    "path",
+    "reply_count",
+    "deleted_at",
+    "creator__id",
+    "creator__username",
+)
+
+# Caches of the instances returned by board_get, post_get and comment_get. The services invalidate them whenever they
+# change these instances.
+board_cache: ObjectCache[Board] = ObjectCache("board")
+post_cache: ObjectCache[Post] = ObjectCache("post")
+comment_cache: ObjectCache[Comment] = ObjectCache("comment")
+# First pages of the posts of every board, as rendered by the API. The services invalidate them whenever a post is
+# created, edited, deleted or commented. Comment deletions are only reflected once the pages expire.
+board_posts_page_cache: PageCache[Dict[str, Any]] = PageCache("board-posts")
+
+
+def _search_rank(search_query: SearchQuery) -> Cast:
+    # ts_rank returns a real, it is cast to double precision so that its value round-trips exactly through a cursor
+    return Cast(SearchRank(F("search_vector"), search_query), output_field=FloatField())
+
+
+def visible_boards() -> QuerySet[Board]:
+    """Fetch the boards that were not deleted.
+
+    Deleted boards are hidden until a background task purges them, every board lookup must start from this queryset.
+
+    Returns
+    -------
+    Board queryset.
+    """
+    return Board.objects.filter(is_hidden=False)
+
+
+def visible_posts() -> QuerySet[Post]:
+    """Fetch the posts that were not deleted, in boards that were not deleted.
+
+    Returns
+    -------
+    Post queryset.
+    """
+    return Post.objects.filter(is_hidden=False, board__is_hidden=False)
+
+
+def _comments_of_visible_posts() -> QuerySet[Comment]:
+    return Comment.objects.filter(post__is_hidden=False, post__board__is_hidden=False)
+
+
+def visible_comments() -> QuerySet[Comment]:
+    """Fetch the comments that were not deleted, on posts that were not deleted, in boards that were not deleted.
+
+    Returns
+    -------
+    Comment queryset.
+    """
+    return _comments_of_visible_posts().filter(deleted_at__isnull=True)
+
+
+def listed_comments() -> QuerySet[Comment]:
+    """Fetch the comments shown in listings and threads.
+
+    These are the comments that were not deleted and the deleted ones (tombstones) that still have replies, on posts
+    that were not deleted, in boards that were not deleted.
+
+    Returns
+    -------
+    Comment queryset.
+    """
+    return _comments_of_visible_posts().filter(LISTED_COMMENTS)
 
 
 def board_list(
@@ -23,23 +114,25 @@ def board_list(
 
     Returns
     -------
-    Filtered board queryset.
+    Filtered board queryset, annotated with:
+    - is_member : Whether the given user is a member of the board
+    - is_admin : Whether the given user administers the board
     """
-    qs = Board.objects.all()
+    # Correlated subqueries on the memberships: each one is a single index lookup per board, no matter how many
+    # boards the user belongs to, and the negated filters become NOT EXISTS instead of NOT IN
+    memberships = Membership.objects.filter(board=OuterRef("pk"), user=user)
+    qs = visible_boards().annotate(
+        is_member=Exists(memberships),
+        is_admin=Exists(memberships.filter(role=Membership.Role.ADMIN)),
+    )
     if name is not None:
         qs = qs.filter(name__icontains=name)
     if is_member is not None:
-        if is_member:
-            qs = qs.filter(members__in=[user])
-        else:
-            qs = qs.filter(~Q(members__in=[user]))
+        qs = qs.filter(is_member=is_member)
     if is_admin is not None:
-        if is_admin:
-            qs = qs.filter(admins__in=[user])
-        else:
-            qs = qs.filter(~Q(admins__in=[user]))
+        qs = qs.filter(is_admin=is_admin)
 
-    return qs
+    return qs.only(*BOARD_LIST_FIELDS)
 
 
 def board_get(*, board_id: int) -> Optional[Board]:
@@ -53,7 +146,43 @@ def board_get(*, board_id: int) -> Optional[Board]:
     -------
     Board's instance or None if the board does not exist.
     """
-    return Board.objects.filter(id=board_id).first()
+    return board_cache.get(board_id, lambda: visible_boards().filter(id=board_id).first())
+
+
+def is_board_member(*, board: Board, user: User) -> bool:
+    """Check whether the user is a member of the board.
+
+    The check is a single lookup in the unique (board, user) index of the memberships, whatever the number of
+    members of the board.
+
+    Parameters
+    ----------
+    board : Given board
+    user : Given user
+
+    Returns
+    -------
+    True if the user is a member of the board, False otherwise.
+    """
+    return Membership.objects.filter(board_id=board.id, user_id=user.id).exists()
+
+
+def is_board_admin(*, board: Board, user: User) -> bool:
+    """Check whether the user administers the board.
+
+    The check is a single lookup in the unique (board, user) index of the memberships, whatever the number of
+    members of the board.
+
+    Parameters
+    ----------
+    board : Given board
+    user : Given user
+
+    Returns
+    -------
+    True if the user is an admin of the board, False otherwise.
+    """
+    return Membership.objects.filter(board_id=board.id, user_id=user.id, role=Membership.Role.ADMIN).exists()
 
 
 def post_list(
@@ -73,7 +202,7 @@ def post_list(
     -------
     Filtered post queryset.
     """
-    qs = Post.objects.all()
+    qs = visible_posts()
     if board is not None:
         qs = qs.filter(board=board)
     if text is not None:
@@ -84,7 +213,7 @@ def post_list(
         else:
             qs = qs.filter(~Q(creator=user))
 
-    return qs.order_by("-id")
+    return qs.select_related("creator").only(*POST_LIST_FIELDS).order_by("-id")
 
 
 def post_get(*, post_id: int) -> Optional[Post]:
@@ -98,11 +227,35 @@ def post_get(*, post_id: int) -> Optional[Post]:
     -------
     Post's instance or None if the post does not exist.
     """
-    return Post.objects.filter(id=post_id).first()
+    return post_cache.get(
+        post_id,
+        lambda: visible_posts().select_related("creator").filter(id=post_id).first(),
+        # Deleting a board does not invalidate its cached posts
+        dependencies=lambda post: [(board_cache, post.board_id)],
+    )
+
+
+def post_view_count(*, post: Post) -> int:
+    """Get the number of views of the post.
+
+    Parameters
+    ----------
+    post : Post instance.
+
+    Returns
+    -------
+    The views added to the post's view_count, plus the ones still waiting in the buffer of post views.
+    """
+    return post.view_count + get_counter_buffer(POST_VIEWS_BUFFER).pending([post.id]).get(post.id, 0)
 
 
 def comment_list(
-    *, text: Optional[str] = None, post: Optional[Post] = None, parent: Optional[Comment] = None
+    *,
+    text: Optional[str] = None,
+    post: Optional[Post] = None,
+    parent: Optional[Comment] = None,
+    descendants_of: Optional[Comment] = None,
+    thread_order: bool = False,
 ) -> QuerySet[Comment]:
     """Fetch a filtered list of comments.
 
@@ -110,24 +263,33 @@ def comment_list(
     ----------
     text : The text that the comment contains
     post : Post to which the comments belong
-    parent : The comment whose replies should be returned. If no parent is provided, by default only root comments
-        (those that are not replies to any other comment) are returned.
+    parent : The comment whose replies should be returned. If neither parent nor descendants_of is provided, by
+        default only root comments (those that are not replies to any other comment) are returned.
+    descendants_of : The comment whose replies, replies to replies, etc. should be returned
+    thread_order : If set to True, comments are ordered by their position in the thread (depth first, every comment
+        followed by its replies) instead of chronologically. If neither parent nor descendants_of is provided, all
+        comments are returned, not only root ones.
 
     Returns
     -------
-    Filtered comment queryset.
+    Filtered comment queryset. Deleted comments are only listed while they have replies, so that the replies keep
+    their place in the thread.
     """
-    qs = Comment.objects.all()
+    qs = listed_comments()
     if text is not None:
         qs = qs.filter(text__icontains=text)
     if post is not None:
         qs = qs.filter(post=post)
+    if descendants_of is not None:
+        # A single range scan on the path index: the path of every descendant starts with, and is longer than, the
+        # path of the ancestor
+        qs = qs.filter(path__startswith=descendants_of.path, path__gt=descendants_of.path)
     if parent is not None:
         qs = qs.filter(parent=parent)
-    else:
+    elif descendants_of is None and not thread_order:
         qs = qs.filter(parent__isnull=True)
 
-    return qs.order_by("id")
+    return qs.select_related("creator").only(*COMMENT_LIST_FIELDS).order_by("path" if thread_order else "id")
 
 
 def comment_get(*, comment_id: int) -> Optional[Comment]:
@@ -141,4 +303,152 @@ def comment_get(*, comment_id: int) -> Optional[Comment]:
     -------
     Comment's instance or None if the comment does not exist.
     """
-    return Comment.objects.filter(id=comment_id).first()
+    return comment_cache.get(
+        comment_id,
+        lambda: visible_comments()
+        .select_related("creator")
+        .annotate(board_id=F("post__board_id"))
+        .filter(id=comment_id)
+        .first(),
+        # Deleting a post or its board does not invalidate its cached comments. The id of the board is annotated by
+        # the loader.
+        dependencies=lambda comment: [(post_cache, comment.post_id), (board_cache, comment.board_id)],  # type: ignore
+    )
+
+
+def comment_tree(
+    *,
+    post: Post,
+    parent: Optional[Comment] = None,
+    after: Optional[int] = None,
+    max_depth: int,
+    max_breadth: int,
+) -> List[Comment]:
+    """Fetch a bounded subtree of a post's comments in a single recursive query.
+
+    At each level, the replies of a comment are fetched in chronological order, at most `max_breadth` of them. One more
+    reply is fetched when available, so that the caller can tell that the level was cut off. Those extra comments are
+    returned with `rank == max_breadth + 1` and their replies are not fetched.
+
+    Parameters
+    ----------
+    post : Post whose comments should be returned
+    parent : The comment whose subtree should be returned. If no parent is provided, the root comments (those that are
+        not replies to any other comment) and their subtrees are returned.
+    after : Only the top-level comments with id greater than this one are returned
+    max_depth : Number of levels to return, 1 means that only the top-level comments are returned
+    max_breadth : Maximum number of replies returned per comment (and of top-level comments)
+
+    Returns
+    -------
+    List of comments ordered by depth, then id, with the creator fetched and the following attributes set:
+    - depth : 0 for top-level comments, 1 for their replies, etc.
+    - rank : Position of the comment among its siblings, starting from 1
+    - has_hidden_replies : True if the comment is in the last level and has replies which were not fetched
+    As in comment_list, deleted comments are only returned while they have replies.
+    """
+    comment_table = Comment._meta.db_table
+    user_table = User._meta.db_table
+    # Same condition as LISTED_COMMENTS, so that the partial indexes on the replies and the root comments are used
+    listed = "(deleted_at IS NULL OR reply_count > 0)"
+    sql = f"""
+        WITH RECURSIVE tree AS (
+            SELECT id, 0 AS depth, row_number() OVER (ORDER BY id) AS rank
+            FROM (
+                SELECT id FROM {comment_table}
+                WHERE post_id = %(post_id)s AND {"parent_id = %(parent_id)s" if parent else "parent_id IS NULL"}
+                    AND id > %(after)s AND {listed}
+                ORDER BY id
+                LIMIT %(max_breadth)s + 1
+            ) top_level
+          UNION ALL
+            SELECT replies.id, tree.depth + 1, replies.rank
+            FROM tree
+            CROSS JOIN LATERAL (
+                SELECT id, row_number() OVER (ORDER BY id) AS rank
+                FROM (
+                    SELECT id FROM {comment_table}
+                    WHERE parent_id = tree.id AND {listed}
+                    ORDER BY id
+                    LIMIT %(max_breadth)s + 1
+                ) children
+            ) replies
+            WHERE tree.depth < %(max_depth)s - 1 AND tree.rank <= %(max_breadth)s
+        )
+        SELECT
+            comment.id, comment.text, comment.post_id, comment.parent_id, comment.reply_count, comment.deleted_at,
+            comment.creator_id, creator.username AS creator_username, tree.depth, tree.rank,
+            tree.depth = %(max_depth)s - 1 AND tree.rank <= %(max_breadth)s AND EXISTS (
+                SELECT 1 FROM {comment_table} reply WHERE reply.parent_id = comment.id AND {listed}
+            ) AS has_hidden_replies
+        FROM tree
+        JOIN {comment_table} comment ON comment.id = tree.id
+        JOIN {user_table} creator ON creator.id = comment.creator_id
+        ORDER BY tree.depth, comment.id
+    """
+    params = {
+        "post_id": post.id,
+        "parent_id": parent.id if parent else None,
+        "after": after or 0,
+        "max_depth": max_depth,
+        "max_breadth": max_breadth,
+    }
+
+    comments = list(Comment.objects.raw(sql, params))
+    for comment in comments:
+        # The creator is fetched by the same query, as with select_related
+        comment.creator = User.from_db(
+            comment._state.db, ["id", "username"], [comment.creator_id, comment.creator_username]
+        )
+
+    return comments
+
+
+def post_search(*, query: str, board: Optional[Board] = None) -> QuerySet[Post]:
+    """Search posts using the full-text search vector.
+
+    Parameters
+    ----------
+    query : Search query, in web search syntax (e.g. `"exact phrase" -excluded or alternative`)
+    board : Board to which the posts belong
+
+    Returns
+    -------
+    Queryset of matching posts annotated with `rank`, ordered from the most to the least relevant.
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    qs = visible_posts().filter(search_vector=search_query)
+    if board is not None:
+        qs = qs.filter(board=board)
+
+    return (
+        qs.select_related("creator")
+        .only(*POST_LIST_FIELDS)
+        .annotate(rank=_search_rank(search_query))
+        .order_by("-rank", "-id")
+    )
+
+
+def comment_search(*, query: str, board: Optional[Board] = None) -> QuerySet[Comment]:
+    """Search comments using the full-text search vector.
+
+    Parameters
+    ----------
+    query : Search query, in web search syntax (e.g. `"exact phrase" -excluded or alternative`)
+    board : Board to which the commented posts belong
+
+    Returns
+    -------
+    Queryset of matching comments annotated with `rank`, ordered from the most to the least relevant.
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    qs = visible_comments().filter(search_vector=search_query)
+    if board is not None:
+        qs = qs.filter(post__board=board)
+
+    return (
+        qs.select_related("creator")
+        .only(*COMMENT_LIST_FIELDS)
+        .annotate(rank=_search_rank(search_query))
+        .order_by("-rank", "-id")
+    )
@@ -1,14 +1,113 @@
-from typing import Any, Dict, List, Optional
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+from django.contrib.postgres.search import SearchVector
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Case, F, TextField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied
 
 from boards_of_django.authentication.models import User
-from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.boards.models import (
+    COMMENT_PATH_SEGMENT_WIDTH,
+    POST_VIEWS_BUFFER,
+    SEARCH_CONFIG,
+    Board,
+    Comment,
+    Membership,
+    Post,
+)
+from boards_of_django.boards.selectors import (
+    board_cache,
+    board_posts_page_cache,
+    comment_cache,
+    is_board_admin,
+    is_board_member,
+    post_cache,
+)
+from boards_of_django.common.counters import get_counter_buffer
 from boards_of_django.common.services import model_update
+from boards_of_django.tasks.celery import task_purge_board, task_purge_post
+
+# Purges and compactions run a bounded number of bounded batches per task, so that each task stays well within the
+# Celery time limit
+PURGE_BATCH_SIZE = 1000
+PURGE_MAX_BATCHES = 50
+
+
+def _search_vector(text: str) -> SearchVector:
+    # The vector is computed from the value being saved, so it can be written in the same INSERT/UPDATE statement
+    return SearchVector(Value(text, output_field=TextField()), config=SEARCH_CONFIG)
+
+
+def _decrement(field: str) -> Greatest:
+    # Clamped at 0, so that a counter that drifted (e.g. rows created outside the services) never blocks a deletion.
+    # The drift itself is repaired by the reconcile_counters command.
+    return Greatest(F(field) - 1, 0)
+
+
+def _add_to_counters(*, field: str, deltas: Dict[int, int]) -> None:
+    # The counters of many boards are shifted by different amounts with a single UPDATE
+    if deltas:
+        Board.objects.filter(id__in=deltas).update(
+            **{
+                field: Greatest(
+                    F(field) + Case(*[When(id=board_id, then=Value(delta)) for board_id, delta in deltas.items()]), 0
+                )
+            },
+            updated_at=timezone.now(),
+        )
+        board_cache.invalidate(*deltas)
+
+
+def _add_memberships(
+    *, board_ids: List[int], user_ids: List[int], role: str = Membership.Role.MEMBER
+) -> List[Tuple[int, int]]:
+    # Adds the (board_ids[i], user_ids[i]) memberships with a single statement. Boards that do not exist (or were
+    # deleted) and users that do not exist are skipped by the joins, existing memberships by ON CONFLICT DO NOTHING,
+    # even when they are inserted concurrently, so the counters are only incremented for the users that actually
+    # joined.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Membership._meta.db_table} (board_id, user_id, role, joined_at)
+            SELECT pair.board_id, pair.user_id, %s, now()
+            FROM unnest(%s::bigint[], %s::bigint[]) AS pair(board_id, user_id)
+            JOIN {Board._meta.db_table} board ON board.id = pair.board_id AND NOT board.is_hidden
+            JOIN {User._meta.db_table} u ON u.id = pair.user_id
+            ON CONFLICT (board_id, user_id) DO NOTHING
+            RETURNING board_id, user_id
+            """,
+            [role, board_ids, user_ids],
+        )
+        added: List[Tuple[int, int]] = cursor.fetchall()
+
+    _add_to_counters(field="member_count", deltas=Counter(board_id for board_id, _ in added))
+    return added
+
+
+def _remove_memberships(*, board_ids: List[int], user_ids: List[int]) -> List[Tuple[int, int]]:
+    # Removes the (board_ids[i], user_ids[i]) memberships with a single statement
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {Membership._meta.db_table} membership
+            USING unnest(%s::bigint[], %s::bigint[]) AS pair(board_id, user_id)
+            WHERE membership.board_id = pair.board_id AND membership.user_id = pair.user_id
+            RETURNING membership.board_id, membership.user_id
+            """,
+            [board_ids, user_ids],
+        )
+        removed: List[Tuple[int, int]] = cursor.fetchall()
+
+    removed_per_board = Counter(board_id for board_id, _ in removed)
+    _add_to_counters(field="member_count", deltas={board_id: -count for board_id, count in removed_per_board.items()})
+    return removed
 
 
+@transaction.atomic
 def create_board(
     *,
     name: str,
@@ -35,12 +134,12 @@ def create_board(
     board.full_clean()
     board.save()
 
-    board.members.add(creator)
-    board.admins.add(creator)
+    _add_memberships(board_ids=[board.id], user_ids=[creator.id], role=Membership.Role.ADMIN)
 
     return board
 
 
+@transaction.atomic
 def add_member_to_board(
     *,
     board: Board,
@@ -58,9 +157,75 @@ def add_member_to_board(
     -------
     None
     """
-    board.members.add(user)
+    _add_memberships(board_ids=[board.id], user_ids=[user.id])
+
+
+@transaction.atomic
+def add_member_to_boards(*, user: User, board_ids: List[int]) -> List[int]:
+    """
+    Ensure that the user is added to many boards as their member, with a single statement.
+
+    Boards that do not exist or that the user is already a member of are skipped.
+
+    Parameters
+    ----------
+    user : User that will join the boards as member.
+    board_ids : Ids of the boards that the user will be added to.
+
+    Returns
+    -------
+    Ids of the boards that the user joined
+    """
+    added = _add_memberships(board_ids=board_ids, user_ids=[user.id] * len(board_ids))
+    return sorted(board_id for board_id, _ in added)
+
+
+@transaction.atomic
+def remove_member_from_boards(*, user: User, board_ids: List[int]) -> List[int]:
+    """
+    Ensure that the user is removed from many boards, with a single statement.
+
+    The user's admin role on these boards is removed along with the membership. Boards that the user is not a member
+    of are skipped.
+
+    Parameters
+    ----------
+    user : User that will leave the boards.
+    board_ids : Ids of the boards that the user will be removed from.
+
+    Returns
+    -------
+    Ids of the boards that the user left
+    """
+    removed = _remove_memberships(board_ids=board_ids, user_ids=[user.id] * len(board_ids))
+    return sorted(board_id for board_id, _ in removed)
+
+
+@transaction.atomic
+def add_members_to_board(*, board: Board, user: User, user_ids: List[int]) -> List[int]:
+    """
+    Ensure that many users are added to a board as its members, with a single statement.
+
+    Users that do not exist or that are already board members are skipped. The adding user must be a board admin.
+
+    Parameters
+    ----------
+    board : Board that the users will be added to as members.
+    user : user who is performing the action of adding new members
+    user_ids : Ids of the users that will be added as members.
+
+    Returns
+    -------
+    Ids of the users that were added
+    """
+    if not is_board_admin(board=board, user=user):
+        raise PermissionDenied("Only board admin can perform this action.")
+
+    added = _add_memberships(board_ids=[board.id] * len(user_ids), user_ids=user_ids)
+    return sorted(user_id for _, user_id in added)
 
 
+@transaction.atomic
 def add_admin_to_board(*, board: Board, user: User, users_to_add: List[User]) -> None:
     """
     Add users to a board as its admins.
@@ -78,15 +243,22 @@ def add_admin_to_board(*, board: Board, user: User, users_to_add: List[User]) ->
     -------
     None
     """
-    if user not in board.admins.all():
+    if not is_board_admin(board=board, user=user):
         raise PermissionDenied("Only board admin can perform this action.")
 
-    if board.members.filter(id__in=[user.id for user in users_to_add]).count() != len(users_to_add):
+    # Members are promoted in place, a user to add that has no membership makes the whole promotion roll back
+    promoted = Membership.objects.filter(board_id=board.id, user_id__in=[user.id for user in users_to_add]).update(
+        role=Membership.Role.ADMIN
+    )
+    if promoted != len(users_to_add):
         raise ValidationError({"users_to_add": "Only board members can be added as board admins."})
 
-    board.admins.add(*users_to_add)
+    # The roles are part of the board list of every member, which is validated by the latest update of the boards
+    Board.objects.filter(id=board.id).update(updated_at=timezone.now())
+    board_cache.invalidate(board.id)
 
 
+@transaction.atomic
 def create_post(*, text: str, creator: User, board: Board) -> Post:
     """
     Create a new post instance and save it in database.
@@ -105,26 +277,84 @@ def create_post(*, text: str, creator: User, board: Board) -> Post:
     Post
 
     """
-    if creator not in board.members.all():
+    if not is_board_member(board=board, user=creator):
         raise ValidationError({"board": "Only board members can add posts. You are not a member of this board."})
 
     post = Post(text=text, creator=creator, board=board)
     post.full_clean()
+    post.search_vector = _search_vector(text)
     post.save()
+    Board.objects.filter(id=board.id).update(post_count=F("post_count") + 1, updated_at=timezone.now())
+    board_cache.invalidate(board.id)
+    board_posts_page_cache.invalidate(board.id)
 
     return post
 
 
 @transaction.atomic
-def update_post(*, post: Post, data: Dict[str, Any], user: User) -> Post:
+def create_posts(*, posts: List[Dict[str, Any]], creator: User) -> List[Union[Post, ValidationError]]:
+    """
+    Create many posts, possibly in different boards, at once.
+
+    Every post is validated as in create_post, but the membership of the creator in all the target boards is checked
+    with a single query, and the valid posts are inserted with a single statement. Invalid posts do not prevent the
+    valid ones from being created.
+
+    Parameters
+    ----------
+    posts : Posts to create, each with its `text` and the id of its `board`
+    creator : User that creates the posts
+
+    Returns
+    -------
+    For each given post, in the same order, either the created Post or the ValidationError that prevented its creation
+    """
+    member_of = set(
+        Membership.objects.filter(
+            user_id=creator.id, board_id__in={post["board"] for post in posts}, board__is_hidden=False
+        ).values_list("board_id", flat=True)
+    )
+
+    results: List[Union[Post, ValidationError]] = []
+    for data in posts:
+        if data["board"] not in member_of:
+            results.append(
+                ValidationError({"board": "Only board members can add posts. You are not a member of this board."})
+            )
+            continue
+
+        post = Post(text=data["text"], creator=creator, board_id=data["board"])
+        try:
+            # The foreign keys are already known to exist, validating them would cost one query per post
+            post.full_clean(exclude=["creator", "board"])
+        except ValidationError as error:
+            results.append(error)
+            continue
+        post.search_vector = _search_vector(post.text)
+        results.append(post)
+
+    created = Post.objects.bulk_create([post for post in results if isinstance(post, Post)])
+
+    _add_to_counters(field="post_count", deltas=Counter(post.board_id for post in created))
+    board_posts_page_cache.invalidate(*{post.board_id for post in created})
+
+    return results
+
+
+def update_post(*, post: Post, data: Dict[str, Any], user: User, version: Optional[int] = None) -> Post:
     """
     Update a post.
 
+    The update is optimistic: it is a single UPDATE, without row locks, that only applies if the post was not edited
+    since it was read. Otherwise, Conflict is raised.
+
     Parameters
     ----------
     post : Post to update
     data: Fields to update and their values
     user: User that initiates post edition
+    version: Version of the post that the edit is based on, e.g. the one that the client read. Defaults to the
+        version of the given post.
 
     Returns
     -------
@@ -134,23 +364,75 @@ def update_post(*, post: Post, data: Dict[str, Any], user: User) -> Post:
     if user != post.creator:
         raise PermissionDenied("Only post creators can edit posts. You are not a creator of this post.")
 
-    post, has_updated = model_update(instance=post, fields=["text"], data=data)
-
-    if has_updated:
-        post.edited = True
-        post.save()
+    post, _ = model_update(
+        instance=post,
+        fields=["text"],
+        data=data,
+        extra_data={"edited": True, "search_vector": _search_vector(data.get("text", post.text))},
+        version_field="version",
+        expected_version=version,
+    )
+    post_cache.invalidate(post.id)
+    board_posts_page_cache.invalidate(post.board_id)
 
     return post
 
 
+def record_post_view(*, post: Post) -> None:
+    """
+    Count a view of a post.
+
+    The view is only counted in the buffer of post views, it is added to the post's view_count by flush_post_views.
+    So viewing a post never writes to (nor locks) the post's row.
+
+    Parameters
+    ----------
+    post : Post that was viewed
+    """
+    get_counter_buffer(POST_VIEWS_BUFFER).add(post.id)
+
+
+def flush_post_views() -> int:
+    """
+    Add the views counted in the buffer to the view_count of the posts.
+
+    All the counts are written with a single UPDATE. If it fails, the counts are kept in the buffer for the next flush.
+
+    Returns
+    -------
+    Number of posts whose view_count was updated
+    """
+    with get_counter_buffer(POST_VIEWS_BUFFER).drain() as counts:
+        if not counts:
+            return 0
+
+        table = Post._meta.db_table
+        values = ", ".join(["(%s::bigint, %s::bigint)"] * len(counts))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} SET view_count = {table}.view_count + views.count
+                FROM (VALUES {values}) AS views(id, count)
+                WHERE {table}.id = views.id
+                """,
+                [value for post_id, count in counts.items() for value in (post_id, count)],
+            )
+            updated: int = cursor.rowcount
+        post_cache.invalidate(*counts)
+    return updated
+
+
 @transaction.atomic
 def delete_post(*, post: Post, user: User) -> Post:
     """
-    Update a post.
+    Delete a post.
+
+    The post is hidden at once and its comments, however many, are purged afterwards by a background task (see
+    purge_post), so that the request neither loads them nor holds locks on them.
 
     Parameters
     ----------
-    post : Post to update
+    post : Post to delete
     user: User that initiates post deletion
 
     Returns
@@ -161,11 +443,178 @@ def delete_post(*, post: Post, user: User) -> Post:
     if user != post.creator:
         raise PermissionDenied("Only post creators can delete posts. You are not a creator of this post.")
 
-    post.delete()
+    post.is_hidden = True
+    # Concurrent deletions of the same post only count and purge it once
+    hidden = Post.objects.filter(id=post.id, is_hidden=False).update(is_hidden=True, updated_at=timezone.now())
+    if not hidden:
+        return post
+
+    Board.objects.filter(id=post.board_id).update(post_count=_decrement("post_count"), updated_at=timezone.now())
+    post_cache.invalidate(post.id)
+    board_cache.invalidate(post.board_id)
+    board_posts_page_cache.invalidate(post.board_id)
+
+    post_id = post.id
+    transaction.on_commit(lambda: task_purge_post.delay(post_id))
 
     return post
 
 
+@transaction.atomic
+def delete_board(*, board: Board, user: User) -> Board:
+    """
+    Delete a board.
+
+    The board is hidden at once, along with its posts and comments. They are purged afterwards by a background task
+    (see purge_board). The deleting user must be a board admin.
+
+    Parameters
+    ----------
+    board : Board to delete
+    user: User that initiates board deletion
+
+    Returns
+    -------
+    Board
+
+    """
+    if not is_board_admin(board=board, user=user):
+        raise PermissionDenied("Only board admin can perform this action.")
+
+    board.is_hidden = True
+    # Concurrent deletions of the same board only purge it once
+    hidden = Board.objects.filter(id=board.id, is_hidden=False).update(is_hidden=True, updated_at=timezone.now())
+    if not hidden:
+        return board
+
+    board_cache.invalidate(board.id)
+
+    board_id = board.id
+    transaction.on_commit(lambda: task_purge_board.delay(board_id))
+
+    return board
+
+
+def _delete_in_batches(*, sql: str, params: Dict[str, Any], batch_size: int) -> Iterator[None]:
+    # Runs the DELETE until it deletes less than a batch, every batch in its own short transaction. The statement must
+    # delete at most %(batch_size)s rows. Purges are restarted from scratch when resumed, so a batch is only yielded
+    # when it deleted something: otherwise a resumed purge could keep counting the same empty batch.
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, {**params, "batch_size": batch_size})
+            deleted = cursor.rowcount
+        if deleted == 0:
+            return
+        yield
+        if deleted < batch_size:
+            return
+
+
+def _purge_comments(*, post_id: int, batch_size: int) -> Iterator[None]:
+    # Replies are deleted before their parents: the path of a reply is greater than the path of its parent, so each
+    # batch, taken from the end of the thread, never leaves a reply pointing to a deleted comment
+    yield from _delete_in_batches(
+        sql=f"""
+            DELETE FROM {Comment._meta.db_table} WHERE id IN (
+                SELECT id FROM {Comment._meta.db_table}
+                WHERE post_id = %(post_id)s
+                ORDER BY path DESC
+                LIMIT %(batch_size)s
+            )
+        """,
+        params={"post_id": post_id},
+        batch_size=batch_size,
+    )
+
+
+def _purge_post(*, post_id: int, batch_size: int) -> Iterator[None]:
+    yield from _purge_comments(post_id=post_id, batch_size=batch_size)
+    with transaction.atomic():
+        Post.objects.filter(id=post_id).delete()
+    yield
+
+
+def _purge_board(*, board_id: int, batch_size: int) -> Iterator[None]:
+    while True:
+        post_ids = list(
+            Post.objects.filter(board_id=board_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not post_ids:
+            break
+        for post_id in post_ids:
+            yield from _purge_comments(post_id=post_id, batch_size=batch_size)
+        with transaction.atomic():
+            Post.objects.filter(id__in=post_ids).delete()
+        yield
+
+    yield from _delete_in_batches(
+        sql=f"""
+            DELETE FROM {Membership._meta.db_table} WHERE id IN (
+                SELECT id FROM {Membership._meta.db_table} WHERE board_id = %(board_id)s LIMIT %(batch_size)s
+            )
+        """,
+        params={"board_id": board_id},
+        batch_size=batch_size,
+    )
+    with transaction.atomic():
+        Board.objects.filter(id=board_id).delete()
+    yield
+
+
+def _run_batches(batches: Iterator[None], max_batches: int) -> bool:
+    for batch_number, _ in enumerate(batches, start=1):
+        if batch_number == max_batches:
+            return False
+    return True
+
+
+def purge_post(*, post_id: int, batch_size: int = PURGE_BATCH_SIZE, max_batches: int = PURGE_MAX_BATCHES) -> bool:
+    """
+    Delete a hidden post and its comments, a bounded batch at a time.
+
+    Every batch is deleted with a single statement, in its own transaction, without loading the rows. Comments are
+    deleted replies first, so the purge can be interrupted after any batch and resumed later. Posts that are not
+    hidden are left untouched.
+
+    Parameters
+    ----------
+    post_id : Id of the post to purge
+    batch_size : Maximum number of rows deleted per batch
+    max_batches : Maximum number of batches run by this call
+
+    Returns
+    -------
+    True if the post is purged, False if batches remain to be run
+    """
+    if not Post.objects.filter(id=post_id, is_hidden=True).exists():
+        return True
+
+    return _run_batches(_purge_post(post_id=post_id, batch_size=batch_size), max_batches)
+
+
+def purge_board(*, board_id: int, batch_size: int = PURGE_BATCH_SIZE, max_batches: int = PURGE_MAX_BATCHES) -> bool:
+    """
+    Delete a hidden board with its posts, their comments and the board's memberships, a bounded batch at a time.
+
+    Batches are run as in purge_post. Boards that are not hidden are left untouched.
+
+    Parameters
+    ----------
+    board_id : Id of the board to purge
+    batch_size : Maximum number of rows deleted per batch
+    max_batches : Maximum number of batches run by this call
+
+    Returns
+    -------
+    True if the board is purged, False if batches remain to be run
+    """
+    if not Board.objects.filter(id=board_id, is_hidden=True).exists():
+        return True
+
+    return _run_batches(_purge_board(board_id=board_id, batch_size=batch_size), max_batches)
+
+
+@transaction.atomic
 def create_comment(*, text: str, creator: User, post: Post, parent: Optional[Comment] = None) -> Comment:
     """
     Create a new comment instance and save it in database.
@@ -184,7 +633,7 @@ def create_comment(*, text: str, creator: User, post: Post, parent: Optional[Com
     -------
     Post
     """
-    if not post.board.members.filter(id=creator.id).exists():
+    if not is_board_member(board=post.board, user=creator):
         raise ValidationError({"board": "Only board members can add comments. You are not a member of this board."})
 
     if parent is not None and parent.post != post:
@@ -192,6 +641,112 @@ def create_comment(*, text: str, creator: User, post: Post, parent: Optional[Com
 
     comment = Comment(text=text, creator=creator, post=post, parent=parent)
     comment.full_clean()
+    comment.search_vector = _search_vector(text)
     comment.save()
 
+    # The path ends with the comment's own id, so it can only be computed once the comment is inserted
+    comment.path = (parent.path if parent is not None else "") + str(comment.id).zfill(COMMENT_PATH_SEGMENT_WIDTH)
+    Comment.objects.filter(id=comment.id).update(path=comment.path)
+
+    Post.objects.filter(id=post.id).update(comment_count=F("comment_count") + 1, updated_at=timezone.now())
+    post_cache.invalidate(post.id)
+    board_posts_page_cache.invalidate(post.board_id)
+    if parent is not None:
+        Comment.objects.filter(id=parent.id).update(reply_count=F("reply_count") + 1, updated_at=timezone.now())
+        comment_cache.invalidate(parent.id)
+
+    return comment
+
+
+@transaction.atomic
+def delete_comment(*, comment: Comment, user: User) -> Comment:
+    """
+    Delete a comment.
+
+    The comment is turned into a tombstone, in place: its text is cleared and its deletion time is set, so that its
+    replies keep their place in the thread. Tombstones without replies are removed later by compact_comments.
+
+    Parameters
+    ----------
+    comment : Comment to delete
+    user: User that initiates comment deletion
+
+    Returns
+    -------
+    Comment
+
+    """
+    if user != comment.creator:
+        raise PermissionDenied("Only comment creators can delete comments. You are not a creator of this comment.")
+
+    comment.text, comment.search_vector, comment.deleted_at = "", None, timezone.now()
+    deleted = Comment.objects.filter(id=comment.id, deleted_at__isnull=True).update(
+        text=comment.text,
+        search_vector=comment.search_vector,
+        deleted_at=comment.deleted_at,
+        updated_at=comment.deleted_at,
+    )
+    if deleted:
+        Post.objects.filter(id=comment.post_id).update(
+            comment_count=_decrement("comment_count"), updated_at=timezone.now()
+        )
+        comment_cache.invalidate(comment.id)
+        post_cache.invalidate(comment.post_id)
+
     return comment
+
+
+def compact_comments(*, batch_size: int = PURGE_BATCH_SIZE, max_batches: int = PURGE_MAX_BATCHES) -> int:
+    """
+    Remove the tombstones that have no replies, a bounded batch at a time.
+
+    Every batch is a single statement, in its own transaction, that deletes the tombstones and decrements the reply
+    counters of their parents. A tombstone whose last reply was removed is removed by a later batch, so whole deleted
+    subtrees are compacted, from the leaves up.
+
+    Parameters
+    ----------
+    batch_size : Maximum number of tombstones removed per batch
+    max_batches : Maximum number of batches run by this call, the remaining tombstones are left to the next one
+
+    Returns
+    -------
+    Number of tombstones removed
+    """
+    table = Comment._meta.db_table
+    removed = 0
+    for _ in range(max_batches):
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The parents updated by the outer statement are never deleted by the same statement: they still have
+            # a reply in its snapshot, the one being deleted
+            cursor.execute(
+                f"""
+                WITH removed AS (
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT tombstone.id FROM {table} tombstone
+                        WHERE tombstone.deleted_at IS NOT NULL
+                            AND NOT EXISTS (SELECT 1 FROM {table} reply WHERE reply.parent_id = tombstone.id)
+                        LIMIT %(batch_size)s
+                    )
+                    RETURNING parent_id
+                ), parents AS (
+                    UPDATE {table} parent
+                    SET
+                        reply_count = greatest(parent.reply_count - removed_replies.count, 0),
+                        updated_at = clock_timestamp()
+                    FROM (
+                        SELECT parent_id, count(*) AS count FROM removed WHERE parent_id IS NOT NULL GROUP BY parent_id
+                    ) removed_replies
+                    WHERE parent.id = removed_replies.parent_id
+                )
+                SELECT count(*), array_remove(array_agg(DISTINCT parent_id), NULL) FROM removed
+                """,
+                {"batch_size": batch_size},
+            )
+            batch, parent_ids = cursor.fetchone()
+            comment_cache.invalidate(*(parent_ids or []))
+        if batch == 0:
+            break
+        removed += batch
+
+    return removed
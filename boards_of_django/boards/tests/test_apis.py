@@ -1,11 +1,27 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
+from pytest_mock import MockerFixture
 from rest_framework import status
 
-from boards_of_django.boards.models import Board, Comment, Post
-from boards_of_django.common.utils import reverse_with_query_params
+from boards_of_django.authentication.models import User
+from boards_of_django.boards.models import Board, Comment, Membership, Post
+from boards_of_django.boards.services import (
+    add_admin_to_board,
+    add_member_to_board,
+    create_board,
+    create_comment,
+    create_post,
+    delete_post,
+    flush_post_views,
+    update_post,
+)
+from boards_of_django.common.exceptions import Conflict
+from boards_of_django.common.utils import reverse_with_query_params, version_etag
 from conftest import APIClientWithUser
 from factories import BoardFactory, CommentFactory, PostFactory, UserFactory
 
@@ -26,14 +42,34 @@ def boards_add_admin_url(board_id: int) -> str:
     return reverse("boards:board-detail-add-admin", kwargs={"board_id": board_id})
 
 
+def boards_add_members_url(board_id: int) -> str:
+    return reverse("boards:board-detail-add-members", kwargs={"board_id": board_id})
+
+
+def boards_bulk_join_url() -> str:
+    return reverse("boards:boards-join")
+
+
+def boards_bulk_leave_url() -> str:
+    return reverse("boards:boards-leave")
+
+
 def posts_url(query_kwargs: Optional[Dict[str, Any]] = None) -> str:
     return reverse_with_query_params("boards:posts", query_kwargs=query_kwargs)
 
 
+def posts_bulk_url() -> str:
+    return reverse("boards:posts-bulk")
+
+
 def posts_detail_url(post_id: int) -> str:
     return reverse("boards:post-detail", kwargs={"post_id": post_id})
 
 
+def posts_thread_url(post_id: int, query_kwargs: Optional[Dict[str, Any]] = None) -> str:
+    return reverse_with_query_params("boards:post-thread", kwargs={"post_id": post_id}, query_kwargs=query_kwargs)
+
+
 def comments_url(query_kwargs: Optional[Dict[str, Any]] = None) -> str:
     return reverse_with_query_params("boards:comments", query_kwargs=query_kwargs)
 
@@ -42,6 +78,19 @@ def comments_detail_url(comment_id: int) -> str:
     return reverse("boards:comment-detail", kwargs={"comment_id": comment_id})
 
 
+def search_url(query_kwargs: Optional[Dict[str, Any]] = None) -> str:
+    return reverse_with_query_params("boards:search", query_kwargs=query_kwargs)
+
+
+def admins_of(board: Board) -> List[User]:
+    return list(User.objects.filter(memberships__board=board, memberships__role=Membership.Role.ADMIN).order_by("id"))
+
+
+def select_queries(context: CaptureQueriesContext) -> List[str]:
+    # Savepoints opened around the writes are not relevant here, only the data and count queries are
+    return [query["sql"] for query in context.captured_queries if query["sql"].lstrip().startswith(("SELECT", "WITH"))]
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "data",
@@ -66,7 +115,7 @@ def test_create_board_success(api_client_with_credentials: APIClientWithUser, da
     board = Board.objects.first()
 
     assert list(board.members.all()) == [api_client_with_credentials.user]  # type: ignore
-    assert list(board.admins.all()) == [api_client_with_credentials.user]  # type: ignore
+    assert admins_of(board) == [api_client_with_credentials.user]  # type: ignore
 
 
 @pytest.mark.django_db
@@ -132,15 +181,17 @@ def test_create_board_name_not_unique(
 
 @pytest.mark.django_db
 def test_get_board_list(api_client_with_credentials: APIClientWithUser) -> None:
-    board_1 = BoardFactory()
+    board_1 = BoardFactory(members=[api_client_with_credentials.user])
     board_2 = BoardFactory()
-    board_1.members.add(api_client_with_credentials.user)
 
     response = api_client_with_credentials.get(boards_url())
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 2
-    assert response.json()["results"] == [{"name": board_1.name}, {"name": board_2.name}]
+    assert response.json()["results"] == [
+        {"name": board_1.name, "is_member": True, "is_admin": False, "member_count": 1, "post_count": 0},
+        {"name": board_2.name, "is_member": False, "is_admin": False, "member_count": 0, "post_count": 0},
+    ]
 
 
 @pytest.mark.django_db
@@ -151,7 +202,7 @@ def test_get_board_list_filter_by_name(api_client_with_credentials: APIClientWit
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [{"name": board_1.name}]
+    assert [result["name"] for result in response.json()["results"]] == [board_1.name]
 
 
 @pytest.mark.django_db
@@ -164,7 +215,7 @@ def test_get_board_list_filter_by_name_multiple_results(api_client_with_credenti
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 2
-    assert response.json()["results"] == [{"name": board_1.name}, {"name": board_2.name}]
+    assert [result["name"] for result in response.json()["results"]] == [board_1.name, board_2.name]
 
 
 @pytest.mark.django_db
@@ -178,7 +229,20 @@ def test_get_board_list_filter_is_member(api_client_with_credentials: APIClientW
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [{"name": board_1.name}]
+    assert [result["name"] for result in response.json()["results"]] == [board_1.name]
+
+
+@pytest.mark.django_db
+def test_get_board_list_filter_is_not_member(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    BoardFactory(members=[user])
+    board_2 = BoardFactory(members=[UserFactory()])
+    board_3 = BoardFactory()
+
+    response = api_client_with_credentials.get(boards_url(query_kwargs={"is_member": False}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["name"] for result in response.json()["results"]] == [board_2.name, board_3.name]
 
 
 @pytest.mark.django_db
@@ -187,14 +251,67 @@ def test_get_board_list_filter_is_admin(api_client_with_credentials: APIClientWi
     board_2 = BoardFactory()
     BoardFactory()
     user = api_client_with_credentials.user
-    board_1.admins.add(user)
+    Membership.objects.create(board=board_1, user=user, role=Membership.Role.ADMIN)
     board_2.members.add(user)
 
     response = api_client_with_credentials.get(boards_url(query_kwargs={"is_admin": True}))
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [{"name": board_1.name}]
+    assert [result["name"] for result in response.json()["results"]] == [board_1.name]
+
+
+@pytest.mark.django_db
+def test_get_board_list_filter_is_not_admin(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    BoardFactory(members=[user], admins=[user])
+    board_2 = BoardFactory(members=[user])
+
+    response = api_client_with_credentials.get(boards_url(query_kwargs={"is_admin": False}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == [
+        {"name": board_2.name, "is_member": True, "is_admin": False, "member_count": 1, "post_count": 0},
+    ]
+
+
+@pytest.mark.django_db
+def test_get_board_list_counters(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = create_board(name="counted", creator=user)
+    member = UserFactory()
+    add_member_to_board(board=board, user=member)
+    add_member_to_board(board=board, user=member)
+    create_post(text="The first post text", creator=user, board=board)
+    post = create_post(text="The second post text", creator=member, board=board)
+    delete_post(post=post, user=member)
+
+    response = api_client_with_credentials.get(boards_url())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == [
+        {"name": board.name, "is_member": True, "is_admin": True, "member_count": 2, "post_count": 1}
+    ]
+
+
+@pytest.mark.django_db
+def test_get_comment_counters(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    post = create_post(text="The commented post", creator=user, board=BoardFactory(members=[user]))
+    comment = create_comment(text="comment", creator=user, post=post)
+    reply = create_comment(text="reply", creator=user, post=post, parent=comment)
+    create_comment(text="reply to reply", creator=user, post=post, parent=reply)
+    create_comment(text="another reply", creator=user, post=post, parent=comment)
+
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["comment_count"] == 4
+
+    response = api_client_with_credentials.get(comments_url(query_kwargs={"post": post.id, "thread_order": True}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [comment["reply_count"] for comment in response.json()["results"]] == [2, 1, 0, 0]
 
 
 @pytest.mark.django_db
@@ -204,7 +321,37 @@ def test_get_board_detail_success(api_client_with_credentials: APIClientWithUser
     response = api_client_with_credentials.get(boards_detail_url(board_id=board.pk))
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {"name": board.name}
+    assert response.json() == {"name": board.name, "member_count": 0, "post_count": 0}
+
+
+@pytest.mark.django_db
+def test_get_board_detail_not_modified(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory()
+    response = api_client_with_credentials.get(boards_detail_url(board_id=board.pk))
+
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    response = api_client_with_credentials.get(boards_detail_url(board_id=board.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    response = api_client_with_credentials.get(
+        boards_detail_url(board_id=board.pk), HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_get_board_detail_modified_by_counters(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = BoardFactory(members=[user])
+    etag = api_client_with_credentials.get(boards_detail_url(board_id=board.pk)).headers["ETag"]
+
+    create_post(text="A new post", creator=user, board=board)
+
+    response = api_client_with_credentials.get(boards_detail_url(board_id=board.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["post_count"] == 1
+    assert response.headers["ETag"] != etag
 
 
 @pytest.mark.django_db
@@ -214,6 +361,38 @@ def test_get_board_detail_not_found(api_client_with_credentials: APIClientWithUs
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.django_db
+def test_delete_board(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = BoardFactory(members=[user], admins=[user])
+    post = PostFactory(board=board, creator=user)
+    comment = CommentFactory(post=post, creator=user, text="A searchable comment")
+
+    response = api_client_with_credentials.delete(boards_detail_url(board_id=board.id))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    # The board, its posts and their comments are hidden at once, they are purged later by a background task
+    assert Board.objects.get(id=board.id).is_hidden
+    assert api_client_with_credentials.get(boards_detail_url(board_id=board.id)).status_code == 404
+    assert api_client_with_credentials.get(boards_url()).json()["results"] == []
+    assert api_client_with_credentials.get(posts_detail_url(post_id=post.id)).status_code == 404
+    assert api_client_with_credentials.get(posts_url()).json()["results"] == []
+    assert api_client_with_credentials.get(comments_detail_url(comment_id=comment.id)).status_code == 404
+    assert api_client_with_credentials.get(comments_url({"text": "searchable"})).json()["results"] == []
+    response = api_client_with_credentials.get(search_url({"query": "searchable", "type": "comment"}))
+    assert response.json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_delete_board_by_user_that_is_not_an_admin(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+
+    response = api_client_with_credentials.delete(boards_detail_url(board_id=board.id))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert not Board.objects.get(id=board.id).is_hidden
+
+
 @pytest.mark.django_db
 def test_join_board(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
@@ -235,7 +414,7 @@ def test_join_board_not_found(api_client_with_credentials: APIClientWithUser) ->
 @pytest.mark.django_db
 def test_add_admin_to_board(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
-    board.admins.add(api_client_with_credentials.user)
+    Membership.objects.create(board=board, user=api_client_with_credentials.user, role=Membership.Role.ADMIN)
     user_to_add = UserFactory()
     board.members.add(user_to_add)
 
@@ -244,29 +423,42 @@ def test_add_admin_to_board(api_client_with_credentials: APIClientWithUser) -> N
     )
 
     assert response.status_code == status.HTTP_200_OK
-    assert list(board.admins.all()) == [api_client_with_credentials.user, user_to_add]
+    assert admins_of(board) == [api_client_with_credentials.user, user_to_add]
+
+
+@pytest.mark.django_db
+def test_add_admin_to_board_modifies_board_list(api_client_with_credentials: APIClientWithUser) -> None:
+    admin = UserFactory()
+    board = BoardFactory(members=[admin, api_client_with_credentials.user], admins=[admin])
+    response = api_client_with_credentials.get(boards_url())
+    assert response.json()["results"][0]["is_admin"] is False
+
+    add_admin_to_board(board=board, user=admin, users_to_add=[api_client_with_credentials.user])
+
+    response = api_client_with_credentials.get(boards_url(), HTTP_IF_NONE_MATCH=response.headers["ETag"])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"][0]["is_admin"] is True
 
 
 @pytest.mark.django_db
 def test_add_admin_who_is_already_an_admin_to_board(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
-    board.admins.add(api_client_with_credentials.user)
+    Membership.objects.create(board=board, user=api_client_with_credentials.user, role=Membership.Role.ADMIN)
     user_to_add = UserFactory()
-    board.members.add(user_to_add)
-    board.admins.add(user_to_add)
+    Membership.objects.create(board=board, user=user_to_add, role=Membership.Role.ADMIN)
 
     response = api_client_with_credentials.post(
         boards_add_admin_url(board_id=board.id), data={"users_to_add": [user_to_add.id]}
     )
 
     assert response.status_code == status.HTTP_200_OK
-    assert list(board.admins.all()) == [api_client_with_credentials.user, user_to_add]
+    assert admins_of(board) == [api_client_with_credentials.user, user_to_add]
 
 
 @pytest.mark.django_db
 def test_add_admin_who_is_not_a_member_to_board(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
-    board.admins.add(api_client_with_credentials.user)
+    Membership.objects.create(board=board, user=api_client_with_credentials.user, role=Membership.Role.ADMIN)
     user_to_add = UserFactory()
 
     response = api_client_with_credentials.post(
@@ -301,6 +493,90 @@ def test_add_admin_board_not_found(api_client_with_credentials: APIClientWithUse
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.django_db
+def test_bulk_join_boards(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    joined_board = BoardFactory(members=[user])
+    boards = BoardFactory.create_batch(3)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.post(
+            boards_bulk_join_url(), data={"boards": [board.id for board in boards] + [joined_board.id, 0]}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    # The memberships are added with one INSERT and the counters updated with one UPDATE
+    statements = [query["sql"].split()[0] for query in context.captured_queries]
+    assert [statement for statement in statements if statement in ("INSERT", "UPDATE", "DELETE")] == [
+        "INSERT",
+        "UPDATE",
+    ]
+    assert response.json() == {"joined": [board.id for board in boards]}
+    for board in boards + [joined_board]:
+        board.refresh_from_db()
+        assert list(board.members.all()) == [user]
+        assert board.member_count == 1
+
+
+@pytest.mark.django_db
+def test_bulk_join_boards_empty(api_client_with_credentials: APIClientWithUser) -> None:
+    response = api_client_with_credentials.post(boards_bulk_join_url(), data={"boards": []}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_leave_boards(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    other_user = UserFactory()
+    boards = BoardFactory.create_batch(2, members=[user, other_user], admins=[user])
+    other_board = BoardFactory(members=[other_user])
+
+    response = api_client_with_credentials.post(
+        boards_bulk_leave_url(), data={"boards": [board.id for board in boards] + [other_board.id]}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"left": [board.id for board in boards]}
+    for board in boards + [other_board]:
+        board.refresh_from_db()
+        assert list(board.members.all()) == [other_user]
+        assert board.member_count == 1
+
+
+@pytest.mark.django_db
+def test_add_members_to_board(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    member = UserFactory()
+    board = BoardFactory(members=[user, member], admins=[user])
+    users_to_add = UserFactory.create_batch(2)
+
+    response = api_client_with_credentials.post(
+        boards_add_members_url(board_id=board.id),
+        data={"users_to_add": [user_to_add.id for user_to_add in users_to_add] + [member.id, 0]},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"added": [user_to_add.id for user_to_add in users_to_add]}
+    assert list(board.members.order_by("id")) == [user, member] + users_to_add
+    board.refresh_from_db()
+    assert board.member_count == 4
+
+
+@pytest.mark.django_db
+def test_add_members_by_user_that_is_not_an_admin(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+    user_to_add = UserFactory()
+
+    response = api_client_with_credentials.post(
+        boards_add_members_url(board_id=board.id), data={"users_to_add": [user_to_add.id]}
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json() == {"detail": "Only board admin can perform this action."}
+    assert list(board.members.all()) == [api_client_with_credentials.user]
+
+
 @pytest.mark.django_db
 def test_create_post_success(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
@@ -346,6 +622,121 @@ def test_create_post_validation_failed(
     assert Post.objects.count() == 0
 
 
+@pytest.mark.django_db
+def test_create_post_with_idempotency_key_is_replayed(
+    api_client_with_credentials: APIClientWithUser, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+    data = {"text": "test test test", "board": board.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+    replayed = api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+
+    assert response.status_code == replayed.status_code == status.HTTP_201_CREATED
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert Post.objects.count() == 1
+    assert Board.objects.get(id=board.id).post_count == 1
+
+
+@pytest.mark.django_db
+def test_create_post_with_idempotency_key_of_another_request(
+    api_client_with_credentials: APIClientWithUser, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client_with_credentials.post(
+            posts_url(), {"text": "test test test", "board": board.id}, HTTP_IDEMPOTENCY_KEY="key"
+        )
+    response = api_client_with_credentials.post(
+        posts_url(), {"text": "other test test", "board": board.id}, HTTP_IDEMPOTENCY_KEY="key"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"Idempotency-Key": "Was already used for a different request."}
+    assert Post.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_create_post_idempotency_keys_are_per_user(
+    api_client_with_credentials: APIClientWithUser, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    other_user = UserFactory()
+    board = BoardFactory(members=[api_client_with_credentials.user, other_user])
+    data = {"text": "test test test", "board": board.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+    api_client_with_credentials.force_authenticate(user=other_user)
+    response = api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in response.headers
+    assert Post.objects.filter(creator=other_user).count() == 1
+
+
+@pytest.mark.django_db
+def test_create_post_with_idempotency_key_is_retried_after_error(
+    api_client_with_credentials: APIClientWithUser, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    board = BoardFactory()
+    data = {"text": "test test test", "board": board.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    board.members.add(api_client_with_credentials.user)
+    response = api_client_with_credentials.post(posts_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert Post.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_create_post_with_idempotency_key_in_progress(
+    api_client_with_credentials: APIClientWithUser, mocker: MockerFixture
+) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+    # The lock is held by the first request
+    mocker.patch("boards_of_django.common.idempotency.cache.add", return_value=False)
+    sleep = mocker.patch("time.sleep")
+
+    response = api_client_with_credentials.post(
+        posts_url(), {"text": "test test test", "board": board.id}, HTTP_IDEMPOTENCY_KEY="key"
+    )
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    # The duplicate does not wait for the first request within its own transaction
+    sleep.assert_not_called()
+    assert Post.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_post_with_invalid_idempotency_key(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user])
+
+    response = api_client_with_credentials.post(
+        posts_url(), {"text": "test test test", "board": board.id}, HTTP_IDEMPOTENCY_KEY="k" * 256
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Post.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_post_does_not_load_board_members(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory(members=[api_client_with_credentials.user, *UserFactory.create_batch(20)])
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.post(posts_url(), {"text": "test test test", "board": board.id})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    membership_queries = [query for query in select_queries(context) if "boards_membership" in query]
+    assert len(membership_queries) == 1
+    assert "LIMIT 1" in membership_queries[0]
+
+
 @pytest.mark.django_db
 def test_cannot_create_post_if_not_a_board_member(api_client_with_credentials: APIClientWithUser) -> None:
     board = BoardFactory()
@@ -356,6 +747,54 @@ def test_cannot_create_post_if_not_a_board_member(api_client_with_credentials: A
     assert response.json() == {"board": ["Only board members can add posts. You are not a member of this board."]}
 
 
+@pytest.mark.django_db
+def test_create_posts_in_bulk(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board_1 = BoardFactory(members=[user])
+    board_2 = BoardFactory(members=[user])
+    other_board = BoardFactory()
+    posts = [
+        {"text": "first post text", "board": board_1.id},
+        {"text": "short", "board": board_1.id},
+        {"text": "second post text", "board": board_2.id},
+        {"text": "not a member here", "board": other_board.id},
+        {"text": "no such board here", "board": 0},
+    ]
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.post(posts_bulk_url(), {"posts": posts}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    first_post = Post.objects.get(text="first post text")
+    second_post = Post.objects.get(text="second post text")
+    not_a_member = {"board": ["Only board members can add posts. You are not a member of this board."]}
+    assert response.json() == {
+        "results": [
+            {"id": first_post.id, "errors": None},
+            {"id": None, "errors": {"text": ["Ensure this value has at least 10 characters (it has 5)."]}},
+            {"id": second_post.id, "errors": None},
+            {"id": None, "errors": not_a_member},
+            {"id": None, "errors": not_a_member},
+        ]
+    }
+    assert (first_post.creator, first_post.board) == (user, board_1)
+    assert Post.objects.count() == 2
+    board_1.refresh_from_db()
+    board_2.refresh_from_db()
+    assert (board_1.post_count, board_2.post_count) == (1, 1)
+    # One query checks all the memberships and one statement inserts all the posts
+    assert len([query for query in context.captured_queries if "boards_membership" in query["sql"]]) == 1
+    assert len([query for query in context.captured_queries if query["sql"].startswith("INSERT")]) == 1
+
+
+@pytest.mark.django_db
+def test_create_posts_in_bulk_validation_failed(api_client_with_credentials: APIClientWithUser) -> None:
+    response = api_client_with_credentials.post(posts_bulk_url(), {"posts": [{"text": "text only"}]}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"posts": [{"board": ["This field is required."]}]}
+
+
 @pytest.mark.django_db
 def test_get_post_list(api_client_with_credentials: APIClientWithUser) -> None:
     post_1 = PostFactory()
@@ -370,90 +809,330 @@ def test_get_post_list(api_client_with_credentials: APIClientWithUser) -> None:
             "text": post_2.text,
             "creator": {"id": post_2.creator.id, "username": post_2.creator.username},
             "edited": False,
+            "comment_count": 0,
         },
         {
             "text": post_1.text,
             "creator": {"id": post_1.creator.id, "username": post_1.creator.username},
             "edited": False,
+            "comment_count": 0,
         },
     ]
 
 
 @pytest.mark.django_db
-def test_get_post_list_filter_by_text(api_client_with_credentials: APIClientWithUser) -> None:
-    post = PostFactory(text="Text that I am looking for")
-    PostFactory(text="Something unimportant")
+def test_get_post_list_not_modified(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = BoardFactory(members=[user])
+    post = create_post(text="The listed post", creator=user, board=board)
+    # Not the first page of the board, which is cached
+    url = posts_url(query_kwargs={"board": board.id, "text": "listed"})
+    response = api_client_with_credentials.get(url)
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
 
-    response = api_client_with_credentials.get(posts_url(query_kwargs={"text": "I am looking"}))
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(url, HTTP_IF_NONE_MATCH=etag)
 
-    assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [
-        {"text": post.text, "creator": {"id": post.creator.id, "username": post.creator.username}, "edited": False},
-    ]
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    # The board of the filter and the validators of the list, the page is neither fetched nor counted
+    assert len(select_queries(context)) == 2
 
+    create_comment(text="A comment", creator=user, post=post)
 
-@pytest.mark.django_db
-def test_get_post_list_filter_by_board(api_client_with_credentials: APIClientWithUser) -> None:
-    post = PostFactory()
-    PostFactory()
+    response = api_client_with_credentials.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"][0]["comment_count"] == 1
+    etag = response.headers["ETag"]
 
-    response = api_client_with_credentials.get(posts_url(query_kwargs={"board": post.board.id}))
+    delete_post(post=post, user=user)
 
+    response = api_client_with_credentials.get(url, HTTP_IF_NONE_MATCH=etag)
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [
-        {"text": post.text, "creator": {"id": post.creator.id, "username": post.creator.username}, "edited": False},
-    ]
+    assert response.json()["results"] == []
 
 
 @pytest.mark.django_db
-def test_get_post_list_filter_own_posts(api_client_with_credentials: APIClientWithUser) -> None:
-    post = PostFactory(creator=api_client_with_credentials.user)
-    PostFactory(creator=UserFactory())
+def test_get_post_list_if_modified_since_after_removal(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = BoardFactory(members=[user])
+    create_post(text="The older listed post", creator=user, board=board)
+    latest = create_post(text="The latest listed post", creator=user, board=board)
+    url = posts_url(query_kwargs={"board": board.id, "text": "listed"})
+    # As a Last-Modified the list would have had before the removal
+    since = http_date(latest.updated_at.timestamp())
 
-    response = api_client_with_credentials.get(posts_url(query_kwargs={"is_creator": True}))
+    delete_post(post=latest, user=user)
 
+    # The remaining posts were last updated before that
+    response = api_client_with_credentials.get(url, HTTP_IF_MODIFIED_SINCE=since)
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [
-        {"text": post.text, "creator": {"id": post.creator.id, "username": post.creator.username}, "edited": False},
-    ]
 
 
 @pytest.mark.django_db
-def test_get_post_list_filter_not_own_posts(api_client_with_credentials: APIClientWithUser) -> None:
-    PostFactory(creator=api_client_with_credentials.user)
-    post = PostFactory(creator=UserFactory())
+def test_get_post_list_board_first_page_is_cached(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory()
+    posts = PostFactory.create_batch(3, board=board)
+    api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id, "limit": 2}))
 
-    response = api_client_with_credentials.get(posts_url(query_kwargs={"is_creator": False}))
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id, "limit": 2}))
+        not_modified = api_client_with_credentials.get(
+            posts_url(query_kwargs={"board": board.id, "limit": 2}), HTTP_IF_NONE_MATCH=response.headers["ETag"]
+        )
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.json()["results"]) == 1
-    assert response.json()["results"] == [
-        {"text": post.text, "creator": {"id": post.creator.id, "username": post.creator.username}, "edited": False},
-    ]
+    assert [post["text"] for post in response.json()["results"]] == [posts[2].text, posts[1].text]
+    assert response.json()["count"] == 3
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert len(context.captured_queries) == 0
 
 
 @pytest.mark.django_db
-def test_get_post_detail_success(api_client_with_credentials: APIClientWithUser) -> None:
-    post = PostFactory()
+def test_get_post_list_board_first_page_is_refreshed(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    board = BoardFactory(members=[user])
+    post = PostFactory(board=board, creator=user)
+    api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id}))
 
-    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk))
+    update_post(post=post, data={"text": "The edited post"}, user=user)
 
-    assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {
-        "text": post.text,
-        "creator": {"id": post.creator.id, "username": post.creator.username},
-        "edited": False,
-    }
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id}))
+    assert [post["text"] for post in response.json()["results"]] == ["The edited post"]
 
+    created = create_post(text="The newest post", creator=user, board=board)
 
-@pytest.mark.django_db
-def test_get_post_detail_not_found(api_client_with_credentials: APIClientWithUser) -> None:
-    response = api_client_with_credentials.get(posts_detail_url(post_id=0))
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id}))
+    assert [post["text"] for post in response.json()["results"]] == ["The newest post", "The edited post"]
 
-    assert response.status_code == status.HTTP_404_NOT_FOUND
+    delete_post(post=created, user=user)
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"board": board.id}))
+    assert [post["text"] for post in response.json()["results"]] == ["The edited post"]
+
+
+@pytest.mark.django_db
+def test_get_post_list_other_pages_are_not_cached(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory()
+    PostFactory.create_batch(3, board=board)
+    url = posts_url(query_kwargs={"board": board.id, "limit": 2, "offset": 2})
+    api_client_with_credentials.get(url)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(url)
+
+    assert len(response.json()["results"]) == 1
+    assert len(select_queries(context)) > 0
+
+
+@pytest.mark.django_db
+def test_get_empty_list_not_modified(api_client_with_credentials: APIClientWithUser) -> None:
+    url = comments_url(query_kwargs={"text": "nothing matches"})
+    response = api_client_with_credentials.get(url)
+    assert "Last-Modified" not in response.headers
+
+    response = api_client_with_credentials.get(url, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_get_post_list_filter_by_text(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory(text="Text that I am looking for")
+    PostFactory(text="Something unimportant")
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"text": "I am looking"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 1
+    assert response.json()["results"] == [
+        {
+            "text": post.text,
+            "creator": {"id": post.creator.id, "username": post.creator.username},
+            "edited": False,
+            "comment_count": 0,
+        },
+    ]
+
+
+@pytest.mark.django_db
+def test_get_post_list_filter_by_board(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    PostFactory()
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"board": post.board.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 1
+    assert response.json()["results"] == [
+        {
+            "text": post.text,
+            "creator": {"id": post.creator.id, "username": post.creator.username},
+            "edited": False,
+            "comment_count": 0,
+        },
+    ]
+
+
+@pytest.mark.django_db
+def test_get_post_list_filter_own_posts(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory(creator=api_client_with_credentials.user)
+    PostFactory(creator=UserFactory())
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"is_creator": True}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 1
+    assert response.json()["results"] == [
+        {
+            "text": post.text,
+            "creator": {"id": post.creator.id, "username": post.creator.username},
+            "edited": False,
+            "comment_count": 0,
+        },
+    ]
+
+
+@pytest.mark.django_db
+def test_get_post_list_filter_not_own_posts(api_client_with_credentials: APIClientWithUser) -> None:
+    PostFactory(creator=api_client_with_credentials.user)
+    post = PostFactory(creator=UserFactory())
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"is_creator": False}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 1
+    assert response.json()["results"] == [
+        {
+            "text": post.text,
+            "creator": {"id": post.creator.id, "username": post.creator.username},
+            "edited": False,
+            "comment_count": 0,
+        },
+    ]
+
+
+@pytest.mark.django_db
+def test_get_post_list_cursor_pagination(api_client_with_credentials: APIClientWithUser) -> None:
+    posts = PostFactory.create_batch(5)
+
+    response = api_client_with_credentials.get(posts_url(query_kwargs={"pagination": "cursor", "limit": 2}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["limit"] == 2
+    assert response.json()["previous"] is None
+    assert [post["text"] for post in response.json()["results"]] == [posts[4].text, posts[3].text]
+
+    response = api_client_with_credentials.get(response.json()["next"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["text"] for post in response.json()["results"]] == [posts[2].text, posts[1].text]
+
+    response = api_client_with_credentials.get(response.json()["next"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next"] is None
+    assert [post["text"] for post in response.json()["results"]] == [posts[0].text]
+
+    response = api_client_with_credentials.get(response.json()["previous"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["text"] for post in response.json()["results"]] == [posts[2].text, posts[1].text]
+
+
+@pytest.mark.django_db
+def test_get_post_list_cursor_pagination_keeps_filters(api_client_with_credentials: APIClientWithUser) -> None:
+    board = BoardFactory()
+    posts = PostFactory.create_batch(3, board=board)
+    PostFactory.create_batch(3)
+
+    response = api_client_with_credentials.get(
+        posts_url(query_kwargs={"pagination": "cursor", "limit": 2, "board": board.id})
+    )
+    response = api_client_with_credentials.get(response.json()["next"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next"] is None
+    assert [post["text"] for post in response.json()["results"]] == [posts[0].text]
+
+
+@pytest.mark.django_db
+def test_get_post_detail_success(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "text": post.text,
+        "creator": {"id": post.creator.id, "username": post.creator.username},
+        "edited": False,
+        "comment_count": 0,
+        "version": 1,
+        "view_count": 1,
+    }
+    post.refresh_from_db()
+    assert response.headers["ETag"] == version_etag(1, post.updated_at)
+
+
+@pytest.mark.django_db
+def test_get_post_detail_counts_views(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    api_client_with_credentials.get(posts_detail_url(post_id=post.pk))
+    api_client_with_credentials.get(posts_detail_url(post_id=post.pk))
+    flush_post_views()
+    post.refresh_from_db()
+    assert post.view_count == 2
+
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["view_count"] == 3
+    post.refresh_from_db()
+    assert post.view_count == 2
+
+
+@pytest.mark.django_db
+def test_get_post_detail_not_modified(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    etag = api_client_with_credentials.get(posts_detail_url(post_id=post.pk)).headers["ETag"]
+
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk), HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    # Views answered with 304 are counted as well, but they do not change the ETag
+    assert flush_post_views() == 1
+    post.refresh_from_db()
+    assert post.view_count == 2
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_get_post_detail_modified_by_comments(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    post = PostFactory(creator=user, board=BoardFactory(members=[user]))
+    etag = api_client_with_credentials.get(posts_detail_url(post_id=post.pk)).headers["ETag"]
+
+    create_comment(text="A new comment", creator=user, post=post)
+
+    response = api_client_with_credentials.get(posts_detail_url(post_id=post.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["comment_count"] == 1
+    # The version is unchanged, so that an update based on the previous ETag still applies
+    response = api_client_with_credentials.patch(
+        posts_detail_url(post_id=post.pk), data={"text": "new post content"}, HTTP_IF_MATCH=etag
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_get_post_detail_not_found(api_client_with_credentials: APIClientWithUser) -> None:
+    response = api_client_with_credentials.get(posts_detail_url(post_id=0))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.django_db
@@ -466,6 +1145,63 @@ def test_update_post_success(api_client_with_credentials: APIClientWithUser) ->
     assert response.status_code == status.HTTP_200_OK
     assert post.text == "new post content"
     assert post.edited is True
+    assert post.version == 2
+    assert response.headers["ETag"] == version_etag(2, post.updated_at)
+
+
+@pytest.mark.django_db
+def test_update_post_if_match(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory(text="old post content", creator=api_client_with_credentials.user)
+    etag = api_client_with_credentials.get(posts_detail_url(post_id=post.pk)).headers["ETag"]
+
+    response = api_client_with_credentials.patch(
+        posts_detail_url(post_id=post.pk), data={"text": "new post content"}, HTTP_IF_MATCH=etag
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    post.refresh_from_db()
+    assert (post.text, post.version) == ("new post content", 2)
+
+
+@pytest.mark.django_db
+def test_update_post_if_match_conflict(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory(text="old post content", creator=api_client_with_credentials.user)
+    etag = api_client_with_credentials.get(posts_detail_url(post_id=post.pk)).headers["ETag"]
+    api_client_with_credentials.patch(posts_detail_url(post_id=post.pk), data={"text": "concurrent content"})
+
+    response = api_client_with_credentials.patch(
+        posts_detail_url(post_id=post.pk), data={"text": "new post content"}, HTTP_IF_MATCH=etag
+    )
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    post.refresh_from_db()
+    assert (post.text, post.version) == ("concurrent content", 2)
+
+
+@pytest.mark.django_db
+def test_update_post_if_match_invalid(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory(text="old post content", creator=api_client_with_credentials.user)
+
+    response = api_client_with_credentials.patch(
+        posts_detail_url(post_id=post.pk), data={"text": "new post content"}, HTTP_IF_MATCH="W/1"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_update_post_concurrent_edit(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    post = PostFactory(text="old post content", creator=user)
+    stale_post = Post.objects.select_related("creator").get(id=post.id)
+    update_post(post=post, data={"text": "first edit content"}, user=user)
+
+    # The stale copy was read before the first edit, which is not overwritten
+    with pytest.raises(Conflict):
+        update_post(post=stale_post, data={"text": "second edit content"}, user=user)
+
+    post.refresh_from_db()
+    assert (post.text, post.version) == ("first edit content", 2)
 
 
 @pytest.mark.django_db
@@ -535,7 +1271,10 @@ def test_delete_post_success(api_client_with_credentials: APIClientWithUser) ->
     response = api_client_with_credentials.delete(posts_detail_url(post_id=post.id))
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
-    assert not Post.objects.filter(id=post.id).exists()
+    # The post is hidden at once, it is purged later by a background task
+    assert Post.objects.get(id=post.id).is_hidden
+    assert api_client_with_credentials.get(posts_detail_url(post_id=post.id)).status_code == status.HTTP_404_NOT_FOUND
+    assert api_client_with_credentials.get(posts_url()).json()["results"] == []
 
 
 @pytest.mark.django_db
@@ -567,6 +1306,9 @@ def test_get_post_detail_updated_post_has_edited_flag_set(api_client_with_creden
         "text": "new post content",
         "creator": {"id": post.creator.id, "username": post.creator.username},
         "edited": True,
+        "comment_count": 0,
+        "version": 2,
+        "view_count": 1,
     }
 
 
@@ -584,11 +1326,13 @@ def test_get_post_list_updated_post_has_edited_flag_set(api_client_with_credenti
             "text": post_2.text,
             "creator": {"id": post_2.creator.id, "username": post_2.creator.username},
             "edited": False,
+            "comment_count": 0,
         },
         {
             "text": "new post content",
             "creator": {"id": post_1.creator.id, "username": post_1.creator.username},
             "edited": True,
+            "comment_count": 0,
         },
     ]
 
@@ -611,6 +1355,23 @@ def test_create_comment_success(api_client_with_credentials: APIClientWithUser)
     assert comment.parent is None
 
 
+@pytest.mark.django_db
+def test_create_comment_with_idempotency_key_is_replayed(
+    api_client_with_credentials: APIClientWithUser, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    post = PostFactory()
+    post.board.members.add(api_client_with_credentials.user)
+    data = {"text": "test test test", "post": post.id}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client_with_credentials.post(comments_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+    replayed = api_client_with_credentials.post(comments_url(), data, HTTP_IDEMPOTENCY_KEY="key")
+
+    assert response.status_code == replayed.status_code == status.HTTP_201_CREATED
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert Comment.objects.count() == 1
+
+
 @pytest.mark.django_db
 def test_create_comment_reply_success(api_client_with_credentials: APIClientWithUser) -> None:
     comment_parent = CommentFactory()
@@ -703,11 +1464,15 @@ def test_get_comment_list(api_client_with_credentials: APIClientWithUser) -> Non
                 "username": comment_1.creator.username,
             },
             "parent_id": None,
+            "reply_count": 0,
+            "is_deleted": False,
         },
         {
             "text": comment_2.text,
             "creator": {"id": comment_2.creator.id, "username": comment_2.creator.username},
             "parent_id": None,
+            "reply_count": 0,
+            "is_deleted": False,
         },
     ]
 
@@ -726,6 +1491,8 @@ def test_get_comment_list_filter_by_text(api_client_with_credentials: APIClientW
             "text": comment.text,
             "creator": {"id": comment.creator.id, "username": comment.creator.username},
             "parent_id": comment.parent,
+            "reply_count": 0,
+            "is_deleted": False,
         }
     ]
 
@@ -744,6 +1511,8 @@ def test_get_comment_list_filter_by_post(api_client_with_credentials: APIClientW
             "text": comment.text,
             "creator": {"id": comment.creator.id, "username": comment.creator.username},
             "parent_id": comment.parent,
+            "reply_count": 0,
+            "is_deleted": False,
         }
     ]
 
@@ -765,10 +1534,77 @@ def test_get_comment_list_filter_by_parent(api_client_with_credentials: APIClien
             "text": comment.text,
             "creator": {"id": comment.creator.id, "username": comment.creator.username},
             "parent_id": comment.parent_id,
+            "reply_count": 0,
+            "is_deleted": False,
         }
     ]
 
 
+@pytest.mark.django_db
+def test_get_comment_list_cursor_pagination(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    comments = CommentFactory.create_batch(3, post=post)
+
+    response = api_client_with_credentials.get(
+        comments_url(query_kwargs={"pagination": "cursor", "limit": 2, "post": post.id})
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [comment["text"] for comment in response.json()["results"]] == [comments[0].text, comments[1].text]
+
+    response = api_client_with_credentials.get(response.json()["next"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next"] is None
+    assert [comment["text"] for comment in response.json()["results"]] == [comments[2].text]
+
+
+@pytest.mark.django_db
+def test_get_comment_list_descendants_of(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    post = PostFactory(board=BoardFactory(members=[user]))
+    comment = create_comment(text="root", creator=user, post=post)
+    reply = create_comment(text="reply", creator=user, post=post, parent=comment)
+    reply_to_reply = create_comment(text="reply to reply", creator=user, post=post, parent=reply)
+    other_reply = create_comment(text="other reply", creator=user, post=post, parent=comment)
+    create_comment(text="other root", creator=user, post=post)
+
+    response = api_client_with_credentials.get(comments_url(query_kwargs={"descendants_of": comment.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [comment["text"] for comment in response.json()["results"]] == [
+        reply.text,
+        reply_to_reply.text,
+        other_reply.text,
+    ]
+
+
+@pytest.mark.django_db
+def test_get_comment_list_thread_order(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    post = PostFactory(board=BoardFactory(members=[user]))
+    comment_1 = create_comment(text="root 1", creator=user, post=post)
+    comment_2 = create_comment(text="root 2", creator=user, post=post)
+    reply_1 = create_comment(text="reply 1", creator=user, post=post, parent=comment_1)
+    reply_2 = create_comment(text="reply 2", creator=user, post=post, parent=comment_2)
+    reply_to_reply_1 = create_comment(text="reply to reply 1", creator=user, post=post, parent=reply_1)
+    expected = [comment_1, reply_1, reply_to_reply_1, comment_2, reply_2]
+
+    response = api_client_with_credentials.get(comments_url(query_kwargs={"post": post.id, "thread_order": True}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [comment["text"] for comment in response.json()["results"]] == [comment.text for comment in expected]
+
+    response = api_client_with_credentials.get(
+        comments_url(query_kwargs={"post": post.id, "thread_order": True, "pagination": "cursor", "limit": 3})
+    )
+    texts = [comment["text"] for comment in response.json()["results"]]
+    response = api_client_with_credentials.get(response.json()["next"])
+    texts += [comment["text"] for comment in response.json()["results"]]
+
+    assert texts == [comment.text for comment in expected]
+
+
 @pytest.mark.django_db
 def test_get_comment_detail_success(api_client_with_credentials: APIClientWithUser) -> None:
     comment = CommentFactory()
@@ -780,11 +1616,356 @@ def test_get_comment_detail_success(api_client_with_credentials: APIClientWithUs
         "text": comment.text,
         "creator": {"id": comment.creator.id, "username": comment.creator.username},
         "parent_id": comment.parent_id,
+        "reply_count": 0,
     }
 
 
+@pytest.mark.django_db
+def test_get_comment_detail_not_modified(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    comment = CommentFactory(post=PostFactory(board=BoardFactory(members=[user])))
+    etag = api_client_with_credentials.get(comments_detail_url(comment_id=comment.pk)).headers["ETag"]
+
+    response = api_client_with_credentials.get(comments_detail_url(comment_id=comment.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    create_comment(text="A reply", creator=user, post=comment.post, parent=comment)
+
+    response = api_client_with_credentials.get(comments_detail_url(comment_id=comment.pk), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["reply_count"] == 1
+
+
 @pytest.mark.django_db
 def test_get_comment_detail_not_found(api_client_with_credentials: APIClientWithUser) -> None:
     response = api_client_with_credentials.get(comments_detail_url(comment_id=0))
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_delete_comment(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    post = create_post(text="The commented post", creator=user, board=BoardFactory(members=[user]))
+    comment = create_comment(text="deleted comment", creator=user, post=post)
+    reply = create_comment(text="reply", creator=user, post=post, parent=comment)
+
+    response = api_client_with_credentials.delete(comments_detail_url(comment_id=comment.id))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert api_client_with_credentials.get(comments_detail_url(comment_id=comment.id)).status_code == 404
+    post.refresh_from_db()
+    assert post.comment_count == 1
+    # The comment stays in the thread, as a tombstone, because it has a reply
+    response = api_client_with_credentials.get(comments_url({"post": post.id, "thread_order": True}))
+    assert [(result["text"], result["parent_id"], result["is_deleted"]) for result in response.json()["results"]] == [
+        ("", None, True),
+        ("reply", comment.id, False),
+    ]
+    response = api_client_with_credentials.get(posts_thread_url(post_id=post.id))
+    assert [node["is_deleted"] for node in response.json()["results"]] == [True]
+    assert [node["id"] for node in response.json()["results"][0]["replies"]] == [reply.id]
+
+
+@pytest.mark.django_db
+def test_deleted_comment_without_replies_is_not_listed(api_client_with_credentials: APIClientWithUser) -> None:
+    comment = CommentFactory(creator=api_client_with_credentials.user)
+
+    response = api_client_with_credentials.delete(comments_detail_url(comment_id=comment.id))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert api_client_with_credentials.get(comments_url({"post": comment.post_id})).json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_reply_to_deleted_comment(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    comment = CommentFactory(creator=user, post=PostFactory(board=BoardFactory(members=[user])))
+    api_client_with_credentials.delete(comments_detail_url(comment_id=comment.id))
+
+    response = api_client_with_credentials.post(
+        comments_url(), data={"text": "reply", "post": comment.post_id, "parent": comment.id}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_delete_comment_by_non_creator(api_client_with_credentials: APIClientWithUser) -> None:
+    comment = CommentFactory(text="kept")
+
+    response = api_client_with_credentials.delete(comments_detail_url(comment_id=comment.id))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    comment.refresh_from_db()
+    assert (comment.text, comment.is_deleted) == ("kept", False)
+
+
+@pytest.mark.django_db
+def test_search_posts_ordered_by_relevance(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    board = BoardFactory(members=[user])
+    post_1 = create_post(text="A few tips about the Django ORM", creator=user, board=board)
+    post_2 = create_post(text="Django, Django and more Django: release notes", creator=user, board=board)
+    create_post(text="Recipes for a quick pasta dinner", creator=user, board=board)
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "django"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == [post_2.id, post_1.id]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert results[0]["creator"] == {"id": user.id, "username": user.username}
+
+
+@pytest.mark.django_db
+def test_search_posts_filter_by_board(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    board = BoardFactory(members=[user])
+    post = create_post(text="Searching in one board only", creator=user, board=board)
+    create_post(text="Searching in another board", creator=user, board=BoardFactory(members=[user]))
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "searching", "board": board.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["id"] for result in response.json()["results"]] == [post.id]
+
+
+@pytest.mark.django_db
+def test_search_posts_after_update(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    post = create_post(text="Original post content", creator=user, board=BoardFactory(members=[user]))
+    update_post(post=post, data={"text": "Rewritten post content"}, user=user)
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "original"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == []
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "rewritten"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["id"] for result in response.json()["results"]] == [post.id]
+
+
+@pytest.mark.django_db
+def test_search_comments(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    post = PostFactory(board=BoardFactory(members=[user]))
+    comment = create_comment(text="I like searching comments", creator=user, post=post)
+    create_comment(text="Nothing to see here", creator=user, post=post)
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "search", "type": "comment"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["id"] for result in response.json()["results"]] == [comment.id]
+    assert response.json()["results"][0]["post_id"] == post.id
+
+
+@pytest.mark.django_db
+def test_search_cursor_pagination(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    board = BoardFactory(members=[user])
+    posts = [create_post(text="The very same post text", creator=user, board=board) for _ in range(3)]
+
+    response = api_client_with_credentials.get(search_url(query_kwargs={"query": "same text", "limit": 2}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["id"] for result in response.json()["results"]] == [posts[2].id, posts[1].id]
+
+    response = api_client_with_credentials.get(response.json()["next"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next"] is None
+    assert [result["id"] for result in response.json()["results"]] == [posts[0].id]
+
+
+@pytest.mark.django_db
+def test_search_query_required(api_client_with_credentials: APIClientWithUser) -> None:
+    response = api_client_with_credentials.get(search_url())
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"query": ["This field is required."]}
+
+
+@pytest.mark.django_db
+def test_get_board_list_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    user = api_client_with_credentials.user
+    BoardFactory.create_batch(15, members=[user, UserFactory()], admins=[user])
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(boards_url())
+
+    assert response.status_code == status.HTTP_200_OK
+    # Count and ETag of the list in a single query, and page
+    assert len(select_queries(context)) == 2
+
+
+@pytest.mark.django_db
+def test_get_post_list_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    PostFactory.create_batch(15)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(posts_url())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 10
+    # Count and ETag of the list in a single query, and page
+    assert len(select_queries(context)) == 2
+
+
+@pytest.mark.django_db
+def test_get_comment_list_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    CommentFactory.create_batch(15)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(comments_url())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 10
+    # Count and ETag of the list in a single query, and page
+    assert len(select_queries(context)) == 2
+
+
+@pytest.mark.django_db
+def test_get_post_detail_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(posts_detail_url(post_id=post.id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(select_queries(context)) == 1
+    # Views are counted in a buffer, the post is not written to
+    assert len(context.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_get_post_detail_is_cached(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    api_client_with_credentials.get(posts_detail_url(post_id=post.id))
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(posts_detail_url(post_id=post.id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["text"] == post.text
+    assert len(context.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_get_comment_detail_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    comment = CommentFactory()
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(comments_detail_url(comment_id=comment.id))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(select_queries(context)) == 1
+
+
+@pytest.mark.django_db
+def test_search_posts_number_of_queries(api_client_with_credentials: APIClientWithUser) -> None:
+    user = UserFactory()
+    board = BoardFactory(members=[user])
+    for _ in range(15):
+        create_post(text="The very same post text", creator=user, board=board)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(search_url(query_kwargs={"query": "post"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["results"]) == 10
+    assert len(select_queries(context)) == 1
+
+
+def _thread_node(comment: Comment, replies: List[Dict[str, Any]], more_replies: Optional[str]) -> Dict[str, Any]:
+    return {
+        "id": comment.id,
+        "text": comment.text,
+        "creator": {"id": comment.creator.id, "username": comment.creator.username},
+        "parent_id": comment.parent_id,
+        "reply_count": comment.reply_count,
+        "is_deleted": comment.is_deleted,
+        "replies": replies,
+        "more_replies": more_replies,
+    }
+
+
+@pytest.mark.django_db
+def test_get_post_thread(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    comment_1, comment_2, comment_3 = CommentFactory.create_batch(3, post=post)
+    reply_1, reply_2, _ = CommentFactory.create_batch(3, post=post, parent=comment_1)
+    CommentFactory(post=post, parent=reply_1)
+    query_kwargs = {"depth": 2, "breadth": 2}
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client_with_credentials.get(posts_thread_url(post_id=post.id, query_kwargs=query_kwargs))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(select_queries(context)) == 2
+
+    def more_url(**kwargs: int) -> str:
+        return "http://testserver" + posts_thread_url(post_id=post.id, query_kwargs={**query_kwargs, **kwargs})
+
+    assert response.json() == {
+        "more": more_url(after=comment_2.id),
+        "results": [
+            _thread_node(
+                comment_1,
+                replies=[
+                    _thread_node(reply_1, replies=[], more_replies=more_url(parent=reply_1.id)),
+                    _thread_node(reply_2, replies=[], more_replies=None),
+                ],
+                more_replies=more_url(parent=comment_1.id, after=reply_2.id),
+            ),
+            _thread_node(comment_2, replies=[], more_replies=None),
+        ],
+    }
+
+    response = api_client_with_credentials.get(response.json()["more"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"more": None, "results": [_thread_node(comment_3, replies=[], more_replies=None)]}
+
+
+@pytest.mark.django_db
+def test_get_post_thread_subtree(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    comment = CommentFactory(post=post)
+    CommentFactory(post=post)
+    reply = CommentFactory(post=post, parent=comment)
+    reply_to_reply = CommentFactory(post=post, parent=reply)
+
+    response = api_client_with_credentials.get(posts_thread_url(post_id=post.id, query_kwargs={"parent": comment.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "more": None,
+        "results": [
+            _thread_node(
+                reply,
+                replies=[_thread_node(reply_to_reply, replies=[], more_replies=None)],
+                more_replies=None,
+            ),
+        ],
+    }
+
+
+@pytest.mark.django_db
+def test_get_post_thread_parent_from_another_post(api_client_with_credentials: APIClientWithUser) -> None:
+    post = PostFactory()
+    comment = CommentFactory()
+
+    response = api_client_with_credentials.get(posts_thread_url(post_id=post.id, query_kwargs={"parent": comment.id}))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"parent": ["The parent comment does not belong to the post specified."]}
+
+
+@pytest.mark.django_db
+def test_get_post_thread_post_not_found(api_client_with_credentials: APIClientWithUser) -> None:
+    response = api_client_with_credentials.get(posts_thread_url(post_id=0))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,81 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.boards.selectors import board_get, comment_get, post_get
+from factories import BoardFactory, CommentFactory, PostFactory, UserFactory
+
+
+@pytest.mark.django_db
+def test_backfill_comment_paths() -> None:
+    post = PostFactory()
+    comment = CommentFactory(post=post)
+    reply = CommentFactory(post=post, parent=comment)
+    reply_to_reply = CommentFactory(post=post, parent=reply)
+    other_comment = CommentFactory()
+
+    call_command("backfill_comment_paths", batch_size=1)
+
+    for instance in (comment, reply, reply_to_reply, other_comment):
+        instance.refresh_from_db()
+    assert comment.path == str(comment.id).zfill(19)
+    assert reply.path == comment.path + str(reply.id).zfill(19)
+    assert reply_to_reply.path == reply.path + str(reply_to_reply.id).zfill(19)
+    assert other_comment.path == str(other_comment.id).zfill(19)
+
+
+@pytest.mark.django_db
+def test_reconcile_counters() -> None:
+    board = BoardFactory(members=[UserFactory(), UserFactory()])
+    post = PostFactory(board=board)
+    PostFactory(board=board)
+    # Deleted posts are not counted, although they exist until they are purged
+    PostFactory(board=board, is_hidden=True)
+    comment = CommentFactory(post=post)
+    CommentFactory(post=post, parent=comment)
+    # Deleted comments are not counted in their post, although they are still counted as replies
+    CommentFactory(post=post, parent=comment, deleted_at=timezone.now())
+    empty_board = BoardFactory()
+    Board.objects.filter(id=empty_board.id).update(member_count=5, post_count=5)
+
+    call_command("reconcile_counters", batch_size=1)
+
+    board.refresh_from_db()
+    empty_board.refresh_from_db()
+    assert (board.member_count, board.post_count) == (2, 2)
+    assert (empty_board.member_count, empty_board.post_count) == (0, 0)
+    assert Post.objects.get(id=post.id).comment_count == 2
+    assert Comment.objects.get(id=comment.id).reply_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reconcile_counters_invalidates_cached_instances() -> None:
+    post = PostFactory()
+    comment = CommentFactory(post=post)
+    Board.objects.filter(id=post.board_id).update(post_count=5)
+    Post.objects.filter(id=post.id).update(comment_count=5)
+    Comment.objects.filter(id=comment.id).update(reply_count=5)
+    board_get(board_id=post.board_id)
+    post_get(post_id=post.id)
+    comment_get(comment_id=comment.id)
+
+    call_command("reconcile_counters")
+
+    assert board_get(board_id=post.board_id).post_count == 1  # type: ignore
+    assert post_get(post_id=post.id).comment_count == 1  # type: ignore
+    assert comment_get(comment_id=comment.id).reply_count == 0  # type: ignore
+
+
+@pytest.mark.django_db
+def test_benchmark_text_search() -> None:
+    out = StringIO()
+
+    call_command("benchmark_text_search", rows=20, repeat=1, stdout=out)
+
+    assert "comment_list(text=...)" in out.getvalue()
+    # The generated dataset is rolled back
+    assert not Post.objects.exists()
+    assert not Comment.objects.exists()
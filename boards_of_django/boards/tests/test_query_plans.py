@@ -0,0 +1,183 @@
+"""
+Plan-regression tests for the hot query shapes.
+
+The tables are seeded with enough rows for the planner to prefer an index whenever one can serve the query, then every
+selector is run through EXPLAIN. A sequential scan in the plan means that a query no longer matches its index (or that
+the index was dropped), which would go unnoticed on a small test database.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+
+from boards_of_django.authentication.models import User
+from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.boards.selectors import board_list, comment_list, comment_search, post_list, post_search
+
+USERS = 10_000
+BOARDS = 20_000
+POSTS = 20_000
+COMMENTS = 20_000
+# Posts and comments are concentrated on a few boards and posts, as they are on the busy ones
+BUSY_BOARDS = 20
+BUSY_POSTS = 200
+# Every user is a member of a couple of boards
+BOARDS_PER_MEMBER = 2
+
+_NUMBERED_USERS = "(SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM authentication_user)"
+_NUMBERED_BOARDS = "(SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM boards_board)"
+_NUMBERED_POSTS = "(SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM boards_post)"
+
+
+def _seed() -> None:
+    # Every table is analyzed once seeded: the statistics left by the previous tests would make the planner pick
+    # nested loops for the joins below (and for the queries under test)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO authentication_user
+                (password, is_superuser, created_at, updated_at, email, username, is_active, is_admin)
+            SELECT '', false, now(), now(), 'user' || g || '@example.com', 'user' || g, true, false
+            FROM generate_series(1, %s) g
+            """,
+            [USERS],
+        )
+        cursor.execute("ANALYZE authentication_user")
+        cursor.execute(
+            """
+            INSERT INTO boards_board (created_at, updated_at, member_count, post_count, is_hidden, name)
+            SELECT now(), now(), 0, 0, false, 'board ' || left(md5(g::text), 12) FROM generate_series(1, %s) g
+            """,
+            [BOARDS],
+        )
+        cursor.execute("ANALYZE boards_board")
+        # Every user is an admin of the first of their boards
+        cursor.execute(
+            f"""
+            INSERT INTO boards_membership (board_id, user_id, role, joined_at)
+            SELECT b.id, u.id, CASE WHEN k = 0 THEN 'admin' ELSE 'member' END, now()
+            FROM {_NUMBERED_USERS} u
+            CROSS JOIN generate_series(0, %s - 1) k
+            JOIN {_NUMBERED_BOARDS} b ON b.n = (u.n * %s + k) %% %s
+            """,
+            [BOARDS_PER_MEMBER, BOARDS_PER_MEMBER, BOARDS],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO boards_post
+                (
+                    text, creator_id, board_id, edited, created_at, updated_at, search_vector, comment_count,
+                    is_hidden, version, view_count
+                )
+            SELECT t.text, u.id, b.id, false, now(), now(), to_tsvector('english', t.text), 0, false, 1, 0
+            FROM generate_series(1, %s) g
+            CROSS JOIN LATERAL (SELECT 'post ' || md5(g::text) AS text) t
+            JOIN {_NUMBERED_USERS} u ON u.n = g %% %s
+            JOIN {_NUMBERED_BOARDS} b ON b.n = g %% %s
+            """,
+            [POSTS, USERS, BUSY_BOARDS],
+        )
+        cursor.execute("ANALYZE boards_post")
+        # Half of the comments are root comments, the other half are replies to them
+        cursor.execute(
+            f"""
+            INSERT INTO boards_comment
+                (text, creator_id, post_id, path, created_at, updated_at, search_vector, reply_count)
+            SELECT t.text, u.id, p.id, '', now(), now(), to_tsvector('english', t.text), 0
+            FROM generate_series(1, %s) g
+            CROSS JOIN LATERAL (SELECT 'comment ' || md5(g::text) AS text) t
+            JOIN {_NUMBERED_USERS} u ON u.n = g %% %s
+            JOIN {_NUMBERED_POSTS} p ON p.n = g %% %s
+            """,
+            [COMMENTS // 2, USERS, BUSY_POSTS],
+        )
+        cursor.execute("UPDATE boards_comment SET path = lpad(id::text, 19, '0')")
+        cursor.execute(
+            """
+            INSERT INTO boards_comment
+                (text, creator_id, post_id, parent_id, path, created_at, updated_at, reply_count)
+            SELECT 'reply ' || md5(c.id::text), c.creator_id, c.post_id, c.id, c.path, now(), now(), 0
+            FROM boards_comment c
+            """
+        )
+        cursor.execute("UPDATE boards_comment SET path = path || lpad(id::text, 19, '0') WHERE parent_id IS NOT NULL")
+        # Rows inserted into a GIN index wait in its pending list until the next vacuum, which the planner accounts
+        # for by making the index look much more expensive than it is once vacuumed
+        cursor.execute(
+            """
+            SELECT gin_clean_pending_list(i.indexrelid)
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am am ON am.oid = c.relam
+            WHERE am.amname = 'gin'
+            """
+        )
+        for table in ("boards_membership", "boards_comment"):
+            cursor.execute(f"ANALYZE {table}")
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _explain(queryset: QuerySet[Any]) -> List[Dict[str, Any]]:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0][0]["Plan"]
+    return list(_nodes(plan))
+
+
+@pytest.fixture(scope="module")
+def seeded_db(django_db_setup: None, django_db_blocker: Any) -> Iterator[None]:
+    # Seeding takes a few seconds, so it is done once for the whole module and rolled back at the end. The tests only
+    # read, they run inside that transaction.
+    with django_db_blocker.unblock(), transaction.atomic():
+        _seed()
+        yield
+        transaction.set_rollback(True)
+
+
+@pytest.mark.parametrize(
+    "query,index",
+    [
+        ("posts_of_board", "post_board_id_idx"),
+        ("posts_by_text", "post_text_trgm_idx"),
+        ("root_comments_of_post", "comment_post_root_idx"),
+        ("replies_to_comment", "comment_parent_id_idx"),
+        ("descendants_of_comment", "comment_path_idx"),
+        ("comments_of_post_in_thread_order", "comment_post_path_idx"),
+        ("boards_by_name", "board_name_trgm_idx"),
+        ("boards_of_member", "membership_user_role_idx"),
+        ("boards_of_admin", "membership_user_role_idx"),
+        ("post_search", "post_search_vector_idx"),
+        ("comment_search", "comment_search_vector_idx"),
+    ],
+)
+def test_hot_queries_do_not_scan_tables(seeded_db: None, query: str, index: Optional[str]) -> None:
+    user = User.objects.order_by("id")[USERS // 2]
+    board = Board.objects.order_by("id")[BUSY_BOARDS // 2]
+    post = Post.objects.order_by("id")[BUSY_POSTS // 2]
+    comment = Comment.objects.filter(parent__isnull=True).order_by("id")[COMMENTS // 4]
+    # Negated filters (e.g. boards that the user is NOT a member of) return most of the table, a sequential scan is
+    # the right plan for them, so they are not listed here.
+    querysets: Dict[str, QuerySet[Any]] = {
+        "posts_of_board": post_list(user=user, board=board)[:10],
+        "posts_by_text": post_list(user=user, text=post.text[-12:])[:10],
+        "root_comments_of_post": comment_list(post=post)[:10],
+        "replies_to_comment": comment_list(parent=comment)[:10],
+        "descendants_of_comment": comment_list(descendants_of=comment)[:10],
+        "comments_of_post_in_thread_order": comment_list(post=post, thread_order=True)[:10],
+        "boards_by_name": board_list(user=user, name=board.name)[:10],
+        "boards_of_member": board_list(user=user, is_member=True)[:10],
+        "boards_of_admin": board_list(user=user, is_admin=True)[:10],
+        "post_search": post_search(query=post.text.split()[-1])[:10],
+        "comment_search": comment_search(query=comment.text.split()[-1])[:10],
+    }
+
+    nodes = _explain(querysets[query])
+
+    assert [node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"] == []
+    if index is not None:
+        assert index in {node.get("Index Name") for node in nodes}
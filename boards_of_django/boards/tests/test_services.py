@@ -0,0 +1,285 @@
+from typing import Any, Callable
+
+import pytest
+from django.db import DatabaseError
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from boards_of_django.boards.models import Board, Comment, Membership, Post
+from boards_of_django.boards.selectors import board_get, comment_get, post_get, post_view_count
+from boards_of_django.boards.services import (
+    add_member_to_board,
+    compact_comments,
+    create_comment,
+    delete_board,
+    delete_comment,
+    delete_post,
+    flush_post_views,
+    purge_board,
+    purge_post,
+    record_post_view,
+)
+from boards_of_django.tasks.celery import task_purge_board, task_purge_post
+from factories import BoardFactory, CommentFactory, PostFactory, UserFactory
+
+
+def _thread(post: Post) -> None:
+    comment = CommentFactory(post=post)
+    reply = CommentFactory(post=post, parent=comment)
+    CommentFactory(post=post, parent=reply)
+    CommentFactory(post=post, parent=comment)
+    CommentFactory(post=post)
+
+
+@pytest.mark.django_db
+def test_delete_post_schedules_purge(
+    mocker: MockerFixture, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    delay = mocker.patch("boards_of_django.boards.services.task_purge_post.delay")
+    post = PostFactory()
+    _thread(post)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        delete_post(post=post, user=post.creator)
+
+    delay.assert_called_once_with(post.id)
+    post.refresh_from_db()
+    assert post.is_hidden
+    # Nothing is deleted by the request itself
+    assert Comment.objects.filter(post=post).count() == 5
+
+
+@pytest.mark.django_db
+def test_delete_post_twice(mocker: MockerFixture, django_capture_on_commit_callbacks: Callable[..., Any]) -> None:
+    delay = mocker.patch("boards_of_django.boards.services.task_purge_post.delay")
+    post = PostFactory()
+    Board.objects.filter(id=post.board_id).update(post_count=1)
+    # E.g. two concurrent requests that both loaded the post before it was hidden
+    stale_post = Post.objects.get(id=post.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        delete_post(post=post, user=post.creator)
+        delete_post(post=stale_post, user=post.creator)
+
+    delay.assert_called_once_with(post.id)
+    assert Board.objects.get(id=post.board_id).post_count == 0
+
+
+@pytest.mark.django_db
+def test_delete_post_hides_cached_comments(mocker: MockerFixture) -> None:
+    mocker.patch("boards_of_django.boards.services.task_purge_post.delay")
+    comment = CommentFactory()
+    assert comment_get(comment_id=comment.id) == comment
+
+    delete_post(post=comment.post, user=comment.post.creator)
+
+    assert comment_get(comment_id=comment.id) is None
+
+
+@pytest.mark.django_db
+def test_purge_post_in_batches() -> None:
+    post = PostFactory(is_hidden=True)
+    _thread(post)
+    other_post = PostFactory()
+    CommentFactory(post=other_post)
+
+    # The purge can stop after any batch, e.g. in the middle of a thread, and be resumed
+    runs = 1
+    while not purge_post(post_id=post.id, batch_size=2, max_batches=1):
+        runs += 1
+
+    assert runs > 3
+    assert not Post.objects.filter(id=post.id).exists()
+    assert not Comment.objects.filter(post_id=post.id).exists()
+    assert Comment.objects.filter(post=other_post).count() == 1
+
+
+@pytest.mark.django_db
+def test_purge_post_that_is_not_hidden() -> None:
+    post = PostFactory()
+
+    assert purge_post(post_id=post.id)
+    assert Post.objects.filter(id=post.id).exists()
+
+
+@pytest.mark.django_db
+def test_task_purge_post(mocker: MockerFixture) -> None:
+    delay = mocker.patch("boards_of_django.tasks.celery.task_purge_post.delay")
+    post = PostFactory(is_hidden=True)
+    _thread(post)
+
+    assert task_purge_post(post.id) == "Done"
+    delay.assert_not_called()
+    assert not Post.objects.filter(id=post.id).exists()
+
+
+def test_task_purge_post_queues_itself_until_done(mocker: MockerFixture) -> None:
+    mocker.patch("boards_of_django.boards.services.purge_post", return_value=False)
+    delay = mocker.patch("boards_of_django.tasks.celery.task_purge_post.delay")
+
+    assert task_purge_post(1) == "Continued"
+    delay.assert_called_once_with(1)
+
+
+@pytest.mark.django_db
+def test_delete_board_schedules_purge(
+    mocker: MockerFixture, django_capture_on_commit_callbacks: Callable[..., Any]
+) -> None:
+    delay = mocker.patch("boards_of_django.boards.services.task_purge_board.delay")
+    user = UserFactory()
+    board = BoardFactory(members=[user], admins=[user])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        delete_board(board=board, user=user)
+
+    delay.assert_called_once_with(board.id)
+    board.refresh_from_db()
+    assert board.is_hidden
+
+
+@pytest.mark.django_db
+def test_delete_board_twice(mocker: MockerFixture, django_capture_on_commit_callbacks: Callable[..., Any]) -> None:
+    delay = mocker.patch("boards_of_django.boards.services.task_purge_board.delay")
+    user = UserFactory()
+    board = BoardFactory(members=[user], admins=[user])
+    stale_board = Board.objects.get(id=board.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        delete_board(board=board, user=user)
+        delete_board(board=stale_board, user=user)
+
+    delay.assert_called_once_with(board.id)
+
+
+@pytest.mark.django_db
+def test_delete_board_hides_cached_posts_and_comments(mocker: MockerFixture) -> None:
+    mocker.patch("boards_of_django.boards.services.task_purge_board.delay")
+    user = UserFactory()
+    board = BoardFactory(members=[user], admins=[user])
+    comment = CommentFactory(post=PostFactory(board=board))
+    assert post_get(post_id=comment.post_id) == comment.post
+    assert comment_get(comment_id=comment.id) == comment
+
+    delete_board(board=board, user=user)
+
+    assert post_get(post_id=comment.post_id) is None
+    assert comment_get(comment_id=comment.id) is None
+
+
+@pytest.mark.django_db
+def test_purge_board_in_batches() -> None:
+    board = BoardFactory(members=UserFactory.create_batch(3))
+    Board.objects.filter(id=board.id).update(is_hidden=True)
+    posts = PostFactory.create_batch(3, board=board)
+    for post in posts:
+        _thread(post)
+    other_post = PostFactory()
+    CommentFactory(post=other_post)
+
+    runs = 1
+    while not purge_board(board_id=board.id, batch_size=2, max_batches=2):
+        runs += 1
+
+    assert runs > 3
+    assert not Board.objects.filter(id=board.id).exists()
+    assert not Membership.objects.filter(board_id=board.id).exists()
+    assert not Post.objects.filter(board_id=board.id).exists()
+    assert list(Comment.objects.all()) == list(other_post.comments.all())
+
+
+@pytest.mark.django_db
+def test_task_purge_board(mocker: MockerFixture) -> None:
+    delay = mocker.patch("boards_of_django.tasks.celery.task_purge_board.delay")
+    board = BoardFactory()
+    Board.objects.filter(id=board.id).update(is_hidden=True)
+    _thread(PostFactory(board=board))
+
+    assert task_purge_board(board.id) == "Done"
+    delay.assert_not_called()
+    assert not Board.objects.filter(id=board.id).exists()
+
+
+@pytest.mark.django_db
+def test_compact_comments() -> None:
+    user = UserFactory()
+    post = PostFactory(board=BoardFactory(members=[user]))
+    # A deleted subtree, which is compacted from its leaves up
+    deleted_thread = create_comment(text="deleted", creator=user, post=post)
+    deleted_reply = create_comment(text="deleted reply", creator=user, post=post, parent=deleted_thread)
+    # A deleted reply to a comment that is kept
+    comment = create_comment(text="kept", creator=user, post=post)
+    deleted_reply_to_kept = create_comment(text="deleted reply", creator=user, post=post, parent=comment)
+    # A deleted comment that still has a reply, which is kept
+    deleted_with_reply = create_comment(text="deleted with reply", creator=user, post=post)
+    reply = create_comment(text="kept reply", creator=user, post=post, parent=deleted_with_reply)
+    for deleted in (deleted_thread, deleted_reply, deleted_reply_to_kept, deleted_with_reply):
+        delete_comment(comment=deleted, user=user)
+
+    assert compact_comments(batch_size=1) == 3
+
+    assert list(Comment.objects.order_by("id")) == [comment, deleted_with_reply, reply]
+    comment.refresh_from_db()
+    assert comment.reply_count == 0
+    assert compact_comments() == 0
+
+
+@pytest.mark.django_db
+def test_compact_comments_runs_bounded_batches() -> None:
+    post = PostFactory()
+    CommentFactory.create_batch(3, post=post, deleted_at=timezone.now())
+
+    assert compact_comments(batch_size=1, max_batches=2) == 2
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_flush_post_views() -> None:
+    posts = PostFactory.create_batch(3)
+    for post, views in zip(posts, [2, 1, 0]):
+        for _ in range(views):
+            record_post_view(post=post)
+
+    assert flush_post_views() == 2
+
+    assert [post.view_count for post in Post.objects.filter(id__in=[p.id for p in posts]).order_by("id")] == [2, 1, 0]
+    assert post_view_count(post=Post.objects.get(id=posts[0].id)) == 2
+    assert flush_post_views() == 0
+
+
+@pytest.mark.django_db
+def test_flush_post_views_keeps_views_when_update_fails(mocker: MockerFixture) -> None:
+    post = PostFactory()
+    record_post_view(post=post)
+    mocker.patch("boards_of_django.boards.services.connection.cursor", side_effect=DatabaseError)
+
+    with pytest.raises(DatabaseError):
+        flush_post_views()
+    mocker.stopall()
+
+    post.refresh_from_db()
+    assert (post.view_count, post_view_count(post=post)) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_services_invalidate_cached_instances() -> None:
+    board = BoardFactory()
+    post = PostFactory(board=board)
+    user = UserFactory()
+    # Cached
+    assert board_get(board_id=board.id).member_count == 0  # type: ignore
+    assert post_get(post_id=post.id).comment_count == 0  # type: ignore
+
+    add_member_to_board(board=board, user=user)
+    comment = create_comment(text="comment", creator=user, post=post)
+    create_comment(text="reply", creator=user, post=post, parent=comment)
+
+    assert board_get(board_id=board.id).member_count == 1  # type: ignore
+    assert post_get(post_id=post.id).comment_count == 2  # type: ignore
+    assert comment_get(comment_id=comment.id).reply_count == 1  # type: ignore
+
+    delete_comment(comment=comment, user=user)
+    delete_post(post=post, user=post.creator)
+
+    assert comment_get(comment_id=comment.id) is None
+    assert post_get(post_id=post.id) is None
+    assert board_get(board_id=board.id).post_count == 0  # type: ignore
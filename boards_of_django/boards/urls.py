@@ -2,22 +2,34 @@ from django.urls import path
 
 from boards_of_django.boards.apis import (
     AddAdminsBoardsApi,
+    AddMembersBoardsApi,
     BoardsApi,
+    BulkJoinBoardsApi,
+    BulkLeaveBoardsApi,
+    BulkPostsApi,
     CommentsApi,
     DetailBoardsApi,
     DetailCommentsApi,
     DetailPostsApi,
     JoinBoardsApi,
     PostsApi,
+    PostThreadApi,
+    SearchApi,
 )
 
 urlpatterns = [
     path("boards/", BoardsApi.as_view(), name="boards"),
+    path("boards/join/", BulkJoinBoardsApi.as_view(), name="boards-join"),
+    path("boards/leave/", BulkLeaveBoardsApi.as_view(), name="boards-leave"),
     path("boards/<int:board_id>/", DetailBoardsApi.as_view(), name="board-detail"),
     path("boards/<int:board_id>/join/", JoinBoardsApi.as_view(), name="board-detail-join"),
     path("boards/<int:board_id>/add-admin/", AddAdminsBoardsApi.as_view(), name="board-detail-add-admin"),
+    path("boards/<int:board_id>/add-members/", AddMembersBoardsApi.as_view(), name="board-detail-add-members"),
     path("posts/", PostsApi.as_view(), name="posts"),
+    path("posts/bulk/", BulkPostsApi.as_view(), name="posts-bulk"),
     path("posts/<int:post_id>/", DetailPostsApi.as_view(), name="post-detail"),
+    path("posts/<int:post_id>/thread/", PostThreadApi.as_view(), name="post-thread"),
     path("comments/", CommentsApi.as_view(), name="comments"),
     path("comments/<int:comment_id>/", DetailCommentsApi.as_view(), name="comment-detail"),
+    path("search/", SearchApi.as_view(), name="search"),
 ]
@@ -0,0 +1,393 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from boards_of_django.common.transactions import use_primary
+
+DjangoModel = TypeVar("DjangoModel", bound=models.Model)
+Page = TypeVar("Page")
+
+# Outcomes of a lookup, counted per cache
+LOCAL_HIT = "local_hit"
+HIT = "hit"
+MISS = "miss"
+OUTCOMES = (LOCAL_HIT, HIT, MISS)
+
+
+class _LocalLRU:
+    # Least recently used entries of the current process, shared by all the object caches. Entries are pickled, so
+    # that callers never share (and mutate) the same instance.
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int]) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple[str, int], token: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (token, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.OBJECT_CACHE_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[Tuple[str, int]]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _Stats:
+    # Lookup outcomes of the current process, added to the totals kept in the shared cache every
+    # OBJECT_CACHE_STATS_INTERVAL_SECONDS, so that counting costs no round trip per lookup
+
+    def __init__(self) -> None:
+        self._counts: Counter[str] = Counter()
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[f"{name}:{outcome}"] += 1
+            if time.monotonic() - self._flushed_at < settings.OBJECT_CACHE_STATS_INTERVAL_SECONDS:
+                return
+            counts, self._counts, self._flushed_at = self._counts, Counter(), time.monotonic()
+        self._add_to_totals(counts)
+
+    def flush(self) -> None:
+        with self._lock:
+            counts, self._counts, self._flushed_at = self._counts, Counter(), time.monotonic()
+        self._add_to_totals(counts)
+
+    def _add_to_totals(self, counts: Counter[str]) -> None:
+        for key, count in counts.items():
+            cache.add(f"objcache:stats:{key}", 0, timeout=None)
+            cache.incr(f"objcache:stats:{key}", count)
+
+
+_local = _LocalLRU()
+_stats = _Stats()
+# Instances invalidated by the transaction in progress on the current thread. They are not cached until it ends: a
+# lookup would see their uncommitted state, which would stay cached if the transaction was rolled back.
+_uncommitted = threading.local()
+# Names of all the object caches, to list their stats
+_names: List[str] = []
+
+
+class ObjectCache(Generic[DjangoModel]):
+    """
+    Read-through cache of model instances, by id.
+
+    Instances are kept in the shared cache (Redis in production), with a small LRU of the current process in front of
+    it. Every cached object has a version token in the shared cache, that invalidate replaces: entries of an older
+    version, in the shared cache or in the LRU of any process, are never read again, so invalidations take effect at
+    once everywhere. A lookup that hits the LRU only fetches the token from the shared cache, along with the tokens of
+    the instances it depends on (see get) in the same round trip.
+
+    The cache is disabled by setting OBJECT_CACHE_ENABLED to False, lookups then always run the loader.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        _names.append(name)
+
+    def _token_key(self, object_id: int) -> str:
+        return _token_key(self.name, object_id)
+
+    def _object_key(self, object_id: int, token: str) -> str:
+        return f"objcache:{self.name}:{object_id}:{token}"
+
+    def get(
+        self,
+        object_id: int,
+        loader: Callable[[], Optional[DjangoModel]],
+        dependencies: Optional[Callable[[DjangoModel], Iterable[Tuple["ObjectCache[Any]", int]]]] = None,
+    ) -> Optional[DjangoModel]:
+        """
+        Get the instance with the given id from the cache, or from the loader when it is not cached.
+
+        Parameters
+        ----------
+        object_id : Id of the instance
+        loader : Loads the instance from the database, returns None if it does not exist. Missing instances are not
+            cached. Loads that are cached read from the primary database, even within use_replica.
+        dependencies : Lists the cached instances (cache and id) that the given instance depends on, e.g. its
+            parents, whose deletion hides it. The instance is cached along with their tokens, and loaded again once
+            any of them is invalidated.
+
+        Returns
+        -------
+        The instance, or None if it does not exist.
+        """
+        if not settings.OBJECT_CACHE_ENABLED:
+            return loader()
+
+        uncommitted = _uncommitted_changes()
+        if (self.name, object_id) in uncommitted:
+            return loader()
+
+        token_key = self._token_key(object_id)
+        cached: DjangoModel
+        dependency_tokens: Dict[str, str]
+        local = _local.get((self.name, object_id))
+        if local is not None:
+            # The tokens of the instance and of its dependencies are checked with a single round trip
+            local_token, value = local
+            cached, dependency_tokens = pickle.loads(value)
+            tokens = cache.get_many([token_key, *dependency_tokens])
+            token: Optional[str] = tokens.get(token_key)
+            if token == local_token and _are_current(dependency_tokens, tokens):
+                _stats.add(self.name, LOCAL_HIT)
+                return cached
+        else:
+            token = cache.get(token_key)
+
+        if token is None:
+            new_token = uuid.uuid4().hex
+            if not cache.add(token_key, new_token, timeout=settings.OBJECT_CACHE_TTL_SECONDS):
+                # Created meanwhile by another lookup
+                new_token = cache.get(token_key, new_token)
+            token = new_token
+        elif local is None or token != local[0]:
+            value = cache.get(self._object_key(object_id, token))
+            if value is not None:
+                cached, dependency_tokens = pickle.loads(value)
+                if not dependency_tokens or _are_current(dependency_tokens, cache.get_many(list(dependency_tokens))):
+                    _stats.add(self.name, HIT)
+                    _local.set((self.name, object_id), token, value)
+                    return cached
+
+        _stats.add(self.name, MISS)
+        # What is cached outlives the request: it is never loaded from a replica, that may lag behind an invalidation
+        with use_primary():
+            instance = loader()
+        if instance is not None:
+            # The tokens of the dependencies are read after the load: if one of them was invalidated meanwhile, that
+            # transaction replaces its token again once committed
+            dependency_keys = [
+                dependency._token_key(dependency_id)
+                for dependency, dependency_id in (dependencies(instance) if dependencies is not None else [])
+            ]
+            # If the instance was invalidated since the token was read, it is stored under a version that is never
+            # read again
+            value = pickle.dumps((instance, _current_tokens(dependency_keys)))
+            cache.set(self._object_key(object_id, token), value, timeout=settings.OBJECT_CACHE_TTL_SECONDS)
+            _local.set((self.name, object_id), token, value)
+        return instance
+
+    def invalidate(self, *object_ids: int) -> None:
+        """
+        Make the next lookups of the given ids load the instances again.
+
+        Within a transaction, the instances are invalidated again once it is committed, so that lookups run by other
+        requests meanwhile, that still see the previous state, do not keep it cached.
+
+        Parameters
+        ----------
+        object_ids : Ids of the instances that were changed
+        """
+        if not settings.OBJECT_CACHE_ENABLED or not object_ids:
+            return
+
+        ids: List[int] = list(object_ids)
+        self._invalidate(ids)
+        if transaction.get_connection().in_atomic_block:
+            _uncommitted_changes().update((self.name, object_id) for object_id in ids)
+            transaction.on_commit(lambda: self._invalidate(ids))
+
+    def _invalidate(self, object_ids: List[int]) -> None:
+        cache.set_many(
+            {self._token_key(object_id): uuid.uuid4().hex for object_id in object_ids},
+            timeout=settings.OBJECT_CACHE_TTL_SECONDS,
+        )
+        _local.delete((self.name, object_id) for object_id in object_ids)
+
+
+class PageCache(Generic[Page]):
+    """
+    Cache of rendered pages, e.g. the first page of a list, by group (e.g. the board of the list) and variant (e.g. the
+    page size). Pages must be picklable.
+
+    A page is fresh for PAGE_CACHE_TTL_SECONDS, or until its group is invalidated. It is then served stale for up to
+    PAGE_CACHE_STALE_SECONDS more, while a single request renders it again: a burst of requests for a page that was
+    just invalidated hits the database once, instead of once per request. Past that window, every lookup renders the
+    page until one of them has cached it again.
+
+    The cache is disabled by setting PAGE_CACHE_ENABLED to False, lookups then always render the page.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def _generation_key(self, group_id: int) -> str:
+        return f"pagecache:{self.name}:{group_id}:generation"
+
+    def _page_key(self, group_id: int, variant: str) -> str:
+        return f"pagecache:{self.name}:{group_id}:{variant}"
+
+    def _lock_key(self, group_id: int, variant: str) -> str:
+        return f"pagecache:{self.name}:{group_id}:{variant}:lock"
+
+    def get(self, group_id: int, variant: str, render: Callable[[], Page]) -> Page:
+        """
+        Get a page from the cache, or render it when it is not cached or stale.
+
+        Parameters
+        ----------
+        group_id : Id of the group of the page, e.g. of the board whose posts are listed
+        variant : Variant of the page within the group, e.g. its size
+        render : Renders the page from the database
+
+        Returns
+        -------
+        The page
+        """
+        if not settings.PAGE_CACHE_ENABLED or (self.name, group_id) in _uncommitted_changes():
+            return render()
+
+        now = time.time()
+        # Token of the current generation of the group, and time of the invalidation that started it
+        generation: Optional[Tuple[str, float]] = cache.get(self._generation_key(group_id))
+        if generation is not None:
+            token, invalidated_at = generation
+        else:
+            token, invalidated_at = uuid.uuid4().hex, 0.0
+            if not cache.add(self._generation_key(group_id), (token, invalidated_at), timeout=None):
+                # Created meanwhile by another lookup
+                token, invalidated_at = cache.get(self._generation_key(group_id), (token, invalidated_at))
+
+        locked = False
+        entry: Optional[Tuple[str, float, Page]] = cache.get(self._page_key(group_id, variant))
+        if entry is not None:
+            entry_token, rendered_at, page = entry
+            stale_at = rendered_at + settings.PAGE_CACHE_TTL_SECONDS
+            if entry_token != token:
+                stale_at = min(stale_at, invalidated_at)
+            if now < stale_at:
+                return page
+            if now < stale_at + settings.PAGE_CACHE_STALE_SECONDS:
+                locked = self._lock(group_id, variant)
+                if not locked:
+                    # Being rendered by another request
+                    return page
+
+        try:
+            page = render()
+            # If the group was invalidated meanwhile, the page is stored under a generation that is already stale
+            cache.set(
+                self._page_key(group_id, variant),
+                (token, now, page),
+                timeout=settings.PAGE_CACHE_TTL_SECONDS + settings.PAGE_CACHE_STALE_SECONDS,
+            )
+        finally:
+            # Only the lock taken by this lookup is released, not the one of a request rendering the stale page
+            if locked:
+                cache.delete(self._lock_key(group_id, variant))
+        return page
+
+    def _lock(self, group_id: int, variant: str) -> bool:
+        return cache.add(self._lock_key(group_id, variant), 1, timeout=settings.PAGE_CACHE_STALE_SECONDS)
+
+    def invalidate(self, *group_ids: int) -> None:
+        """
+        Make the pages of the given groups stale.
+
+        Within a transaction, the groups are invalidated again once it is committed, and their pages are not cached
+        until then, as with ObjectCache.invalidate.
+
+        Parameters
+        ----------
+        group_ids : Ids of the groups whose pages changed
+        """
+        if not settings.PAGE_CACHE_ENABLED or not group_ids:
+            return
+
+        ids: List[int] = list(group_ids)
+        self._invalidate(ids)
+        if transaction.get_connection().in_atomic_block:
+            _uncommitted_changes().update((self.name, group_id) for group_id in ids)
+            transaction.on_commit(lambda: self._invalidate(ids))
+
+    def _invalidate(self, group_ids: List[int]) -> None:
+        now = time.time()
+        cache.set_many(
+            {self._generation_key(group_id): (uuid.uuid4().hex, now) for group_id in group_ids},
+            timeout=None,
+        )
+
+
+def _token_key(name: str, object_id: int) -> str:
+    return f"objcache:{name}:{object_id}:token"
+
+
+def _current_tokens(keys: List[str]) -> Dict[str, str]:
+    # Tokens of the given keys, the missing ones are created
+    tokens: Dict[str, str] = cache.get_many(keys) if keys else {}
+    for key in keys:
+        if key not in tokens:
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, timeout=settings.OBJECT_CACHE_TTL_SECONDS):
+                token = cache.get(key, token)
+            tokens[key] = token
+    return tokens
+
+
+def _are_current(expected: Dict[str, str], tokens: Dict[str, Any]) -> bool:
+    return all(tokens.get(key) == token for key, token in expected.items())
+
+
+def _uncommitted_changes() -> Set[Tuple[str, int]]:
+    changes: Optional[Set[Tuple[str, int]]] = getattr(_uncommitted, "changes", None)
+    if changes is None or not transaction.get_connection().in_atomic_block:
+        # The transaction that made the changes has ended, either committed or rolled back
+        changes = _uncommitted.changes = set()
+    return changes
+
+
+def object_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get the number of lookups of every object cache, per outcome, since the stats were last reset.
+
+    The lookups of the current process are counted at once, the ones of the other processes every
+    OBJECT_CACHE_STATS_INTERVAL_SECONDS.
+
+    Returns
+    -------
+    Lookups per outcome (local_hit, hit, miss), per cache name
+    """
+    _stats.flush()
+    totals = cache.get_many(_stats_keys())
+    return {
+        name: {outcome: totals.get(f"objcache:stats:{name}:{outcome}", 0) for outcome in OUTCOMES} for name in _names
+    }
+
+
+def reset_object_cache_stats() -> None:
+    """Reset the lookup counts of the object caches."""
+    _stats.flush()
+    cache.delete_many(_stats_keys())
+
+
+def clear_local_object_cache() -> None:
+    """Drop the entries of the LRU of the current process, e.g. between tests."""
+    _local.clear()
+
+
+def _stats_keys() -> List[str]:
+    return [f"objcache:stats:{name}:{outcome}" for name in _names for outcome in OUTCOMES]
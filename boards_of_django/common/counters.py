@@ -0,0 +1,132 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List
+
+import redis
+from django.conf import settings
+
+
+class CounterBuffer(ABC):
+    """
+    Buffer of increments to integer counters, keyed by id, that are written to the database later in batches.
+
+    Counting in the buffer is cheap and never locks a database row, so it can be done on hot read paths. A periodic
+    task drains the buffer and adds the counts to the database, see `drain`.
+    """
+
+    @abstractmethod
+    def add(self, key: int, amount: int = 1) -> None:
+        """Add `amount` to the counter of `key`."""
+
+    @abstractmethod
+    def pending(self, keys: Iterable[int]) -> Dict[int, int]:
+        """Get the counts of the given keys that are not written to the database yet, keys without any are left out."""
+
+    @abstractmethod
+    @contextmanager
+    def drain(self) -> Iterator[Dict[int, int]]:
+        """
+        Take all the counts out of the buffer, to be written to the database within the context.
+
+        If the context fails, the counts are put back into the buffer, so that the next drain writes them.
+        """
+
+
+class LocalCounterBuffer(CounterBuffer):
+    """
+    Counter buffer in the memory of the current process.
+
+    Only meant for development and tests: the counts of every process are drained by that process only, and they are
+    lost when it exits.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Counter[int] = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, key: int, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def pending(self, keys: Iterable[int]) -> Dict[int, int]:
+        with self._lock:
+            return {key: self._counts[key] for key in keys if key in self._counts}
+
+    @contextmanager
+    def drain(self) -> Iterator[Dict[int, int]]:
+        with self._lock:
+            counts, self._counts = dict(self._counts), Counter()
+        try:
+            yield counts
+        except BaseException:
+            with self._lock:
+                self._counts.update(counts)
+            raise
+
+
+class RedisCounterBuffer(CounterBuffer):
+    """
+    Counter buffer in a Redis hash, shared by all the processes.
+
+    A drain renames the hash, so that the counts added meanwhile go to a new one, and deletes the renamed hash only
+    once its counts are written. A renamed hash that was left by a failed drain is drained again first. Drains must not
+    run concurrently, e.g. they are run by a single periodic task.
+    """
+
+    def __init__(self, client: redis.Redis, name: str) -> None:
+        self._client = client
+        self._key = name
+        self._draining_key = f"{name}:draining"
+
+    def add(self, key: int, amount: int = 1) -> None:
+        self._client.hincrby(self._key, str(key), amount)
+
+    def pending(self, keys: Iterable[int]) -> Dict[int, int]:
+        fields = [str(key) for key in keys]
+        if not fields:
+            return {}
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.hmget(self._key, fields)
+        pipeline.hmget(self._draining_key, fields)
+        counts: List[List[bytes]] = pipeline.execute()
+        return {
+            int(field): sum(int(count) for count in field_counts if count is not None)
+            for field, *field_counts in zip(fields, *counts)
+            if any(count is not None for count in field_counts)
+        }
+
+    @contextmanager
+    def drain(self) -> Iterator[Dict[int, int]]:
+        try:
+            # Does not overwrite the hash left by a failed drain
+            self._client.renamenx(self._key, self._draining_key)
+        except redis.ResponseError:
+            # Nothing was counted since the last drain
+            pass
+
+        counts: Dict[bytes, bytes] = self._client.hgetall(self._draining_key)
+        yield {int(key): int(count) for key, count in counts.items()}
+        self._client.delete(self._draining_key)
+
+
+@lru_cache(maxsize=None)
+def get_counter_buffer(name: str) -> CounterBuffer:
+    """
+    Get the counter buffer of the given name.
+
+    The buffer is kept in Redis when REDIS_URL is set, in the memory of the process otherwise.
+
+    Parameters
+    ----------
+    name : Name of the buffer, e.g. "post-views"
+
+    Returns
+    -------
+    CounterBuffer
+    """
+    if settings.REDIS_URL:
+        return RedisCounterBuffer(redis.Redis.from_url(settings.REDIS_URL), name)
+    return LocalCounterBuffer()
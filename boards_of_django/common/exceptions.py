@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class Conflict(APIException):
+    """The resource was modified since the version that the request is based on."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The resource was modified by another request, fetch it again before retrying."
+    default_code = "conflict"
+
+
+class RequestInProgress(APIException):
+    """Another request with the same Idempotency-Key is still being processed."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with the same Idempotency-Key is in progress, retry later."
+    default_code = "request_in_progress"
@@ -0,0 +1,130 @@
+import hashlib
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from drf_yasg import openapi
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from boards_of_django.common.exceptions import RequestInProgress
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Set on the responses that are replayed from the store
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Headers of the first response that are replayed along with its status and data
+REPLAYED_HEADERS = ("Location", "ETag")
+
+IDEMPOTENCY_KEY_PARAMETER = openapi.Parameter(
+    IDEMPOTENCY_KEY_HEADER,
+    openapi.IN_HEADER,
+    description=(
+        "Unique key of the request, e.g. a UUID. A retry sent with the same key is answered with the response of the "
+        "first request, instead of being processed again. Keys are unique per user, anonymous requests share a "
+        "single scope and must send a random UUID."
+    ),
+    type=openapi.TYPE_STRING,
+    required=False,
+)
+
+
+class _Replay(Exception):
+    def __init__(self, response: Response) -> None:
+        self.response = response
+
+
+class IdempotencyMixin(APIView):
+    """
+    Answer the retries of a request with the response of the first one.
+
+    The methods listed in `idempotent_methods` honor the Idempotency-Key header. The first successful response to a
+    request with a given key is stored in the cache, per user and key, and replayed to the requests sent with the
+    same key afterwards, without running the method again. A duplicate sent while the first request is in progress
+    is answered with 409 Conflict at once: it does not wait, as it would hold its own transaction and worker
+    meanwhile. The first request holds the key for up to IDEMPOTENCY_LOCK_TTL_SECONDS.
+
+    Error responses are not stored, so a request that failed can be retried with the same key. A key reused for a
+    different request is rejected.
+
+    The keys of anonymous requests are not scoped by any client and must be UUIDs, so that two clients do not
+    pick the same key.
+    """
+
+    idempotent_methods: Tuple[str, ...] = ()
+
+    _idempotency_key: Optional[str] = None
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)
+
+        self._idempotency_key = None
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None or (request.method or "").lower() not in self.idempotent_methods:
+            return
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise serializers.ValidationError(
+                {IDEMPOTENCY_KEY_HEADER: f"Must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters long."}
+            )
+
+        if request.user.is_authenticated:
+            user = str(request.user.pk)
+        else:
+            try:
+                uuid.UUID(key)
+            except ValueError:
+                raise serializers.ValidationError({IDEMPOTENCY_KEY_HEADER: "Must be a UUID for anonymous requests."})
+            user = "anonymous"
+        scope = hashlib.sha256(f"{user}:{type(self).__name__}:{key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(f"{request.method}:{request.path}:".encode() + request.body).hexdigest()
+
+        stored: Optional[Dict[str, Any]] = cache.get(f"idempotency:response:{scope}")
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                raise serializers.ValidationError(
+                    {IDEMPOTENCY_KEY_HEADER: "Was already used for a different request."}
+                )
+            response = Response(data=stored["data"], status=stored["status"], headers=stored["headers"])
+            response[IDEMPOTENT_REPLAYED_HEADER] = "true"
+            raise _Replay(response)
+
+        if not cache.add(f"idempotency:lock:{scope}", fingerprint, timeout=settings.IDEMPOTENCY_LOCK_TTL_SECONDS):
+            raise RequestInProgress()
+        self._idempotency_key = scope
+        self._idempotency_fingerprint = fingerprint
+
+    def handle_exception(self, exc: Exception) -> Response:
+        if isinstance(exc, _Replay):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request: Request, response: Response, *args: Any, **kwargs: Any) -> Response:
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        scope = self._idempotency_key
+        if scope is None:
+            return response
+        self._idempotency_key = None
+
+        if getattr(response, "exception", False) or response.status_code >= 400:
+            cache.delete(f"idempotency:lock:{scope}")
+            return response
+
+        stored = {
+            "fingerprint": self._idempotency_fingerprint,
+            "status": response.status_code,
+            "data": response.data,
+            "headers": {header: response[header] for header in REPLAYED_HEADERS if response.has_header(header)},
+        }
+
+        def store() -> None:
+            cache.set(f"idempotency:response:{scope}", stored, timeout=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            cache.delete(f"idempotency:lock:{scope}")
+
+        # The response is only replayed once its changes are committed. If they are rolled back, the lock expires.
+        transaction.on_commit(store)
+        return response
@@ -1,14 +1,24 @@
+import json
 from collections import OrderedDict
-from typing import Any, List, Type
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
+from django.conf import settings
+from django.db import connections
 from django.db.models import QuerySet
 from rest_framework.pagination import BasePagination
+from rest_framework.pagination import CursorPagination as _CursorPagination
 from rest_framework.pagination import LimitOffsetPagination as _LimitOffsetPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 from rest_framework.views import APIView
 
+from boards_of_django.common.utils import conditional_response, count_with_etag, validator_headers
+
+PAGINATION_MODE_QUERY_PARAM = "pagination"
+CURSOR_MODE = "cursor"
+
 
 def get_paginated_response(
     *,
@@ -16,24 +26,77 @@ def get_paginated_response(
     serializer_class: Type[Serializer[Any]],
     queryset: QuerySet[Any],
     request: Request,
-    view: APIView
+    view: APIView,
+    cursor_pagination_class: Optional[Type[BasePagination]] = None,
+    conditional: bool = False,
 ) -> Response:
     """
     Return a paginated response.
 
     This code is taken from Django-Styleguide: https://github.com/HackSoftware/Django-Styleguide#filters--pagination
+
+    If `cursor_pagination_class` is given, the API supports keyset pagination as well. It is used instead of
+    `pagination_class` when the client asks for it with `?pagination=cursor`. The selectors do not need to change, as
+    the cursor paginator applies its own ordering to the queryset.
+
+    If `conditional` is True, the response carries the ETag of the whole (filtered) collection, and a request whose
+    If-None-Match still matches it gets a 304 Not Modified, without fetching nor serializing the page. The ETag is
+    computed by the query that counts the collection for the limit/offset paginator, see get_collection_etag: it is
+    not sent with keyset pagination nor estimated counts, that do not count the collection.
     """
+    if cursor_pagination_class is not None and request.query_params.get(PAGINATION_MODE_QUERY_PARAM) == CURSOR_MODE:
+        pagination_class = cursor_pagination_class
+
     paginator = pagination_class()
 
+    headers: Dict[str, str] = {}
+    etag = None
+    if conditional and isinstance(paginator, LimitOffsetPagination):
+        etag = paginator.get_collection_etag(queryset, request)
+    if etag is not None:
+        response = conditional_response(request, etag, None)
+        if response is not None:
+            return response
+        headers = validator_headers(etag, None)
+
     page = paginator.paginate_queryset(queryset, request, view=view)
 
     if page is not None:
         serializer = serializer_class(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(serializer.data)
+    else:
+        serializer = serializer_class(queryset, many=True)
+        response = Response(data=serializer.data)
+
+    for header, value in headers.items():
+        response[header] = value
 
-    serializer = serializer_class(queryset, many=True)
+    return response
 
-    return Response(data=serializer.data)
+
+class CountStrategy(str, Enum):
+    """
+    Strategy used by LimitOffsetPagination to compute the total number of results.
+
+    - EXACT runs a full COUNT(*) over the filtered queryset.
+    - CAPPED counts at most `count_cap` rows. If there are more, `count_cap` is returned and flagged as an estimate.
+    - ESTIMATE asks the Postgres planner for the number of rows (EXPLAIN), without scanning the table.
+    """
+
+    EXACT = "exact"
+    CAPPED = "capped"
+    ESTIMATE = "estimate"
+
+
+def _estimate_count(queryset: QuerySet[Any]) -> int:
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    # psycopg2 decodes the json column on its own, other drivers may return the raw string
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class LimitOffsetPagination(_LimitOffsetPagination):
@@ -41,10 +104,124 @@ class LimitOffsetPagination(_LimitOffsetPagination):
     Base class for Pagination classes used in APIs.
 
     This code is taken from Django-Styleguide: https://github.com/HackSoftware/Django-Styleguide#filters--pagination
+
+    The total count is computed according to `count_strategy` (by default, `settings.PAGINATION_COUNT_STRATEGY`), so
+    APIs over large or expensively filtered querysets do not have to pay for a second full scan. When the page
+    fetched is the last one, the count is known anyway and no count query is run at all.
     """
 
     default_limit = 10
     max_limit = 50
+    count_strategy: Optional[CountStrategy] = None
+    count_cap: Optional[int] = None
+
+    # Count of the collection (capped with CAPPED), when it was already computed by get_collection_etag
+    _collection_count: Optional[int] = None
+
+    def get_collection_etag(self, queryset: QuerySet[Any], request: Request) -> Optional[str]:
+        """
+        Compute the entity tag of the queryset, see count_with_etag, with the query that counts it.
+
+        The count is then reused to paginate the queryset. With CAPPED, the tag only covers the first `count_cap`
+        rows (plus one), so it is only returned for the pages among them. With ESTIMATE, nothing is counted, it
+        would need the full scan that the strategy avoids.
+
+        Returns
+        -------
+        The entity tag, or None if the collection has none
+        """
+        strategy = self.get_count_strategy()
+
+        if strategy == CountStrategy.EXACT:
+            self._collection_count, etag = count_with_etag(queryset.order_by())
+            return etag
+
+        if strategy == CountStrategy.CAPPED:
+            count_cap = self._get_count_cap()
+            limit = self.get_limit(request)
+            if limit is None or self.get_offset(request) + limit > count_cap:
+                return None
+            # The rows of the window keep the ordering of the list, so the tag covers the pages being served
+            self._collection_count, etag = count_with_etag(queryset[: count_cap + 1])
+            return etag
+
+        return None
+
+    def paginate_queryset(
+        self, queryset: QuerySet[Any], request: Request, view: Optional[APIView] = None
+    ) -> Optional[List[Any]]:
+        """
+        Paginate the queryset.
+
+        We redefine this method in order to fetch one more row than requested. It tells whether there is a next page
+        without relying on the total count, which may be an estimate.
+        """
+        self.limit = limit = self.get_limit(request)
+        if limit is None:
+            return None
+
+        self.offset = offset = self.get_offset(request)
+        self.request = request
+
+        end = offset + limit + 1
+        page = list(queryset[offset:end])
+        self.has_next = len(page) > limit
+        page = page[:limit]
+
+        if not self.has_next and (page or offset == 0):
+            self.count, self.count_is_estimate = offset + len(page), False
+        else:
+            self.count, self.count_is_estimate = self.get_count_with_strategy(queryset)
+            # The planner may underestimate, but there are at least as many rows as we have seen
+            self.count = max(self.count, offset + len(page) + int(self.has_next))
+
+        if self.count > limit and self.template is not None:
+            self.display_page_controls = True
+
+        return page
+
+    def get_count_strategy(self) -> CountStrategy:
+        """Return the count strategy of this pagination class, falling back to the project-wide default."""
+        if self.count_strategy is not None:
+            return self.count_strategy
+        return CountStrategy(settings.PAGINATION_COUNT_STRATEGY)
+
+    def get_count_with_strategy(self, queryset: QuerySet[Any]) -> Tuple[int, bool]:
+        """
+        Count the results according to the count strategy.
+
+        Returns
+        -------
+        Tuple with the following elements:
+            1. The number of results
+            2. A boolean value representing whether the number is an estimate or an exact count
+        """
+        strategy = self.get_count_strategy()
+
+        if strategy == CountStrategy.ESTIMATE:
+            return _estimate_count(queryset), True
+
+        if strategy == CountStrategy.CAPPED:
+            count_cap = self._get_count_cap()
+            count = self._collection_count
+            if count is None:
+                count = queryset.order_by()[: count_cap + 1].count()
+            if count > count_cap:
+                return count_cap, True
+            return count, False
+
+        if self._collection_count is not None:
+            return self._collection_count, False
+        return self.get_count(queryset), False
+
+    def _get_count_cap(self) -> int:
+        return self.count_cap if self.count_cap is not None else int(settings.PAGINATION_COUNT_CAP)
+
+    def get_next_link(self) -> Optional[str]:
+        """Return the link to the next page, if there is one."""
+        if not self.has_next:
+            return None
+        return super().get_next_link()
 
     def get_paginated_response(self, data: List[Any]) -> Response:
         """
@@ -52,6 +229,7 @@ class LimitOffsetPagination(_LimitOffsetPagination):
 
         We redefine this method in order to return `limit` and `offset`.
         This is used by the frontend to construct the pagination itself.
+        The count strategy used and whether the count is only an estimate are returned as well.
         """
         return Response(
             OrderedDict(
@@ -59,6 +237,48 @@ class LimitOffsetPagination(_LimitOffsetPagination):
                     ("limit", self.limit),
                     ("offset", self.offset),
                     ("count", self.count),
+                    ("count_strategy", self.get_count_strategy().value),
+                    ("count_is_estimate", self.count_is_estimate),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class CursorPagination(_CursorPagination):
+    """
+    Base class for keyset (cursor) Pagination classes used in APIs.
+
+    Instead of skipping `offset` rows, every page seeks directly to the rows that come after (or before) the position
+    encoded in an opaque cursor, so deep pages cost the same as the first one. Subclasses must define `ordering`, which
+    has to be unique, for example "-id" or "id". If `ordering` is None, the ordering of the queryset is used
+    instead, so that selectors that order their results differently depending on the filters can be paginated too.
+    """
+
+    ordering: Optional[Union[str, List[str], Tuple[str, ...]]] = None  # type: ignore
+    page_size = 10
+    max_page_size = 50
+    page_size_query_param = "limit"
+
+    def get_ordering(self, request: Request, queryset: QuerySet[Any], view: Optional[APIView]) -> Tuple[str, ...]:
+        """Return the ordering of the pagination class, or of the queryset if the former is not set."""
+        if self.ordering is None:
+            return tuple(str(field) for field in queryset.query.order_by)
+        return super().get_ordering(request, queryset, view)  # type: ignore
+
+    def get_paginated_response(self, data: List[Any]) -> Response:
+        """
+        Return paginated response.
+
+        The response mirrors the one of LimitOffsetPagination, except that `offset` and `count` are not returned, as
+        computing them would defeat the purpose of keyset pagination.
+        """
+        return Response(
+            OrderedDict(
+                [
+                    ("limit", self.page_size),
                     ("next", self.get_next_link()),
                     ("previous", self.get_previous_link()),
                     ("results", data),
@@ -1,12 +1,20 @@
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from django.db.models import DateTimeField
+from django.db.models import DateTimeField, F
+from django.utils import timezone
 
+from boards_of_django.common.exceptions import Conflict
 from boards_of_django.common.types import DjangoModelType
 
 
 def model_update(
-    *, instance: DjangoModelType, fields: List[str], data: Dict[str, Any]
+    *,
+    instance: DjangoModelType,
+    fields: List[str],
+    data: Dict[str, Any],
+    extra_data: Optional[Dict[str, Any]] = None,
+    version_field: Optional[str] = None,
+    expected_version: Optional[int] = None,
 ) -> Tuple[DjangoModelType, bool]:
     """
     Update model.
@@ -19,6 +27,13 @@ def model_update(
     instance : Instance to be updated
     fields : Fields to be updated. Note that fields with auto_add=True are automatically updated
     data : Dictionary with fields to be updated and their new values
+    extra_data : Dictionary with other fields and their new values, written along with the updated fields only if any
+        of them was actually changed (e.g. values computed from the updated fields)
+    version_field : Integer field incremented by every update. When given, the update is optimistic: it is a single
+        conditional UPDATE that only applies if the version in database is still the expected one, without locking
+        the row beforehand. Otherwise, Conflict is raised.
+    expected_version : Version that the update is based on, e.g. the one that the client read. Defaults to the version
+        of the given instance.
 
     Returns
     -------
@@ -27,6 +42,14 @@ def model_update(
         2. A boolean value representing whether we performed an update or not.
     """
     has_updated = False
+    fields = list(fields)
+
+    if (
+        version_field is not None
+        and expected_version is not None
+        and expected_version != getattr(instance, version_field)
+    ):
+        raise Conflict()
 
     for field in fields:
         # Skip if a field is not present in the actual data
@@ -40,6 +63,9 @@ def model_update(
     # Perform an update only if any of the fields was actually changed
     if has_updated:
         instance.full_clean()
+        for field, value in (extra_data or {}).items():
+            setattr(instance, field, value)
+            fields.append(field)
         # Update only the fields that are meant to be updated.
         # Django docs reference:
         # https://docs.djangoproject.com/en/dev/ref/models/instances/#specifying-which-fields-to-save
@@ -51,6 +77,29 @@ def model_update(
             # Open issue: https://github.com/typeddjango/django-stubs/issues/479
             if type(model_field) is DateTimeField and model_field.auto_now is True:
                 fields.append(model_field.name)
-        instance.save(update_fields=fields)
+
+        if version_field is None:
+            instance.save(update_fields=fields)
+        else:
+            _versioned_update(instance=instance, fields=fields, version_field=version_field)
 
     return instance, has_updated
+
+
+def _versioned_update(*, instance: DjangoModelType, fields: List[str], version_field: str) -> None:
+    # QuerySet.update() neither calls save() nor sets the auto_now fields, so their value is set here
+    now = timezone.now()
+    for model_field in instance._meta.fields:
+        if model_field.name in fields and type(model_field) is DateTimeField and model_field.auto_now is True:
+            setattr(instance, model_field.name, now)
+
+    version = getattr(instance, version_field)
+    updated = (
+        type(instance)
+        ._default_manager.filter(pk=instance.pk, **{version_field: version})
+        .update(**{field: getattr(instance, field) for field in fields}, **{version_field: F(version_field) + 1})
+    )
+    if not updated:
+        raise Conflict()
+
+    setattr(instance, version_field, version + 1)
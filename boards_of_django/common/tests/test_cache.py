@@ -0,0 +1,271 @@
+import time
+from typing import Any, Callable, List, Optional
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from pytest_mock import MockerFixture
+
+from boards_of_django.boards.models import Board, Post
+from boards_of_django.common import transactions
+from boards_of_django.common.cache import (
+    ObjectCache,
+    PageCache,
+    clear_local_object_cache,
+    object_cache_stats,
+    reset_object_cache_stats,
+)
+from boards_of_django.common.transactions import use_replica
+from factories import BoardFactory, PostFactory
+
+boards: ObjectCache[Board] = ObjectCache("test-board")
+posts: ObjectCache[Post] = ObjectCache("test-post")
+pages: PageCache[str] = PageCache("test-pages")
+
+
+def _load(board_id: int) -> Callable[[], Any]:
+    return lambda: Board.objects.filter(id=board_id).first()
+
+
+def _get_post(post_id: int) -> Optional[Post]:
+    return posts.get(
+        post_id, lambda: Post.objects.filter(id=post_id).first(), dependencies=lambda post: [(boards, post.board_id)]
+    )
+
+
+@pytest.mark.django_db
+def test_get_loads_once() -> None:
+    board = BoardFactory()
+
+    with CaptureQueriesContext(connection) as context:
+        first = boards.get(board.id, _load(board.id))
+        second = boards.get(board.id, _load(board.id))
+
+    assert first == second == board
+    assert len(context.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_get_returns_copies() -> None:
+    board = BoardFactory(name="cached")
+    boards.get(board.id, _load(board.id))
+
+    cached = boards.get(board.id, _load(board.id))
+    assert cached is not None
+    cached.name = "changed"
+
+    assert boards.get(board.id, _load(board.id)).name == "cached"  # type: ignore
+
+
+@pytest.mark.django_db
+def test_get_from_shared_cache() -> None:
+    board = BoardFactory()
+    boards.get(board.id, _load(board.id))
+    # As in another process
+    clear_local_object_cache()
+
+    with CaptureQueriesContext(connection) as context:
+        assert boards.get(board.id, _load(board.id)) == board
+
+    assert len(context.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_get_loads_from_primary() -> None:
+    board = BoardFactory()
+    replica_reads: List[bool] = []
+
+    def load() -> Any:
+        replica_reads.append(transactions._use_replica.get())
+        return Board.objects.filter(id=board.id).first()
+
+    with use_replica():
+        assert boards.get(board.id, load) == board
+
+    assert replica_reads == [False]
+
+
+@pytest.mark.django_db
+def test_local_hit_with_dependencies_is_one_round_trip(mocker: MockerFixture) -> None:
+    post = PostFactory()
+    _get_post(post.id)
+    shared_cache = mocker.patch("boards_of_django.common.cache.cache", wraps=cache)
+
+    with CaptureQueriesContext(connection) as context:
+        assert _get_post(post.id) == post
+
+    assert len(context.captured_queries) == 0
+    # The tokens of the post and of its board, fetched together
+    assert [call[0] for call in shared_cache.method_calls] == ["get_many"]
+
+
+# Outside of any transaction, so that the invalidation takes effect at once
+@pytest.mark.django_db(transaction=True)
+def test_invalidated_dependency() -> None:
+    post = PostFactory(text="before")
+    _get_post(post.id)
+    Post.objects.filter(id=post.id).update(text="after")
+
+    boards.invalidate(post.board_id)
+
+    assert _get_post(post.id).text == "after"  # type: ignore
+    # As in another process
+    clear_local_object_cache()
+    Post.objects.filter(id=post.id).update(text="again")
+    boards.invalidate(post.board_id)
+    assert _get_post(post.id).text == "again"  # type: ignore
+
+
+@pytest.mark.django_db
+def test_missing_instances_are_not_cached() -> None:
+    assert boards.get(0, _load(0)) is None
+
+    with CaptureQueriesContext(connection) as context:
+        assert boards.get(0, _load(0)) is None
+
+    assert len(context.captured_queries) == 1
+
+
+# Outside of any transaction, so that the invalidation takes effect at once
+@pytest.mark.django_db(transaction=True)
+def test_invalidate() -> None:
+    board = BoardFactory(name="before")
+    boards.get(board.id, _load(board.id))
+    Board.objects.filter(id=board.id).update(name="after")
+
+    boards.invalidate(board.id)
+
+    assert boards.get(board.id, _load(board.id)).name == "after"  # type: ignore
+
+
+@pytest.mark.django_db
+def test_invalidated_instances_are_not_cached_until_commit() -> None:
+    board = BoardFactory(name="before")
+    boards.get(board.id, _load(board.id))
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Board.objects.filter(id=board.id).update(name="uncommitted")
+        boards.invalidate(board.id)
+        assert boards.get(board.id, _load(board.id)).name == "uncommitted"  # type: ignore
+        raise RuntimeError
+
+    assert boards.get(board.id, _load(board.id)).name == "before"  # type: ignore
+
+
+@pytest.mark.django_db
+def test_disabled(settings: Any) -> None:
+    settings.OBJECT_CACHE_ENABLED = False
+    board = BoardFactory()
+
+    with CaptureQueriesContext(connection) as context:
+        boards.get(board.id, _load(board.id))
+        boards.get(board.id, _load(board.id))
+
+    assert len(context.captured_queries) == 2
+
+
+@pytest.mark.django_db
+def test_stats() -> None:
+    board = BoardFactory()
+    reset_object_cache_stats()
+
+    boards.get(board.id, _load(board.id))
+    boards.get(board.id, _load(board.id))
+    clear_local_object_cache()
+    boards.get(board.id, _load(board.id))
+
+    assert object_cache_stats()["test-board"] == {"local_hit": 1, "hit": 1, "miss": 1}
+
+
+class Renderer:
+    def __init__(self) -> None:
+        self.pages: List[str] = []
+
+    def __call__(self) -> str:
+        self.pages.append(f"page {len(self.pages) + 1}")
+        return self.pages[-1]
+
+
+def test_page_is_rendered_once() -> None:
+    render = Renderer()
+
+    assert pages.get(1, "first", render) == "page 1"
+    assert pages.get(1, "first", render) == "page 1"
+    assert pages.get(1, "other", render) == "page 2"
+
+
+# Outside of any transaction, so that the invalidation takes effect at once
+@pytest.mark.django_db(transaction=True)
+def test_invalidated_page_is_served_stale_while_it_is_rendered_again() -> None:
+    render = Renderer()
+    pages.get(1, "first", render)
+    pages.invalidate(1)
+    # Another request is rendering the page
+    assert pages._lock(1, "first")
+
+    assert pages.get(1, "first", render) == "page 1"
+
+    cache.delete(pages._lock_key(1, "first"))
+    assert pages.get(1, "first", render) == "page 2"
+    assert pages.get(1, "first", render) == "page 2"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale_page_is_not_served_past_the_window(settings: Any, mocker: Any) -> None:
+    render = Renderer()
+    pages.get(1, "first", render)
+    pages.invalidate(1)
+
+    now = time.time()
+    mocker.patch("boards_of_django.common.cache.time.time", return_value=now + settings.PAGE_CACHE_STALE_SECONDS)
+    assert pages._lock(1, "first")
+
+    assert pages.get(1, "first", render) == "page 2"
+    # The lock of the other request is kept
+    assert not pages._lock(1, "first")
+
+
+def test_missing_page_does_not_release_the_lock_of_another_request() -> None:
+    # Another request is rendering the page, e.g. before it was evicted
+    assert pages._lock(1, "first")
+
+    assert pages.get(1, "first", Renderer()) == "page 1"
+
+    assert not pages._lock(1, "first")
+
+
+def test_expired_page_is_served_stale(settings: Any, mocker: Any) -> None:
+    render = Renderer()
+    pages.get(1, "first", render)
+
+    now = time.time()
+    mocker.patch("boards_of_django.common.cache.time.time", return_value=now + settings.PAGE_CACHE_TTL_SECONDS)
+    assert pages._lock(1, "first")
+    assert pages.get(1, "first", render) == "page 1"
+
+    cache.delete(pages._lock_key(1, "first"))
+    assert pages.get(1, "first", render) == "page 2"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_invalidated_pages_are_not_cached_until_commit() -> None:
+    render = Renderer()
+    pages.get(1, "first", render)
+
+    with transaction.atomic():
+        pages.invalidate(1)
+        assert pages.get(1, "first", render) == "page 2"
+        assert pages.get(1, "first", render) == "page 3"
+
+    assert pages.get(1, "first", render) == "page 4"
+    assert pages.get(1, "first", render) == "page 4"
+
+
+def test_pages_disabled(settings: Any) -> None:
+    settings.PAGE_CACHE_ENABLED = False
+    render = Renderer()
+
+    pages.get(1, "first", render)
+
+    assert pages.get(1, "first", render) == "page 2"
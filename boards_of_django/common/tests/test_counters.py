@@ -0,0 +1,68 @@
+import os
+import uuid
+from typing import Iterator
+
+import pytest
+import redis
+
+from boards_of_django.common.counters import CounterBuffer, LocalCounterBuffer, RedisCounterBuffer
+
+
+@pytest.fixture(params=["local", "redis"])
+def buffer(request: pytest.FixtureRequest) -> Iterator[CounterBuffer]:
+    if request.param == "local":
+        yield LocalCounterBuffer()
+        return
+
+    # The settings are overridden by the tests, the Redis server is taken from the environment
+    if not os.environ.get("REDIS_URL"):
+        pytest.skip("REDIS_URL is not set")
+    client = redis.Redis.from_url(os.environ["REDIS_URL"])
+    name = f"test-counters-{uuid.uuid4()}"
+    yield RedisCounterBuffer(client, name)
+    client.delete(name, f"{name}:draining")
+
+
+def test_pending_counts(buffer: CounterBuffer) -> None:
+    buffer.add(1)
+    buffer.add(1)
+    buffer.add(2, 5)
+
+    assert buffer.pending([1, 2, 3]) == {1: 2, 2: 5}
+    assert buffer.pending([]) == {}
+
+
+def test_drain_empties_buffer(buffer: CounterBuffer) -> None:
+    buffer.add(1)
+    buffer.add(2, 3)
+
+    with buffer.drain() as counts:
+        assert counts == {1: 1, 2: 3}
+        # Counted while the drained counts are being written
+        buffer.add(1)
+
+    assert buffer.pending([1, 2]) == {1: 1}
+    with buffer.drain() as counts:
+        assert counts == {1: 1}
+
+
+def test_drain_of_empty_buffer(buffer: CounterBuffer) -> None:
+    with buffer.drain() as counts:
+        assert counts == {}
+
+
+def test_failed_drain_keeps_counts(buffer: CounterBuffer) -> None:
+    buffer.add(1, 2)
+
+    with pytest.raises(RuntimeError):
+        with buffer.drain():
+            raise RuntimeError
+    buffer.add(1)
+
+    assert buffer.pending([1]) == {1: 3}
+    # The counts of the failed drain may be drained apart from the newer ones, but none is lost nor counted twice
+    drained = 0
+    for _ in range(2):
+        with buffer.drain() as counts:
+            drained += counts.get(1, 0)
+    assert drained == 3
@@ -0,0 +1,183 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from boards_of_django.boards.models import Post
+from boards_of_django.common.pagination import CountStrategy, LimitOffsetPagination, get_paginated_response
+from factories import PostFactory
+
+
+def _paginate(pagination: LimitOffsetPagination, query_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    request = Request(APIRequestFactory().get("/posts/", query_params))
+    page = pagination.paginate_queryset(Post.objects.order_by("id"), request)
+    assert page is not None
+    return pagination.get_paginated_response([post.id for post in page]).data  # type: ignore
+
+
+@pytest.mark.django_db
+def test_exact_count() -> None:
+    PostFactory.create_batch(5)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.EXACT
+
+    data = _paginate(pagination, {"limit": 2})
+
+    assert data["count"] == 5
+    assert data["count_strategy"] == "exact"
+    assert data["count_is_estimate"] is False
+    assert data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_count_query_is_skipped_on_last_page(django_assert_num_queries: Callable[..., Any]) -> None:
+    PostFactory.create_batch(3)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.EXACT
+
+    with django_assert_num_queries(1):
+        data = _paginate(pagination, {"limit": 2, "offset": 2})
+
+    assert data["count"] == 3
+    assert data["count_is_estimate"] is False
+    assert data["next"] is None
+
+
+@pytest.mark.django_db
+def test_capped_count() -> None:
+    PostFactory.create_batch(5)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.CAPPED
+    pagination.count_cap = 3
+
+    data = _paginate(pagination, {"limit": 1})
+
+    assert data["count"] == 3
+    assert data["count_strategy"] == "capped"
+    assert data["count_is_estimate"] is True
+
+
+@pytest.mark.django_db
+def test_capped_count_below_cap_is_exact() -> None:
+    PostFactory.create_batch(5)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.CAPPED
+    pagination.count_cap = 10
+
+    data = _paginate(pagination, {"limit": 1})
+
+    assert data["count"] == 5
+    assert data["count_is_estimate"] is False
+
+
+@pytest.mark.django_db
+def test_capped_count_pages_past_the_cap() -> None:
+    posts = PostFactory.create_batch(5)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.CAPPED
+    pagination.count_cap = 2
+
+    data = _paginate(pagination, {"limit": 1, "offset": 3})
+
+    assert data["results"] == [posts[3].id]
+    assert data["count"] == 5
+    assert data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_estimated_count() -> None:
+    PostFactory.create_batch(5)
+    pagination = LimitOffsetPagination()
+    pagination.count_strategy = CountStrategy.ESTIMATE
+
+    data = _paginate(pagination, {"limit": 2})
+
+    assert data["count"] >= 3
+    assert data["count_strategy"] == "estimate"
+    assert data["count_is_estimate"] is True
+
+
+class _Serializer(serializers.Serializer[Any]):
+    id = serializers.IntegerField()
+
+
+def _conditional_list(
+    count_strategy: CountStrategy, query_params: Dict[str, Any], **headers: Any
+) -> Tuple[Response, CaptureQueriesContext]:
+    class Pagination(LimitOffsetPagination):
+        count_cap = 3
+
+    Pagination.count_strategy = count_strategy
+    request = Request(APIRequestFactory().get("/posts/", query_params, **headers))
+    with CaptureQueriesContext(connection) as context:
+        response = get_paginated_response(
+            pagination_class=Pagination,
+            serializer_class=_Serializer,
+            queryset=Post.objects.order_by("-id"),
+            request=request,
+            view=APIView(),
+            conditional=True,
+        )
+    return response, context
+
+
+@pytest.mark.django_db
+def test_conditional_list_is_counted_with_its_etag() -> None:
+    PostFactory.create_batch(5)
+
+    response, context = _conditional_list(CountStrategy.EXACT, {"limit": 2})
+
+    assert response.data["count"] == 5
+    assert response.has_header("ETag")
+    # The ETag and the count, then the page
+    assert len(context.captured_queries) == 2
+    assert "COUNT(" in context.captured_queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_conditional_list_with_capped_count_scans_the_capped_rows() -> None:
+    posts = PostFactory.create_batch(5)
+
+    response, context = _conditional_list(CountStrategy.CAPPED, {"limit": 2})
+
+    assert response.data["count"] == 3
+    assert response.data["count_is_estimate"] is True
+    # The ETag and the count cover the first count_cap + 1 rows only, then the page
+    assert len(context.captured_queries) == 2
+    assert "LIMIT 4" in context.captured_queries[0]["sql"]
+
+    not_modified, context = _conditional_list(
+        CountStrategy.CAPPED, {"limit": 2}, HTTP_IF_NONE_MATCH=response.headers["ETag"]
+    )
+    assert not_modified.status_code == 304
+    assert len(context.captured_queries) == 1
+
+    # Another post takes the place of the removed one among the capped rows, the count and latest update are unchanged
+    posts[-2].delete()
+    response, _ = _conditional_list(CountStrategy.CAPPED, {"limit": 2}, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_conditional_list_has_no_etag_past_the_cap() -> None:
+    PostFactory.create_batch(5)
+
+    response, _ = _conditional_list(CountStrategy.CAPPED, {"limit": 2, "offset": 2})
+
+    assert not response.has_header("ETag")
+
+
+@pytest.mark.django_db
+def test_conditional_list_has_no_etag_with_estimated_count() -> None:
+    PostFactory.create_batch(5)
+
+    response, context = _conditional_list(CountStrategy.ESTIMATE, {"limit": 2})
+
+    assert not response.has_header("ETag")
+    assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
@@ -0,0 +1,120 @@
+from typing import Any, Dict, List
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from boards_of_django.boards.models import Board
+from boards_of_django.common.transactions import (
+    REPLICA_DATABASE,
+    ReplicaRouter,
+    TransactionPolicy,
+    TransactionPolicyMixin,
+    use_replica,
+)
+
+
+class _BoardsApi(TransactionPolicyMixin, APIView):
+    authentication_classes: List[Any] = []
+    permission_classes: List[Any] = []
+
+    def get(self, request: Request) -> Response:
+        return Response({"count": Board.objects.count()})
+
+    def post(self, request: Request) -> Response:
+        Board.objects.create(name=request.data["name"])
+        if request.data.get("fail"):
+            raise serializers.ValidationError("fail")
+        return Response(status=201)
+
+
+def _dispatch(method: str, policies: Dict[str, TransactionPolicy], data: Any = None) -> CaptureQueriesContext:
+    view = _BoardsApi.as_view(transaction_policies=policies)
+    request = getattr(APIRequestFactory(), method)("/boards/", data, format="json")
+    with CaptureQueriesContext(connection) as context:
+        view(request)
+    return context
+
+
+def _savepoints(context: CaptureQueriesContext) -> List[str]:
+    # The tests run inside a transaction, so the ones opened by the APIs show up as savepoints
+    return [query["sql"] for query in context.captured_queries if query["sql"].startswith("SAVEPOINT")]
+
+
+@pytest.mark.parametrize(
+    "method,policies,expected",
+    [
+        ("get", {}, TransactionPolicy.READ_ONLY),
+        ("head", {}, TransactionPolicy.READ_ONLY),
+        ("post", {}, TransactionPolicy.ATOMIC),
+        ("delete", {}, TransactionPolicy.ATOMIC),
+        ("get", {"get": TransactionPolicy.REPLICA}, TransactionPolicy.REPLICA),
+        ("POST", {"post": TransactionPolicy.MANUAL}, TransactionPolicy.MANUAL),
+    ],
+)
+def test_get_transaction_policy(
+    method: str, policies: Dict[str, TransactionPolicy], expected: TransactionPolicy
+) -> None:
+    assert _BoardsApi(transaction_policies=policies).get_transaction_policy(method) is expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("policy", [TransactionPolicy.READ_ONLY, TransactionPolicy.REPLICA])
+def test_read_only_policies_do_not_open_a_transaction(policy: TransactionPolicy) -> None:
+    context = _dispatch("get", {"get": policy})
+
+    assert _savepoints(context) == []
+    assert len(context.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_atomic_policy_opens_a_transaction() -> None:
+    context = _dispatch("post", {}, {"name": "atomic"})
+
+    assert len(_savepoints(context)) == 1
+    assert Board.objects.filter(name="atomic").exists()
+
+
+@pytest.mark.django_db
+def test_atomic_policy_rolls_back_on_error_response() -> None:
+    _dispatch("post", {}, {"name": "atomic", "fail": True})
+
+    assert not Board.objects.filter(name="atomic").exists()
+
+
+@pytest.mark.django_db
+def test_manual_policy_does_not_roll_back_on_error_response() -> None:
+    context = _dispatch("post", {"post": TransactionPolicy.MANUAL}, {"name": "manual", "fail": True})
+
+    assert _savepoints(context) == []
+    assert Board.objects.filter(name="manual").exists()
+
+
+def test_router_reads_from_replica_only_within_use_replica(settings: Any) -> None:
+    settings.DATABASES = {**settings.DATABASES, REPLICA_DATABASE: settings.DATABASES["default"]}
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Board) is None
+    with use_replica():
+        assert router.db_for_read(Board) == REPLICA_DATABASE
+    assert router.db_for_read(Board) is None
+
+
+def test_router_reads_from_primary_without_replica(settings: Any) -> None:
+    settings.DATABASES = {alias: db for alias, db in settings.DATABASES.items() if alias != REPLICA_DATABASE}
+    router = ReplicaRouter()
+
+    with use_replica():
+        assert router.db_for_read(Board) is None
+
+
+def test_router_does_not_migrate_replica() -> None:
+    router = ReplicaRouter()
+
+    assert router.allow_migrate(REPLICA_DATABASE, "boards") is False
+    assert router.allow_migrate("default", "boards") is None
@@ -2,8 +2,11 @@ from typing import Any, Dict, Optional
 
 import pytest
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
-from boards_of_django.common.utils import reverse_with_query_params
+from boards_of_django.common.utils import get_if_match_version, reverse_with_query_params, version_etag
 
 
 @pytest.mark.parametrize(
@@ -31,3 +34,12 @@ from boards_of_django.common.utils import reverse_with_query_params
 def test_reverse_with_query_params(query_kwargs: Optional[Dict[str, Any]], expected_url_suffix: str) -> None:
     base_url = reverse("boards:boards")
     assert reverse_with_query_params("boards:boards", query_kwargs=query_kwargs) == f"{base_url}{expected_url_suffix}"
+
+
+def test_version_etag_with_modification_is_weak() -> None:
+    etag = version_etag(3, timezone.now())
+    request = Request(APIRequestFactory().put("/posts/1/", HTTP_IF_MATCH=etag))
+
+    assert version_etag(3) == '"3"'
+    assert etag.startswith('W/"3-')
+    assert get_if_match_version(request) == 3
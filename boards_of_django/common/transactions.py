@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.views import APIView
+
+# Alias of the read replica in settings.DATABASES, when one is configured
+REPLICA_DATABASE = "replica"
+
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+class TransactionPolicy(Enum):
+    """
+    How the database queries of an API method are run.
+
+    - READ_ONLY : In autocommit mode, without any transaction around the method, on the primary database
+    - REPLICA : As READ_ONLY, but the queries are sent to the read replica, when one is configured. Only for methods
+        that can show data that is slightly behind the primary.
+    - ATOMIC : In one transaction, rolled back if the method fails (as with ATOMIC_REQUESTS)
+    - MANUAL : In autocommit mode, the services called by the method manage their own transactions
+    """
+
+    READ_ONLY = "read_only"
+    REPLICA = "replica"
+    ATOMIC = "atomic"
+    MANUAL = "manual"
+
+
+@contextmanager
+def use_replica() -> Iterator[None]:
+    """Send the read queries run in this context to the read replica, when one is configured."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Send the read queries run in this context to the primary database, even within use_replica."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Database router that sends the reads to the replica within use_replica, and everything else to the primary."""
+
+    def db_for_read(self, model: Type[models.Model], **hints: Any) -> Optional[str]:
+        if _use_replica.get() and REPLICA_DATABASE in settings.DATABASES:
+            return REPLICA_DATABASE
+        return None
+
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints: Any) -> Optional[bool]:
+        # The replica holds the same rows as the primary
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DATABASE}:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        if db == REPLICA_DATABASE:
+            return False
+        return None
+
+
+class TransactionPolicyMixin(APIView):
+    """
+    Run every method of the API with its own transaction policy.
+
+    Safe methods (GET, HEAD, OPTIONS) are READ_ONLY and the other ones are ATOMIC by default, other policies are
+    declared per method in `transaction_policies`, e.g. `{"get": TransactionPolicy.REPLICA}`.
+
+    Unlike ATOMIC_REQUESTS, read-only methods do not pay for the BEGIN and COMMIT round trips, and they do not pin a
+    server connection for the whole request when the database is behind a transaction pooler (e.g. pgbouncer).
+    """
+
+    transaction_policies: Dict[str, TransactionPolicy] = {}
+
+    def get_transaction_policy(self, method: str) -> TransactionPolicy:
+        """
+        Get the transaction policy of the given method.
+
+        Parameters
+        ----------
+        method : HTTP method, in any case
+
+        Returns
+        -------
+        TransactionPolicy
+        """
+        if method.lower() in self.transaction_policies:
+            return self.transaction_policies[method.lower()]
+        return TransactionPolicy.READ_ONLY if method.upper() in SAFE_METHODS else TransactionPolicy.ATOMIC
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        policy = self.get_transaction_policy(request.method or "")
+
+        if policy is TransactionPolicy.ATOMIC:
+            with transaction.atomic():
+                response = super().dispatch(request, *args, **kwargs)
+                # Exceptions are turned into error responses by DRF before they leave the block, the transaction
+                # must be rolled back all the same
+                if getattr(response, "exception", False):
+                    transaction.set_rollback(True)
+                return response
+
+        if policy is TransactionPolicy.REPLICA:
+            with use_replica():
+                return super().dispatch(request, *args, **kwargs)
+
+        return super().dispatch(request, *args, **kwargs)
@@ -1,8 +1,13 @@
-from typing import Any, Dict, Optional, Type
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models import Count, Max, Sum
+from django.db.models.query import QuerySet
 from django.urls import reverse
-from django.utils.http import urlencode
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
 from rest_framework import exceptions, serializers
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -78,7 +83,7 @@ def inline_serializer(
     *,
     fields: Dict[str, Any],
     data: Optional[Dict[str, Any]] = None,
-    **kwargs: Optional[Dict[str, Any]],
+    **kwargs: Any,
 ) -> Serializer[Any]:
     """
     Create a nested serializer.
@@ -98,6 +103,166 @@ def inline_serializer(
     serializer_class = _create_serializer_class(name="", fields=fields)
 
     if data is not None:
-        return serializer_class(data=data, **kwargs)  # type: ignore
+        return serializer_class(data=data, **kwargs)
 
-    return serializer_class(**kwargs)  # type: ignore
+    return serializer_class(**kwargs)
+
+
+class SelectorRelatedField(serializers.PrimaryKeyRelatedField):  # type: ignore
+    """
+    Primary key field that gets the related instance with a selector, e.g. a cached one, rather than from its queryset.
+
+    The queryset is still given, for the API schema, and it should return the same instances as the selector.
+    """
+
+    def __init__(self, *, selector: Callable[[int], Optional[models.Model]], **kwargs: Any) -> None:
+        self.selector = selector
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data: Any) -> models.Model:
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        instance = self.selector(pk)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
+
+
+def version_etag(version: int, updated_at: Optional[datetime] = None) -> str:
+    """
+    Build the entity tag of a given version of a resource, as sent in the ETag header.
+
+    Parameters
+    ----------
+    version : Version of the resource
+    updated_at : Last modification of the resource. When given, the entity tag changes along with the parts of the
+        resource that do not change its version (e.g. its counters), but its version can still be read by
+        get_if_match_version. The tag is then weak, as the representation may hold parts that change neither
+        (e.g. a view count), so that two representations with the same tag are not guaranteed to be identical.
+
+    Returns
+    -------
+    Entity tag (quoted version, followed by the modification time if given)
+    """
+    if updated_at is None:
+        return f'"{version}"'
+    return f'W/"{version}-{_microseconds(updated_at)}"'
+
+
+def get_if_match_version(request: Request) -> Optional[int]:
+    """
+    Get the version of the resource that the request is based on, from its If-Match header.
+
+    The entity tag is expected to be the one built by version_etag, weak or not: only the version is compared.
+
+    Parameters
+    ----------
+    request : Given request
+
+    Returns
+    -------
+    The version, or None if the request has no If-Match header (or matches any version with `*`).
+    """
+    if_match = request.headers.get("If-Match")
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    tag = if_match.strip().removeprefix("W/")
+    if tag.startswith('"') and tag.endswith('"'):
+        version = tag[1:-1].split("-")[0]
+        if version.isdigit():
+            return int(version)
+    raise exceptions.ValidationError({"If-Match": ['Expected the entity tag of a single version, e.g. "1".']})
+
+
+def _microseconds(value: datetime) -> int:
+    return int(value.timestamp() * 1_000_000)
+
+
+def modified_etag(updated_at: Optional[datetime], *parts: Any) -> str:
+    """
+    Build a strong entity tag from the last modification of a resource.
+
+    Parameters
+    ----------
+    updated_at : Last modification of the resource, None if it was never modified (e.g. an empty collection)
+    parts : Other parts of the entity tag, e.g. the number of items of a collection
+
+    Returns
+    -------
+    Entity tag (quoted parts and modification time)
+    """
+    return '"' + "-".join([*map(str, parts), str(_microseconds(updated_at) if updated_at is not None else 0)]) + '"'
+
+
+def count_with_etag(queryset: QuerySet[Any]) -> Tuple[int, str]:
+    """
+    Count the items of a collection and compute its entity tag, with a single aggregate query.
+
+    The entity tag is derived from the number of items, the sum of their ids and their latest `updated_at`, so it
+    costs no more than counting them. Adding, removing or modifying an item changes it.
+
+    Collections have no Last-Modified: the latest `updated_at` goes back in time when the latest item is removed,
+    so a client would keep getting 304 Not Modified with If-Modified-Since.
+
+    Parameters
+    ----------
+    queryset : Items of the collection, without ordering unless it is sliced
+
+    Returns
+    -------
+    Tuple of the number of items and the entity tag
+    """
+    validators = queryset.aggregate(count=Count("id"), ids=Sum("id"), last_modified=Max("updated_at"))
+    return validators["count"], modified_etag(validators["last_modified"], validators["count"], validators["ids"] or 0)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """
+    Build the ETag and Last-Modified headers of a response.
+
+    Parameters
+    ----------
+    etag : Entity tag of the response
+    last_modified : Last modification of the resource, if known
+
+    Returns
+    -------
+    Headers
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
+
+
+def conditional_response(request: Request, etag: str, last_modified: Optional[datetime]) -> Optional[Response]:
+    """
+    Evaluate the conditional headers of a request (If-None-Match, If-Modified-Since, etc.) against a resource.
+
+    Meant to be called before serializing the resource, so that a client that already has its current representation
+    gets an empty response.
+
+    Parameters
+    ----------
+    request : Given request
+    etag : Current entity tag of the resource
+    last_modified : Last modification of the resource, if known
+
+    Returns
+    -------
+    A 304 Not Modified (or 412 Precondition Failed) response, or None if the resource must be sent
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is None:
+        return None
+    return Response(status=response.status_code, headers=validator_headers(etag, last_modified))
@@ -54,3 +54,97 @@ def task_send_confirmation_email(user: "User", confirmation_otp: "ConfirmationOT
         fail_silently=True,
     )
     return "Done"
+
+
+@app.task
+def task_purge_post(post_id: int) -> str:
+    """
+    Purge a deleted post and its comments.
+
+    The purge runs a bounded number of batches, then the task queues itself again until the post is purged.
+
+    Parameters
+    ----------
+    post_id : Id of the deleted post.
+
+    Returns
+    -------
+    "Done" message when the post is purged, "Continued" when the task was queued again.
+    """
+    from boards_of_django.boards.services import purge_post
+
+    if not purge_post(post_id=post_id):
+        task_purge_post.delay(post_id)
+        return "Continued"
+    return "Done"
+
+
+@app.task
+def task_purge_board(board_id: int) -> str:
+    """
+    Purge a deleted board with its posts, their comments and the board's memberships.
+
+    The purge runs a bounded number of batches, then the task queues itself again until the board is purged.
+
+    Parameters
+    ----------
+    board_id : Id of the deleted board.
+
+    Returns
+    -------
+    "Done" message when the board is purged, "Continued" when the task was queued again.
+    """
+    from boards_of_django.boards.services import purge_board
+
+    if not purge_board(board_id=board_id):
+        task_purge_board.delay(board_id)
+        return "Continued"
+    return "Done"
+
+
+@app.task
+def task_compact_comments() -> str:
+    """
+    Remove the tombstones of deleted comments that have no replies.
+
+    The task is run periodically by Celery beat, each run removes a bounded number of tombstones.
+
+    Returns
+    -------
+    Number of removed tombstones.
+    """
+    from boards_of_django.boards.services import compact_comments
+
+    return f"Removed {compact_comments()} tombstones"
+
+
+@app.task
+def task_flush_post_views() -> str:
+    """
+    Add the buffered views of posts to their view counters.
+
+    The task is run periodically by Celery beat.
+
+    Returns
+    -------
+    Number of updated posts.
+    """
+    from boards_of_django.boards.services import flush_post_views
+
+    return f"Updated the views of {flush_post_views()} posts"
+
+
+@app.task
+def task_delete_expired_tokens() -> str:
+    """
+    Delete the authorization tokens that have expired.
+
+    The task is run periodically by Celery beat, each run deletes a bounded number of tokens.
+
+    Returns
+    -------
+    Number of deleted tokens.
+    """
+    from boards_of_django.authentication.services import delete_expired_tokens
+
+    return f"Deleted {delete_expired_tokens()} expired tokens"
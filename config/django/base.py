@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     *LOCAL_APPS,
     *THIRD_PARTY_APPS,
 ]
@@ -95,7 +96,17 @@ DATABASES = {
     }
 }
 
-DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Optional read replica, which the APIs may send their reads to (see boards_of_django.common.transactions). There is
+# no ATOMIC_REQUESTS: every API declares its own transaction policy.
+if env("POSTGRES_REPLICA_HOST", default=None):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": env("POSTGRES_REPLICA_HOST"),
+        "PORT": env("POSTGRES_REPLICA_PORT", default=env("POSTGRES_PORT")),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["boards_of_django.common.transactions.ReplicaRouter"]
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -145,15 +156,31 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "boards_of_django.authentication.tokens.CachedTokenAuthentication",
+        "boards_of_django.authentication.signed_tokens.SignedTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "EXCEPTION_HANDLER": "boards_of_django.common.utils.raise_django_exception_as_drf_exception",
 }
 
+# Strategy used to compute total counts in paginated responses: "exact", "capped" or "estimate"
+PAGINATION_COUNT_STRATEGY = env("PAGINATION_COUNT_STRATEGY", default="exact")
+PAGINATION_COUNT_CAP = env.int("PAGINATION_COUNT_CAP", default=10000)
+
 APP_DOMAIN = env("APP_DOMAIN", default="http://localhost:8000")
 
+# Authorization tokens expire once they have not been used for that long
+AUTH_TOKEN_LIFETIME_SECONDS = env.int("AUTH_TOKEN_LIFETIME_SECONDS", default=14 * 24 * 60 * 60)
+# A token in use is refreshed (written to the database) at most that often
+AUTH_TOKEN_REFRESH_INTERVAL_SECONDS = env.int("AUTH_TOKEN_REFRESH_INTERVAL_SECONDS", default=60 * 60)
+# How long the user of a token is cached, e.g. after the user was deactivated by other means than the services
+AUTH_TOKEN_CACHE_TTL_SECONDS = env.int("AUTH_TOKEN_CACHE_TTL_SECONDS", default=60)
+# Lifetimes of the signed tokens issued by the "signed" login mode
+AUTH_ACCESS_TOKEN_LIFETIME_SECONDS = env.int("AUTH_ACCESS_TOKEN_LIFETIME_SECONDS", default=5 * 60)
+AUTH_REFRESH_TOKEN_LIFETIME_SECONDS = env.int("AUTH_REFRESH_TOKEN_LIFETIME_SECONDS", default=14 * 24 * 60 * 60)
+
 
+from config.settings.cache import *  # noqa
 from config.settings.celery import *  # noqa
 from config.settings.email import *  # noqa
 from config.settings.swagger import *  # noqa
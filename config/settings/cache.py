@@ -0,0 +1,28 @@
+from config.env import env
+
+# Redis server shared by the application processes, e.g. for the cache and the buffered counters. Optional in
+# development and tests, where in-process fallbacks are used instead.
+REDIS_URL = env("REDIS_URL", default=None)
+
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# How long the responses of requests sent with an Idempotency-Key are replayed for
+IDEMPOTENCY_KEY_TTL_SECONDS = env.int("IDEMPOTENCY_KEY_TTL_SECONDS", default=24 * 60 * 60)
+# How long a request with an Idempotency-Key may take before a duplicate of it is processed again
+IDEMPOTENCY_LOCK_TTL_SECONDS = env.int("IDEMPOTENCY_LOCK_TTL_SECONDS", default=10)
+
+# Read-through cache of boards, posts and comments by id (see boards_of_django.common.cache)
+OBJECT_CACHE_ENABLED = env.bool("OBJECT_CACHE_ENABLED", default=True)
+OBJECT_CACHE_TTL_SECONDS = env.int("OBJECT_CACHE_TTL_SECONDS", default=5 * 60)
+# Number of instances kept in the memory of every process, in front of the shared cache
+OBJECT_CACHE_LOCAL_SIZE = env.int("OBJECT_CACHE_LOCAL_SIZE", default=1000)
+OBJECT_CACHE_STATS_INTERVAL_SECONDS = env.int("OBJECT_CACHE_STATS_INTERVAL_SECONDS", default=10)
+
+# Cache of the hot first pages of lists, e.g. of the posts of a board (see boards_of_django.common.cache.PageCache)
+PAGE_CACHE_ENABLED = env.bool("PAGE_CACHE_ENABLED", default=True)
+PAGE_CACHE_TTL_SECONDS = env.int("PAGE_CACHE_TTL_SECONDS", default=60)
+# How long a page that is no longer fresh is still served while one request renders it again
+PAGE_CACHE_STALE_SECONDS = env.int("PAGE_CACHE_STALE_SECONDS", default=5)
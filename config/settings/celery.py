@@ -10,3 +10,18 @@ CELERY_TIMEZONE = "UTC"
 CELERY_TASK_SOFT_TIME_LIMIT = 20  # seconds
 CELERY_TASK_TIME_LIMIT = 30  # seconds
 CELERY_TASK_MAX_RETRIES = 3
+
+CELERY_BEAT_SCHEDULE = {
+    "compact-comments": {
+        "task": "boards_of_django.tasks.celery.task_compact_comments",
+        "schedule": 60 * 60,  # seconds
+    },
+    "flush-post-views": {
+        "task": "boards_of_django.tasks.celery.task_flush_post_views",
+        "schedule": 60,  # seconds
+    },
+    "delete-expired-tokens": {
+        "task": "boards_of_django.tasks.celery.task_delete_expired_tokens",
+        "schedule": 60 * 60,  # seconds
+    },
+}
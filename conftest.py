@@ -1,11 +1,15 @@
-from typing import Any, Generator
+from typing import Any, Generator, Iterator
 
 import pytest
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from pytest_factoryboy import register
 from rest_framework.test import APIClient
 
 from boards_of_django.authentication.models import User
+from boards_of_django.authentication.signed_tokens import get_revocation_list
+from boards_of_django.common.cache import clear_local_object_cache
+from boards_of_django.common.counters import get_counter_buffer
 from factories import UserFactory
 
 register(UserFactory)
@@ -17,6 +21,21 @@ class APIClientWithUser(APIClient):
         self.user: User
 
 
+@pytest.fixture(autouse=True)
+def local_stores(settings: Any) -> Iterator[None]:
+    # Every test gets its own in-process cache, counter buffers and revocation list, even when a Redis server is
+    # configured
+    settings.REDIS_URL = None
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    clear_local_object_cache()
+    get_counter_buffer.cache_clear()
+    get_revocation_list.cache_clear()
+    yield
+    get_counter_buffer.cache_clear()
+    get_revocation_list.cache_clear()
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     return APIClient()
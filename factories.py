@@ -7,7 +7,7 @@ from factory import Faker, SubFactory, fuzzy
 
 from boards_of_django.authentication.models import ConfirmationOTP
 from boards_of_django.authentication.models import User as UserType
-from boards_of_django.boards.models import Board, Comment, Post
+from boards_of_django.boards.models import Board, Comment, Membership, Post
 
 User = get_user_model()
 
@@ -40,14 +40,19 @@ class BoardFactory(factory.django.DjangoModelFactory):  # type: ignore
         if not create:
             return
         if extracted:
-            self.members.add(*extracted)
+            Membership.objects.bulk_create([Membership(board=self, user=user) for user in extracted])
+            self.member_count = self.memberships.count()
+            self.save(update_fields=["member_count"])
 
     @factory.post_generation  # type: ignore
     def admins(self, create: bool, extracted: List[UserType]) -> None:
         if not create:
             return
         if extracted:
-            self.admins.add(*extracted)
+            for user in extracted:
+                Membership.objects.update_or_create(board=self, user=user, defaults={"role": Membership.Role.ADMIN})
+            self.member_count = self.memberships.count()
+            self.save(update_fields=["member_count"])
 
 
 class PostFactory(factory.django.DjangoModelFactory):  # type: ignore